@@ -0,0 +1,78 @@
+"""Benchmark the object backends (GitPython, pygit2, git subprocess).
+
+Usage::
+
+    python benchmarks/bench_backends.py                      # synthetic repo
+    python benchmarks/bench_backends.py --repo-path ~/src/monorepo --backends gitpython subprocess
+
+Each backend is timed on the work that goes through it: the verbose-mode tree
+expansion of a full build_graph(), the object-by-object fallback walk, and
+the merge bases of branch mode.  The object cache is disabled so every run
+reads every object.  Backends whose library is not installed are skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_traversal import make_repo  # noqa: E402
+
+from visigit.backends import BACKENDS, available_backends  # noqa: E402
+from visigit.repo import GitRepo  # noqa: E402
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repo-path", default=None)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--trunk", type=int, default=2000)
+    parser.add_argument("--branches", type=int, default=40)
+    parser.add_argument("--branch-commits", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="visigit-bench-") as tmp:
+        repo_path = args.repo_path
+        if repo_path is None:
+            repo_path = tmp
+            make_repo(Path(tmp), args.trunk, args.branches, args.branch_commits)
+
+        n_commits = len(GitRepo(repo_path, use_cache=False).build_graph().commits)
+        print(f"{repo_path}: {n_commits} commits")
+        print(f"  {'backend':<11} {'verbose':>9} {'object walk':>12} {'branch':>9}")
+        for name in args.backends:
+            if name not in available_backends():
+                print(f"  {name:<11} (not installed)")
+                continue
+
+            def repo() -> GitRepo:
+                return GitRepo(repo_path, use_cache=False, backend=name)
+
+            def object_walk() -> None:
+                r = repo()
+                r._bfs_commit_objects(r._collect_refs(exclude_remotes=False), None, False)
+
+            verbose = best_of(args.repeat, lambda: repo().build_graph(include_trees=True))
+            walk = best_of(args.repeat, object_walk)
+            branch = best_of(args.repeat, lambda: repo().get_branch_topology())
+            print(f"  {name:<11} {verbose:8.3f}s {walk:11.3f}s {branch:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark GitRepo.build_graph() traversal, without and with the object cache.
+
+Usage::
+
+    python benchmarks/bench_traversal.py                     # synthetic repo
+    python benchmarks/bench_traversal.py --repo-path ~/src/monorepo
+
+Without --repo-path a repository with one trunk and many long-lived branches
+is generated with ``git fast-import``.  The uncached run traverses the full
+history every time; the cached run reads it from .git/visigit, which the
+first cached build fills.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from visigit.repo import GitRepo  # noqa: E402
+
+
+def make_repo(path: Path, trunk: int, branches: int, branch_commits: int) -> None:
+    """Write a trunk of commits plus branches forking from random trunk commits."""
+    rng = random.Random(0)
+    subprocess.check_call(["git", "init", "-q", "-b", "main", str(path)])
+    lines: list[str] = []
+    mark = 0
+    when = 1_600_000_000
+
+    def commit(ref: str, parent_mark: int, text: str) -> int:
+        nonlocal mark, when
+        mark += 1
+        when += 60
+        data = text.encode()
+        lines.extend(
+            [
+                f"commit {ref}",
+                f"mark :{mark}",
+                f"committer Bench <bench@example.com> {when} +0000",
+                f"data {len(data)}",
+                text,
+            ]
+        )
+        if parent_mark:
+            lines.append(f"from :{parent_mark}")
+        lines.extend([f"M 100644 inline {ref.rsplit('/', 1)[-1]}.txt", f"data {len(data)}", text])
+        lines.append("")
+        return mark
+
+    trunk_marks = []
+    parent = 0
+    for i in range(trunk):
+        parent = commit("refs/heads/main", parent, f"trunk {i}")
+        trunk_marks.append(parent)
+    for b in range(branches):
+        parent = rng.choice(trunk_marks)
+        for i in range(branch_commits):
+            parent = commit(f"refs/heads/branch-{b}", parent, f"branch {b} commit {i}")
+
+    subprocess.run(
+        ["git", "fast-import", "--quiet"],
+        cwd=path,
+        input="\n".join(lines).encode(),
+        check=True,
+    )
+
+
+def time_build(repo_path: str, use_cache: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        GitRepo(repo_path, use_cache=use_cache).build_graph()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--repo-path", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--trunk", type=int, default=5000)
+    parser.add_argument("--branches", type=int, default=400)
+    parser.add_argument("--branch-commits", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="visigit-bench-") as tmp:
+        repo_path = args.repo_path
+        if repo_path is None:
+            repo_path = tmp
+            make_repo(Path(tmp), args.trunk, args.branches, args.branch_commits)
+
+        n_commits = len(GitRepo(repo_path, use_cache=True).build_graph().commits)
+        print(f"{repo_path}: {n_commits} commits")
+        for use_cache in (False, True):
+            seconds = time_build(repo_path, use_cache, args.repeat)
+            print(f"  {'cached' if use_cache else 'uncached':<8} {seconds:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
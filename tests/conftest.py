@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import subprocess
 from pathlib import Path
+from typing import Optional, Sequence
 
 import pytest
 
@@ -91,9 +92,10 @@ class RepoTools:
         cmd.append(ref)
         self._run(cmd)
 
-    def merge(self, branch: str, no_ff: bool = True) -> None:
-        msg = f"Merge branch '{branch}'"
-        cmd = ["git", "merge", branch, "-m", msg]
+    def merge(self, *branches: str, no_ff: bool = True) -> None:
+        """Merge one branch, or several in one octopus merge."""
+        msg = f"Merge branch '{branches[0]}'" if len(branches) == 1 else "Octopus merge"
+        cmd = ["git", "merge", *branches, "-m", msg]
         if no_ff:
             cmd.append("--no-ff")
         self._run(cmd)
@@ -104,6 +106,55 @@ class RepoTools:
         else:
             self._run(["git", "tag", name])
 
+    # ------------------------------------------------------------------
+    # Histories
+    # ------------------------------------------------------------------
+
+    def commits(self, *names: str, path: str = "{}.txt") -> dict[str, str]:
+        """Commit a new file per name (at path.format(name)), with the name as message.
+
+        Returns {name: hexsha}.
+        """
+        shas = {}
+        for name in names:
+            self.write(path.format(name), name)
+            shas[name] = self.commit(name)
+        return shas
+
+    def branch_commits(self, branch: str, *names: str, path: str = "{}.txt") -> dict[str, str]:
+        """Create branch at HEAD, add commits() to it, then return to the previous branch."""
+        previous = self.current_branch()
+        self.checkout(branch, new=True)
+        shas = self.commits(*names, path=path)
+        self.checkout(previous)
+        return shas
+
+    def merge_history(
+        self,
+        base: Sequence[str] = ("base",),
+        feature: Sequence[str] = ("sub/feature",),
+        main: Sequence[str] = ("main",),
+        after: Sequence[str] = (),
+        branch: str = "feature",
+        tag: Optional[str] = "v1.0",
+        annotated: bool = True,
+    ) -> dict[str, str]:
+        """Build main: base... - main... - merge(branch) - after..., and return {name: hexsha}.
+
+        branch forks at the last base commit and holds the feature commits;
+        tag (None for no tag) marks the merge commit, whose SHA is under
+        "merge".  Ends with main checked out.
+        """
+        shas = self.commits(*base)
+        shas.update(self.branch_commits(branch, *feature))
+        shas.update(self.commits(*main))
+        self.merge(branch)
+        shas["merge"] = self.rev_parse("HEAD")
+        if tag:
+            self.tag(tag, annotated=annotated)
+        shas.update(self.commits(*after))
+        return shas
+
     def detach(self, ref: str = "HEAD") -> None:
         """Detach HEAD at ref."""
         self._run(["git", "checkout", "--detach", ref])
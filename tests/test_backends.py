@@ -0,0 +1,115 @@
+"""Tests for the object-access backends: every backend must answer alike."""
+
+from __future__ import annotations
+
+import git
+import pytest
+
+from visigit.backends import (
+    BACKENDS,
+    GitPythonBackend,
+    ObjectBackend,
+    available_backends,
+    open_backend,
+)
+from visigit.cli import _parse_args
+
+from .conftest import RepoTools
+
+_MISSING = "ab" * 20
+
+
+def _history(repo: RepoTools) -> dict[str, str]:
+    """main: a - b - merge(feature) - body; feature forks at a.  Returns named SHAs."""
+    shas = repo.merge_history(base=("a",), feature=("dir/f",), main=("b",), tag="v1")
+    shas["tag"] = repo.rev_parse("v1")
+    repo._run(["git", "commit", "--allow-empty", "-m", "first line\n\nbody text", "--quiet"])
+    shas["body"] = repo.rev_parse("HEAD")
+    repo._run(["git", "checkout", "--orphan", "lonely"])
+    shas["lonely"] = repo.commit("lonely root")
+    return shas
+
+
+@pytest.fixture(params=[b for b in available_backends() if b != "gitpython"])
+def backend_pair(request, repo: RepoTools):
+    shas = _history(repo)
+    gitrepo = git.Repo(str(repo.path))
+    backend = open_backend(request.param, gitrepo)
+    yield GitPythonBackend(gitrepo), backend, shas
+    backend.close()
+
+
+def test_read_commit_matches_gitpython(backend_pair):
+    reference, backend, shas = backend_pair
+    for name in ("a", "dir/f", "b", "merge", "body", "lonely"):
+        assert backend.read_commit(shas[name]) == reference.read_commit(shas[name])
+    assert backend.read_commit(_MISSING) is None
+
+
+def test_commit_lookups_match_gitpython(backend_pair):
+    reference, backend, shas = backend_pair
+    for sha in (shas["merge"], shas["tag"], _MISSING):
+        assert backend.has_commit(sha) == reference.has_commit(sha)
+    assert backend.has_commit(shas["tag"])  # an annotated tag peels to its commit
+    candidates = [shas["merge"], shas["tag"], _MISSING, shas["lonely"]]
+    assert backend.has_commits(candidates) == reference.has_commits(candidates)
+    assert backend.has_commits(candidates) == {shas["merge"], shas["tag"], shas["lonely"]}
+    for sha in (shas["merge"], shas["tag"], _MISSING):
+        assert backend.peel_to_commit(sha) == reference.peel_to_commit(sha)
+    assert backend.peel_to_commit(shas["tag"]) == shas["merge"]
+    assert backend.peel_to_commit(reference.read_commit(shas["merge"]).tree_hexsha) is None
+    assert backend.committed_date(shas["b"]) == reference.committed_date(shas["b"])
+    assert backend.committed_date(_MISSING) is None
+
+
+def test_read_tree_matches_gitpython(backend_pair):
+    reference, backend, shas = backend_pair
+    root = reference.read_commit(shas["merge"]).tree_hexsha
+    entries = backend.read_tree(root)
+    assert entries == reference.read_tree(root)
+    subtree = next(sha for kind, name, sha in entries if name == "dir")
+    assert backend.read_tree(subtree) == [("blob", "f.txt", reference.read_tree(subtree)[0][2])]
+    assert backend.read_trees([subtree, root]) == [reference.read_tree(subtree), entries]
+    with pytest.raises(ValueError):
+        backend.read_trees([root, shas["merge"]])  # a commit is not a tree
+    assert backend.read_tree(root) == entries  # the reader is still in step
+
+
+def test_merge_base_matches_gitpython(backend_pair):
+    reference, backend, shas = backend_pair
+    assert backend.merge_base(shas["b"], shas["dir/f"]) == shas["a"]
+    assert backend.merge_base(shas["a"], shas["merge"]) == shas["a"]
+    assert backend.merge_base(shas["lonely"], shas["merge"]) is None
+    assert reference.merge_base(shas["lonely"], shas["merge"]) is None
+
+
+def test_unknown_backend_rejected(repo: RepoTools):
+    with pytest.raises(ValueError):
+        open_backend("libgit3", git.Repo(str(repo.path)))
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoMergeBase(ObjectBackend):
+        def read_commit(self, hexsha):
+            return None
+
+        def has_commit(self, hexsha):
+            return False
+
+        def committed_date(self, hexsha):
+            return None
+
+        def read_tree(self, hexsha):
+            return []
+
+    with pytest.raises(TypeError, match="merge_base"):
+        NoMergeBase()
+
+
+def test_cli_backend_flag():
+    assert _parse_args([]).backend == "gitpython"
+    assert _parse_args(["--backend", "subprocess"]).backend == "subprocess"
+    missing = [b for b in BACKENDS if b not in available_backends()]
+    for name in missing:
+        with pytest.raises(SystemExit):
+            _parse_args(["--backend", name])
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import re
 import subprocess
+import sys
 from pathlib import Path
 
 from visigit.builder import GraphBuilder
@@ -193,6 +195,72 @@ def test_normal_mode_merge_both_parents(repo: RepoTools):
     assert edge_in(src, merge_sha, feat_sha)
 
 
+def test_normal_mode_cut_edge_merge_not_collapsed(repo: RepoTools, monkeypatch):
+    """A merge that lost a parent to --since stays visible instead of joining a boring run."""
+
+    def commit_at(name: str, date: str) -> str:
+        monkeypatch.setenv("GIT_AUTHOR_DATE", date)
+        monkeypatch.setenv("GIT_COMMITTER_DATE", date)
+        repo.write(f"{name}.txt")
+        return repo.commit(name)
+
+    commit_at("base", "2020-01-01T12:00:00")
+    repo.checkout("feature", new=True)
+    commit_at("feature", "2020-02-01T12:00:00")
+    repo.checkout("main")
+    commit_at("main", "2024-01-01T12:00:00")
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "2024-02-01T12:00:00")
+    repo.merge("feature")
+    merge_sha = repo.rev_parse("HEAD")
+    commit_at("after", "2024-03-01T12:00:00")
+    commit_at("tip", "2024-04-01T12:00:00")
+
+    graph = GitRepo(str(repo.path)).build_graph(since="2023-01-01")
+    assert graph.commits[merge_sha].parents and merge_sha in graph.truncated
+    assert "refs/heads/feature" not in {ref.path for ref in graph.refs}
+    dg = GraphBuilder(mode="normal").build(graph)
+    assert node_in(dg.source, merge_sha)
+    assert "refs/heads/feature" not in dg.source
+
+
+def _streaming_history(repo: RepoTools) -> None:
+    """Boring runs on both sides of a merge, an annotated tag, a side branch, and
+    two branches whose collapsible runs fork from the same commit."""
+    repo.merge_history(
+        base=("a", "b", "c"), feature=("f1", "f2", "f3"), main=("m",), after=("d", "e", "g")
+    )
+    repo.branch_commits("side", "s")
+    for branch in ("x", "y"):
+        repo.branch_commits(branch, *(f"{branch}{i}" for i in (1, 2, 3)))
+    repo.commits("h")
+
+
+def test_streamed_dot_draws_same_graph_as_build(repo: RepoTools):
+    _streaming_history(repo)
+    git_repo = GitRepo(str(repo.path), use_cache=False)
+    dg = GraphBuilder(mode="normal", commit_details=True).build(git_repo.build_graph())
+
+    stream = git_repo.stream_graph(metadata=True)
+    stream.hash_length = git_repo.build_graph().hash_length
+    lines = list(GraphBuilder(mode="normal", commit_details=True).iter_dot(stream))
+
+    assert "".join(lines).startswith("digraph {")
+    assert lines[-1] == "}\n"
+    assert sorted(lines[2:-1]) == sorted(dg.body)
+    assert "commit_summary" not in "".join(lines)  # type keys never leak into DOT
+    assert len(re.findall(r"\(2\)", "".join(lines))) >= 3  # incl. both x and y runs
+
+
+def test_streamed_dot_node_ids_match_build(repo: RepoTools):
+    _streaming_history(repo)
+    git_repo = GitRepo(str(repo.path), use_cache=False)
+    batch = GraphBuilder(mode="normal")
+    batch.build(git_repo.build_graph())
+    streamed = GraphBuilder(mode="normal")
+    list(streamed.iter_dot(git_repo.stream_graph()))
+    assert streamed.node_ids == batch.node_ids
+
+
 def test_normal_mode_detached_head(repo: RepoTools):
     repo.write("a.txt")
     sha = repo.commit("only")
@@ -227,6 +295,41 @@ def test_commit_details_flag(repo: RepoTools):
     assert "my special message" in dg.source
 
 
+def test_lazy_metadata_loaded_only_for_drawn_commits(repo: RepoTools):
+    for i in range(5):
+        repo.write(f"f{i}.txt")
+        repo.commit(f"message {i}")
+    shas = repo._run(["git", "rev-list", "HEAD"]).split()  # newest first
+
+    for mode in ("normal", "verbose"):
+        eager_graph = GitRepo(str(repo.path)).build_graph(include_trees=mode == "verbose")
+        eager = GraphBuilder(mode=mode, commit_details=True).build(eager_graph)
+        # Uncached, so nothing is known about any commit's metadata up front
+        lazy_graph = GitRepo(str(repo.path), use_cache=False).build_graph(
+            include_trees=mode == "verbose", lazy_metadata=True
+        )
+        assert not any(cd.metadata_loaded for cd in lazy_graph.commits.values())
+        lazy = GraphBuilder(mode=mode, commit_details=True).build(lazy_graph)
+        assert lazy.source == eager.source
+
+    # Normal mode draws the tip and root; the collapsed middle run stays unloaded.
+    loaded = {h for h, cd in lazy_graph.commits.items() if cd.metadata_loaded}
+    assert loaded == set(shas)  # verbose mode drew everything
+    normal_graph = GitRepo(str(repo.path), use_cache=False).build_graph(lazy_metadata=True)
+    GraphBuilder(mode="normal", commit_details=True).build(normal_graph)
+    loaded = {h for h, cd in normal_graph.commits.items() if cd.metadata_loaded}
+    assert shas[0] in loaded and shas[-1] in loaded
+    assert not loaded & set(shas[1:-1])
+
+
+def test_lazy_metadata_not_loaded_without_commit_details(repo: RepoTools):
+    repo.write("a.txt")
+    repo.commit("first")
+    graph = GitRepo(str(repo.path), use_cache=False).build_graph(lazy_metadata=True)
+    GraphBuilder(mode="normal").build(graph)
+    assert not any(cd.metadata_loaded for cd in graph.commits.values())
+
+
 # ---------------------------------------------------------------------------
 # Node type-prefix labels (commit/tree/blob/tag)
 # ---------------------------------------------------------------------------
@@ -512,6 +615,30 @@ def test_highlight_old_node_not_highlighted(repo: RepoTools):
     assert new_fill not in sha_line, "sha node (in prev render) must not use new_node fill"
 
 
+def test_highlight_after_refresh_marks_only_new_commit(repo: RepoTools):
+    """Across an in-place refresh, only the new commit is highlighted."""
+    repo.write("a.txt")
+    old_sha = repo.commit("first")
+    from visigit.colors import SCHEME
+
+    graph = GitRepo(str(repo.path)).build_graph()
+    first = GraphBuilder(mode="verbose")
+    first.build(graph)
+    prev = first.node_ids
+    assert old_sha in prev and "refs/heads/main" in prev
+
+    repo.write("b.txt")
+    new_sha = repo.commit("second")
+    GitRepo(str(repo.path)).refresh_graph(graph)
+    dg = GraphBuilder(mode="verbose", highlight_ids=prev).build(graph)
+
+    new_fill = SCHEME["new_node"].fill
+    new_attrs = re.search(rf"\t\"?{new_sha}\"? \[[^\]]*\]", dg.source).group(0)
+    old_attrs = re.search(rf"\t\"?{old_sha}\"? \[[^\]]*\]", dg.source).group(0)
+    assert new_fill in new_attrs
+    assert new_fill not in old_attrs
+
+
 def test_highlight_none_disables_highlighting(repo: RepoTools):
     """When highlight_ids is None, no node receives the new_node color."""
     repo.write("a.txt")
@@ -912,6 +1039,65 @@ def test_verbose_nested_tree(repo: RepoTools):
         assert edge_in(src, cd.tree_hexsha, child_sha), "Expected root-tree→child-tree edge"
 
 
+def test_verbose_tree_delta_draws_unchanged_subtrees_as_references(repo: RepoTools):
+    """Delta mode draws an unchanged subtree once, behind a dashed edge."""
+    repo.write("lib/util.py", content="util")
+    repo.write("app.py", content="v1")
+    first = repo.commit("first")
+    repo.write("app.py", content="v2")
+    second = repo.commit("second")
+
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True, tree_delta=True)
+    src = GraphBuilder(mode="verbose").build(graph).source
+
+    root = graph.trees[graph.commits[second].tree_hexsha]
+    ((name, lib_sha),) = root.unchanged_tree_entries
+    assert name == "lib"
+    assert edge_in(src, root.hexsha, lib_sha)
+    (edge,) = [line for line in src.splitlines() if root.hexsha in line and lib_sha in line]
+    assert "label=lib style=dashed" in edge
+    # lib is still expanded once, under the first commit's tree
+    assert lib_sha in graph.trees[graph.commits[first].tree_hexsha].child_tree_hexshas
+    assert sum(1 for line in src.splitlines() if line.startswith(f"\t{lib_sha} [")) == 1
+    assert edge_in(src, lib_sha, graph.trees[lib_sha].blob_entries[0][1])
+
+
+def test_verbose_deep_tree_needs_no_recursion(repo: RepoTools):
+    """Trees nested deeper than the recursion limit are collected and drawn."""
+    depth = sys.getrecursionlimit() + 50
+    path = "/".join(["d"] * depth) + "/f.txt"
+    stream = (
+        "commit refs/heads/main\ncommitter A <a@example.com> 0 +0000\ndata 4\ndeep\n"
+        f"M 100644 inline {path}\ndata 5\ndeep\n\n"
+    )
+    subprocess.run(
+        ["git", "fast-import", "--quiet"], cwd=repo.path, input=stream.encode(), check=True
+    )
+    sha = repo.rev_parse("main")
+
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True)
+    assert len(graph.trees) == depth + 1
+    src = GraphBuilder(mode="verbose").build(graph).source
+    assert src.count("label=tree") == depth + 1
+    assert graph.commits[sha].tree_hexsha in src
+
+
+def test_verbose_wide_tree_drawn_as_summary_node(repo: RepoTools):
+    """A tree over max_tree_entries gets one summary node instead of its blobs."""
+    for i in range(4):
+        repo.write(f"f{i}.txt", content=str(i))
+    repo.write("sub/g.txt", content="g")
+    sha = repo.commit("wide")
+
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True)
+    root = graph.commits[sha].tree_hexsha
+    src = GraphBuilder(mode="verbose", max_tree_entries=4).build(graph).source
+    assert "4 blobs / 1 subtrees" in src
+    assert edge_in(src, root, f"summary|{root}")
+    assert not any(node_in(src, blob) for _, blob in graph.trees[root].blob_entries)
+    assert "4 blobs" not in GraphBuilder(mode="verbose", max_tree_entries=5).build(graph).source
+
+
 # ---------------------------------------------------------------------------
 # FETCH_HEAD support (issue #8)
 # ---------------------------------------------------------------------------
@@ -1422,3 +1608,25 @@ def test_shallow_clone_branch_mode_no_crash(tmp_path: Path):
 
     dg, _, _, _ = _build(str(shallow), mode="branch")
     assert dg.source
+
+
+def test_shallow_boundary_exposed_and_marked(tmp_path: Path):
+    """Commits listed in .git/shallow are roots, recorded on RepoGraph and labelled."""
+    _make_source_repo(tmp_path / "src", num_commits=4)
+    shallow = tmp_path / "shallow"
+    subprocess.check_call(
+        ["git", "clone", "--no-local", "--depth=2", str(tmp_path / "src"), str(shallow)],
+        stderr=subprocess.DEVNULL,
+    )
+    boundary = (shallow / ".git" / "shallow").read_text().split()
+
+    dg, _, graph, _ = _build(str(shallow), mode="normal")
+    assert graph.shallow == set(boundary)
+    assert graph.commits[boundary[0]].parents == []
+    assert "(shallow)" in dg.source
+
+    # The depth-limited walk reads raw commit objects, which still name the
+    # unfetched parents; the boundary must be treated as a root there too.
+    graph = GitRepo(str(shallow), use_cache=False).build_graph(max_depth=5)
+    assert len(graph.commits) == 2
+    assert graph.commits[boundary[0]].parents == []
@@ -0,0 +1,113 @@
+"""Tests for the persistent commit/tree metadata cache."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from visigit import cache as cache_module
+from visigit.cache import ObjectCache
+from visigit.plumbing import CommitRecord
+
+
+def _record(n: int) -> CommitRecord:
+    return CommitRecord(
+        hexsha=f"{n:040x}",
+        parents=[f"{n + 1:040x}"] if n < 99 else [],
+        tree_hexsha="e" * 40,
+        author="Ann Author",
+        date_iso="2000-01-01T00:00:00+00:00",
+        short_message=f"commit {n} ünïcode",
+    )
+
+
+def test_roundtrip_commits_and_trees(tmp_path: Path):
+    cache = ObjectCache(str(tmp_path))
+    for n in range(100):
+        cache.put_commit(_record(n))
+    cache.put_tree("a" * 40, [("blob", "x.txt", "b" * 40), ("tree", "sub", "c" * 40)])
+    cache.put_tree("d" * 40, [])
+    cache.mark_closed([_record(0).hexsha])
+    cache.flush()
+    cache.close()
+
+    warm = ObjectCache(str(tmp_path))
+    for n in (0, 42, 99):
+        assert warm.get_commit(f"{n:040x}") == _record(n)
+    assert warm.get_commit("f" * 40) is None
+    assert warm.get_tree("a" * 40) == [("blob", "x.txt", "b" * 40), ("tree", "sub", "c" * 40)]
+    assert warm.get_tree("d" * 40) == []
+    assert warm.get_tree(_record(0).hexsha) is None  # a commit, not a tree
+    assert warm.closed_tips() == {_record(0).hexsha}
+
+
+def test_concurrent_writers_share_the_cache(tmp_path: Path):
+    a = ObjectCache(str(tmp_path))
+    b = ObjectCache(str(tmp_path))
+    a.put_commit(_record(1))
+    b.put_commit(_record(2))
+    a.flush()
+    b.flush()
+
+    c = ObjectCache(str(tmp_path))
+    assert c.get_commit(_record(1).hexsha) == _record(1)
+    assert c.get_commit(_record(2).hexsha) == _record(2)
+
+
+def test_segments_are_compacted(tmp_path: Path):
+    cache = ObjectCache(str(tmp_path))
+    for n in range(40):
+        cache.put_commit(_record(n))
+        cache.flush()
+    segments = [n for n in os.listdir(tmp_path) if n.endswith(".seg")]
+    assert len(segments) <= 17
+    fresh = ObjectCache(str(tmp_path))
+    assert all(fresh.get_commit(f"{n:040x}") == _record(n) for n in range(40))
+
+
+def _fill_segments(cache: ObjectCache, n_segments: int) -> None:
+    """Write one segment per commit, re-caching commit 0 structure-only then in full."""
+    bare = _record(0)
+    cache.put_commit(CommitRecord(hexsha=bare.hexsha, parents=bare.parents, tree_hexsha="e" * 40))
+    cache.put_tree("a" * 40, [("blob", "x.txt", "b" * 40)])
+    cache.mark_closed([_record(5).hexsha])
+    cache.flush()
+    for n in range(1, n_segments):
+        cache.put_commit(_record(n))
+        cache.flush()
+    cache.put_commit(_record(0))  # the newer, complete record must win the merge
+    cache.flush()
+
+
+def test_compaction_keeps_newest_entry_and_closed_tips(tmp_path: Path):
+    cache = ObjectCache(str(tmp_path))
+    _fill_segments(cache, 16)
+    assert len(cache._segments) == 1
+    fresh = ObjectCache(str(tmp_path))
+    assert fresh.get_commit(_record(0).hexsha) == _record(0)
+    assert fresh.get_tree("a" * 40) == [("blob", "x.txt", "b" * 40)]
+    assert fresh.closed_tips() == {_record(5).hexsha}
+
+
+def test_compaction_drops_trees_over_size_cap(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(cache_module, "_MAX_BYTES", 1024)
+    cache = ObjectCache(str(tmp_path))
+    _fill_segments(cache, 16)
+    fresh = ObjectCache(str(tmp_path))
+    assert fresh.get_tree("a" * 40) is None
+    assert all(fresh.get_commit(f"{n:040x}") == _record(n) for n in range(16))
+    assert fresh.closed_tips() == {_record(5).hexsha}
+
+
+def test_unreadable_segment_is_skipped(tmp_path: Path):
+    (tmp_path / "0-garbage.seg").write_bytes(b"not a segment")
+    cache = ObjectCache(str(tmp_path))
+    assert cache.get_commit("a" * 40) is None
+
+
+def test_missing_directory_is_an_empty_cache(tmp_path: Path):
+    cache = ObjectCache(str(tmp_path / "absent"))
+    assert cache.get_commit("a" * 40) is None
+    cache.put_commit(_record(1))
+    cache.flush()
+    assert (tmp_path / "absent").is_dir()
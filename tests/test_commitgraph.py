@@ -0,0 +1,71 @@
+"""Tests for the commit-graph file reader."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from visigit.commitgraph import CommitGraph
+
+from .conftest import RepoTools
+
+
+def _octopus_history(repo: RepoTools) -> None:
+    repo.commits("base")
+    for name in ("a", "b", "c"):
+        repo.branch_commits(name, name)
+    repo.merge("a", "b", "c")
+
+
+def _assert_matches_git(repo: RepoTools, cg: CommitGraph) -> None:
+    log = repo._run(["git", "log", "--all", "--format=%H %T %ct %P"]).splitlines()
+    assert len(cg) >= len(log)
+    for line in log:
+        hexsha, tree, date, *parents = line.split()
+        assert hexsha in cg
+        assert cg.parents(hexsha) == parents
+        assert cg.tree(hexsha) == tree
+        assert cg.commit_date(hexsha) == int(date)
+        for parent in parents:
+            assert cg.generation(parent) < cg.generation(hexsha)
+
+
+def test_no_commit_graph(repo: RepoTools):
+    repo.write("a.txt")
+    repo.commit("first")
+    assert CommitGraph.open(str(repo.path / ".git" / "objects")) is None
+
+
+def test_single_file(repo: RepoTools):
+    _octopus_history(repo)
+    repo._run(["git", "commit-graph", "write", "--reachable"])
+    cg = CommitGraph.open(str(repo.path / ".git" / "objects"))
+    assert cg is not None
+    _assert_matches_git(repo, cg)
+    assert "f" * 40 not in cg
+    assert cg.parents("f" * 40) is None
+
+
+def test_split_chain(repo: RepoTools):
+    _octopus_history(repo)
+    repo._run(["git", "commit-graph", "write", "--reachable", "--split"])
+    repo.write("later.txt")
+    repo.commit("later")
+    repo._run(["git", "commit-graph", "write", "--reachable", "--split=no-merge"])
+    objects = Path(repo.path / ".git" / "objects")
+    chain = objects / "info" / "commit-graphs" / "commit-graph-chain"
+    assert len(chain.read_text().split()) == 2
+
+    cg = CommitGraph.open(str(objects))
+    assert cg is not None
+    _assert_matches_git(repo, cg)
+
+
+def test_uncovered_commits_are_not_found(repo: RepoTools):
+    repo.write("a.txt")
+    repo.commit("first")
+    repo._run(["git", "commit-graph", "write", "--reachable"])
+    repo.write("b.txt")
+    newer = repo.commit("second")
+    cg = CommitGraph.open(str(repo.path / ".git" / "objects"))
+    assert newer not in cg
+    assert cg.commit_date(newer) is None
@@ -0,0 +1,154 @@
+"""Tests for the native .git metadata reader."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from visigit import gitdir as gitdir_module
+from visigit.gitdir import GitDir
+
+from .conftest import RepoTools
+
+
+def _age(root, seconds: int = 60) -> None:
+    """Backdate every file under root so its parse is outside the racy window."""
+    past = int(os.stat(root).st_mtime) - seconds
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            os.utime(os.path.join(dirpath, name), (past, past))
+    os.utime(root, (past, past))
+
+
+@pytest.fixture
+def opened(monkeypatch) -> list[str]:
+    """Record every file GitDir opens."""
+    paths: list[str] = []
+    read = gitdir_module._read
+
+    def counting_read(path: str) -> bytes:
+        paths.append(path)
+        return read(path)
+
+    monkeypatch.setattr(gitdir_module, "_read", counting_read)
+    return paths
+
+
+def test_head_attached_detached_and_unborn(repo: RepoTools):
+    gd = GitDir(str(repo.path / ".git"))
+    head = gd.head()
+    assert (head.symref, head.hexsha, head.is_detached) == ("refs/heads/main", None, False)
+
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    assert gd.head().hexsha == sha
+    repo.detach()
+    head = gd.head()
+    assert head.is_detached and head.hexsha == sha
+
+
+def test_refs_merge_loose_over_packed_with_peeled_tags(repo: RepoTools):
+    repo.write("a.txt")
+    first = repo.commit("a")
+    repo.tag("v1", annotated=True)
+    repo._run(["git", "branch", "old"])
+    repo._run(["git", "pack-refs", "--all"])
+    repo.write("b.txt")
+    second = repo.commit("b")
+    repo._run(["git", "branch", "-f", "old", "HEAD"])
+
+    gd = GitDir(str(repo.path / ".git"))
+    refs = gd.refs(("refs/heads/", "refs/tags/"))
+    assert refs == {
+        "refs/heads/main": second,
+        "refs/heads/old": second,
+        "refs/tags/v1": repo.rev_parse("v1"),
+    }
+    assert gd.packed_refs().peeled == {"refs/tags/v1": first}
+    assert gd.packed_refs().tags_peeled
+    assert gd.resolve("refs/heads/old") == second
+
+
+def test_special_heads_stash_and_worktrees(repo: RepoTools, tmp_path_factory):
+    repo.write("a.txt")
+    first = repo.commit("a")
+    repo.checkout("feature", new=True)
+    repo.write("f.txt")
+    repo.commit("f")
+    repo.checkout("main")
+    repo.merge("feature")
+    repo.append("a.txt")
+    repo._run(["git", "stash"])
+    repo.append("a.txt", " again")
+    repo._run(["git", "stash"])
+    (repo.path / ".git" / "FETCH_HEAD").write_text(f"{first}\t\tbranch 'main' of origin\n")
+    wt_path = tmp_path_factory.mktemp("wt") / "feature-wt"
+    repo._run(["git", "worktree", "add", str(wt_path), "feature"])
+
+    gd = GitDir(str(repo.path / ".git"))
+    assert gd.special_head("ORIG_HEAD") == repo.rev_parse("ORIG_HEAD")
+    assert gd.special_head("MERGE_HEAD") is None
+    assert gd.fetch_head() == first
+    assert gd.stash_entries() == [repo.rev_parse("stash@{0}"), repo.rev_parse("stash@{1}")]
+    (worktree,) = gd.worktrees()
+    assert worktree.path == wt_path.as_posix()
+    assert worktree.head.symref == "refs/heads/feature"
+    assert worktree.head.hexsha == repo.rev_parse("feature")
+
+
+def test_unchanged_files_are_not_reread(repo: RepoTools, opened: list[str]):
+    repo.write("a.txt")
+    repo.commit("a")
+    repo.tag("v1")
+    git_dir = repo.path / ".git"
+    _age(git_dir)
+
+    gd = GitDir(str(git_dir))
+    first = (gd.head(), gd.refs(("refs/heads/", "refs/tags/")), gd.stash_entries())
+    assert opened
+    opened.clear()
+    second = (gd.head(), gd.refs(("refs/heads/", "refs/tags/")), gd.stash_entries())
+    assert second == first
+    assert opened == []
+    GitDir(str(git_dir)).head()
+    assert opened  # the cache belongs to one GitDir, not the process
+
+
+def test_changed_files_are_reread(repo: RepoTools, opened: list[str]):
+    repo.write("a.txt")
+    repo.commit("a")
+    git_dir = repo.path / ".git"
+    _age(git_dir)
+    gd = GitDir(str(git_dir))
+    gd.refs(("refs/heads/",))
+
+    repo._run(["git", "branch", "feature"])
+    opened.clear()
+    assert "refs/heads/feature" in gd.refs(("refs/heads/",))
+    assert opened == [str(git_dir / "refs" / "heads" / "feature")]
+
+
+def test_deleted_refs_and_pruned_worktrees_leave_the_cache(repo: RepoTools, tmp_path_factory):
+    repo.write("a.txt")
+    repo.commit("a")
+    repo._run(["git", "branch", "topic/one"])
+    wt_path = tmp_path_factory.mktemp("wt") / "topic-wt"
+    repo._run(["git", "worktree", "add", "-q", str(wt_path), "topic/one"])
+    git_dir = repo.path / ".git"
+    _age(git_dir)
+    gd = GitDir(str(git_dir))
+    assert "refs/heads/topic/one" in gd.refs()
+    assert len(gd.worktrees()) == 1
+
+    def cached(part: str) -> list[str]:
+        return [path for path, _ in gd._files if part in path]
+
+    assert cached(os.path.join("heads", "topic")) and cached("worktrees" + os.sep)
+
+    repo._run(["git", "worktree", "remove", str(wt_path)])
+    repo._run(["git", "branch", "-D", "topic/one"])
+    assert "refs/heads/topic/one" not in gd.refs()
+    assert gd.worktrees() == []
+    assert cached(os.path.join("heads", "topic")) == []
+    assert cached("worktrees" + os.sep) == []
@@ -0,0 +1,158 @@
+"""Tests for the native .git/index reader."""
+
+from __future__ import annotations
+
+import subprocess
+
+import pytest
+
+from visigit.backends import SubprocessBackend
+from visigit.index import NULL_SHA, read_index, staged_changes
+
+from .conftest import RepoTools
+
+
+def _ls_files(repo: RepoTools) -> list[tuple[str, str, int, int]]:
+    """Return [(path, sha, mode, stage)] as git itself reads the index."""
+    rows = []
+    for line in repo._run(["git", "ls-files", "--stage", "--sparse"]).splitlines():
+        meta, path = line.split("\t", 1)
+        mode, sha, stage = meta.split()
+        rows.append((path, sha, int(mode, 8), int(stage)))
+    return rows
+
+
+def _entries(repo: RepoTools) -> list[tuple[str, str, int, int]]:
+    index = read_index(str(repo.path / ".git" / "index"))
+    return [(e.path, e.hexsha, e.mode, e.stage) for e in index.entries]
+
+
+def _expected_staged(repo: RepoTools) -> list[tuple[str, str]]:
+    """Return what staged_changes() should report, from git diff --cached."""
+    index_shas = {path: sha for path, sha, _, stage in _ls_files(repo) if stage == 0}
+    names = repo._run(["git", "diff", "--cached", "--name-only", "--no-renames"]).splitlines()
+    return sorted((name, index_shas.get(name, NULL_SHA)) for name in names)
+
+
+def _staged(repo: RepoTools, head: str = "HEAD", reads: list[str] | None = None):
+    backend = SubprocessBackend(str(repo.path / ".git"))
+
+    def read_tree(hexsha: str):
+        if reads is not None:
+            reads.append(hexsha)
+        return backend.read_tree(hexsha)
+
+    try:
+        index = read_index(str(repo.path / ".git" / "index"))
+        return staged_changes(index, repo.rev_parse(f"{head}^{{tree}}"), read_tree)
+    finally:
+        backend.close()
+
+
+def _layout(repo: RepoTools) -> None:
+    repo.write("README.md", "readme")
+    for top in ("a", "b", "c"):
+        for sub in ("x", "y"):
+            repo.write(f"{top}/{sub}/f.txt", f"{top}{sub}")
+    repo.write("old/gone.txt", "gone")
+    repo.write("file-to-dir", "file")
+    repo.commit("layout")
+
+
+@pytest.mark.parametrize("version", [2, 3, 4])
+def test_entries_match_ls_files(repo: RepoTools, version: int):
+    _layout(repo)
+    repo.write("a/x/new.txt", "new")
+    repo.write("a/x/ita.txt", "ita")
+    repo.add("a/x/new.txt")
+    repo._run(["git", "add", "-N", "a/x/ita.txt"])  # extended flags (forces v3 over v2)
+    repo._run(["git", "update-index", "--index-version", str(version)])
+
+    index = read_index(str(repo.path / ".git" / "index"))
+    assert index.version == max(version, 3)
+    assert _entries(repo) == _ls_files(repo)
+    assert [e.path for e in index.entries if e.intent_to_add] == ["a/x/ita.txt"]
+
+
+def test_cache_tree_covers_unchanged_directories(repo: RepoTools):
+    _layout(repo)
+    index = read_index(str(repo.path / ".git" / "index"))
+    assert index.cache_tree[""] == repo.rev_parse("HEAD^{tree}")
+    assert index.cache_tree["b/y"] == repo.rev_parse("HEAD:b/y")
+
+    repo.append("a/x/f.txt")
+    repo.add("a/x/f.txt")
+    index = read_index(str(repo.path / ".git" / "index"))
+    assert "" not in index.cache_tree and "a" not in index.cache_tree
+    assert index.cache_tree["b"] == repo.rev_parse("HEAD:b")
+
+
+def test_staged_changes_match_git_diff_cached(repo: RepoTools):
+    _layout(repo)
+    repo.append("a/x/f.txt")
+    repo.write("b/new/n.txt", "new")
+    repo._run(["git", "rm", "-q", "-r", "old", "file-to-dir"])
+    repo.write("file-to-dir/inner.txt", "now a directory")
+    repo.add()
+
+    got = _staged(repo)
+    assert got == _expected_staged(repo)
+    assert ("old/gone.txt", NULL_SHA) in got and ("file-to-dir", NULL_SHA) in got
+
+
+def test_unchanged_directories_are_not_read(repo: RepoTools):
+    _layout(repo)
+    reads: list[str] = []
+    assert _staged(repo, reads=reads) == []
+    assert reads == []  # the root's cache-tree SHA equals HEAD's tree
+
+    repo.append("a/x/f.txt")
+    repo.add("a/x/f.txt")
+    assert [path for path, _ in _staged(repo, reads=reads)] == ["a/x/f.txt"]
+    assert reads == [repo.rev_parse(f"HEAD:{p}") for p in ("", "a", "a/x")]
+
+
+def test_split_index(repo: RepoTools):
+    _layout(repo)
+    repo._run(["git", "config", "splitIndex.maxPercentChange", "100"])
+    repo._run(["git", "update-index", "--split-index"])
+    repo.append("a/x/f.txt")
+    repo.write("c/z.txt", "z")
+    repo._run(["git", "rm", "-q", "b/y/f.txt"])
+    repo.add()
+
+    assert list((repo.path / ".git").glob("sharedindex.*"))
+    assert _entries(repo) == _ls_files(repo)
+    assert _staged(repo) == _expected_staged(repo)
+
+
+def test_sparse_index(repo: RepoTools):
+    _layout(repo)
+    try:
+        repo._run(["git", "sparse-checkout", "set", "--cone", "--sparse-index", "a"])
+    except subprocess.CalledProcessError:
+        pytest.skip("git without sparse-index support")
+    index = read_index(str(repo.path / ".git" / "index"))
+    assert index.sparse
+    assert ("b/", repo.rev_parse("HEAD:b"), 0o040000, 0) in _entries(repo)
+    assert _entries(repo) == _ls_files(repo)
+
+    repo.append("a/y/f.txt")
+    repo.add("a/y/f.txt")
+    assert _staged(repo) == _expected_staged(repo)
+
+
+def test_unborn_head_stages_every_entry(repo: RepoTools):
+    repo.write("a.txt", "a")
+    repo.write("d/b.txt", "b")
+    repo.add()
+    index = read_index(str(repo.path / ".git" / "index"))
+    got = staged_changes(index, None, lambda hexsha: [])
+    assert got == [(path, sha) for path, sha, _, _ in _ls_files(repo)]
+
+
+def test_unsupported_index_raises(tmp_path):
+    path = tmp_path / "index"
+    path.write_bytes(b"DIRC" + (99).to_bytes(4, "big") + bytes(4) + bytes(20))
+    with pytest.raises(ValueError):
+        read_index(str(path))
@@ -162,6 +162,12 @@ def test_mermaid_edge_with_label():
     assert "parent" in out
 
 
+def test_mermaid_dashed_edge():
+    dot = "digraph {\n\tabc123 -> def456 [label=lib style=dashed]\n}\n"
+    out = dot_to_mermaid(dot)
+    assert "abc123 -.->" in out and "def456" in out
+
+
 def test_mermaid_multiple_nodes_and_edges():
     dot = (
         "digraph {\n"
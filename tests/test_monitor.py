@@ -7,6 +7,9 @@ import time
 from pathlib import Path
 
 from visigit.monitor import Monitor
+from visigit.repo import GitRepo
+
+from .conftest import RepoTools
 
 
 def _make_monitor(tmp_path: Path) -> Monitor:
@@ -130,3 +133,26 @@ def test_wait_preserves_events_set_during_settle(tmp_path: Path) -> None:
         "An event that arrived during the settle window must remain set "
         "so the monitor loop can re-render with the new commit"
     )
+
+
+def test_monitor_ignores_object_cache_writes(repo: RepoTools) -> None:
+    """Segments written to .git/visigit during a render must not re-trigger it."""
+    cache_dir = GitRepo(str(repo.path)).cache_dir
+    mon = Monitor(str(repo.path), repo.path / "visigit.svg", cache_dir=cache_dir)
+    mon._handler._handle(str(repo.path / ".git" / "visigit" / "0001-abc.seg"))
+    assert not mon._event.is_set()
+    mon._handler._handle(str(repo.path / ".git" / "refs" / "heads" / "main"))
+    assert mon._event.is_set()
+
+
+def test_monitor_ignores_worktree_cache_in_common_dir(repo: RepoTools, tmp_path_factory) -> None:
+    """A linked worktree's cache lives in the main repo's .git, not the worktree's."""
+    repo.write("a.txt")
+    repo.commit("a")
+    wt_path = tmp_path_factory.mktemp("wt") / "linked"
+    repo._run(["git", "worktree", "add", "-q", "-b", "wt", str(wt_path)])
+    cache_dir = GitRepo(str(wt_path)).cache_dir
+    assert Path(cache_dir).resolve() == (repo.path / ".git" / "visigit").resolve()
+    mon = Monitor(str(wt_path), wt_path / "visigit.svg", cache_dir=cache_dir)
+    mon._handler._handle(str(repo.path / ".git" / "visigit" / "0001-abc.seg"))
+    assert not mon._event.is_set()
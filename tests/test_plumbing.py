@@ -0,0 +1,159 @@
+"""Tests for the streamed git plumbing readers."""
+
+from __future__ import annotations
+
+import dataclasses
+import io
+
+import pytest
+
+from visigit.gitdir import GitDir
+from visigit.plumbing import (
+    CatFileBatch,
+    GitCommandError,
+    _parse_log_stream,
+    hash_object_paths,
+    iter_log_records,
+    list_refs,
+    packed_ref_records,
+)
+
+from .conftest import RepoTools
+
+
+def test_parse_log_stream_across_chunk_boundaries():
+    raw = (
+        b"a" * 40 + b"\0" + b"b" * 40 + b" " + b"c" * 40 + b"\0" + b"d" * 40 + b"\0"
+        b"Ann\0" + b"2000-01-01T00:00:00+00:00\0subject\n\nbody\n\0"
+    )
+    records = list(_parse_log_stream(io.BytesIO(raw * 3)))
+    assert len(records) == 3
+    rec = records[0]
+    assert rec.hexsha == "a" * 40
+    assert rec.parents == ["b" * 40, "c" * 40]
+    assert rec.tree_hexsha == "d" * 40
+    assert rec.author == "Ann"
+    assert rec.short_message == "subject"
+
+
+def test_iter_log_records_no_walk(repo: RepoTools):
+    repo.write("a.txt")
+    first = repo.commit("first")
+    repo.write("b.txt")
+    second = repo.commit("second")
+    git_dir = str(repo.path / ".git")
+
+    walked = [rec.hexsha for rec in iter_log_records(git_dir, [second])]
+    assert walked == [second, first]
+    only = [rec.hexsha for rec in iter_log_records(git_dir, [second], no_walk=True)]
+    assert only == [second]
+
+
+def test_iter_log_records_ignores_missing_revs(repo: RepoTools):
+    repo.write("a.txt")
+    sha = repo.commit("first")
+    git_dir = str(repo.path / ".git")
+    records = list(iter_log_records(git_dir, ["f" * 40, sha]))
+    assert [rec.hexsha for rec in records] == [sha]
+
+
+def test_iter_log_records_raises_on_bad_repo(tmp_path):
+    with pytest.raises(GitCommandError):
+        list(iter_log_records(str(tmp_path), ["HEAD"]))
+
+
+def test_cat_file_batch_reads_commit_structure(repo: RepoTools):
+    repo.write("a.txt")
+    first = repo.commit("first")
+    repo.write("b.txt")
+    second = repo.commit("second")
+    git_dir = str(repo.path / ".git")
+    expected = {rec.hexsha: rec for rec in iter_log_records(git_dir, [second], metadata=False)}
+
+    # More SHAs than one round trip holds, with a missing one in the middle
+    wanted = [second, first] * 200 + ["0" * 40] + [first]
+    with CatFileBatch(git_dir) as reader:
+        records = list(reader.read_commit_records(wanted))
+        assert [rec.hexsha for rec in records] == [h for h in wanted if h != "0" * 40]
+        assert all(rec == expected[rec.hexsha] for rec in records)
+        # The same process serves later batches
+        tree = expected[first].tree_hexsha
+        assert [t for _, t, _ in reader.read([tree, first])] == ["tree", "commit"]
+
+
+def test_list_refs_peels_tags_in_one_pass(repo: RepoTools):
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.tag("light")
+    repo.tag("annotated", annotated=True)
+    repo._run(["git", "tag", "tree-tag", "HEAD^{tree}"])
+    git_dir = str(repo.path / ".git")
+
+    refs = {rec.path: rec for rec in list_refs(git_dir, ["refs/heads", "refs/tags"])}
+    assert list(refs) == sorted(refs)
+    assert refs["refs/heads/main"].commit_hexsha == sha
+    assert refs["refs/tags/light"].object_type == "commit"
+    annotated = refs["refs/tags/annotated"]
+    assert annotated.object_type == "tag" and annotated.hexsha != sha
+    assert annotated.commit_hexsha == sha
+    assert annotated.committed_date == refs["refs/heads/main"].committed_date > 0
+    assert refs["refs/tags/tree-tag"].commit_hexsha is None
+
+
+def test_packed_ref_records_match_list_refs(repo: RepoTools):
+    repo.write("a.txt")
+    repo.commit("a")
+    repo.tag("light")
+    repo.tag("annotated", annotated=True)
+    repo._run(["git", "tag", "-a", "nested", "-m", "tag of a tag", "annotated"])
+    repo._run(["git", "tag", "tree-tag", "HEAD^{tree}"])
+    repo._run(["git", "pack-refs", "--all"])
+    git_dir = str(repo.path / ".git")
+    packed = GitDir(git_dir).packed_refs()
+    tags = [(p, h, packed.peeled.get(p)) for p, h in packed.refs.items() if "/tags/" in p]
+    tags.append(("refs/tags/broken", "ab" * 20, None))
+
+    expected = list_refs(git_dir, ["refs/tags"])
+    expected = [dataclasses.replace(rec, committed_date=None) for rec in expected]
+    # for-each-ref peels one level only, so a tag of a tag has no commit there.
+    expected[
+        [rec.path for rec in expected].index("refs/tags/nested")
+    ].commit_hexsha = repo.rev_parse("HEAD")
+    assert packed_ref_records(git_dir, tags) == expected
+
+
+def test_list_refs_skips_refs_to_missing_objects(repo: RepoTools):
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.tag("annotated", annotated=True)
+    (repo.path / ".git" / "refs" / "heads" / "broken").write_text("ab" * 20 + "\n")
+
+    refs = {rec.path: rec for rec in list_refs(str(repo.path / ".git"), ["refs"])}
+    assert set(refs) == {"refs/heads/main", "refs/tags/annotated"}
+    assert refs["refs/tags/annotated"].commit_hexsha == sha
+
+
+def test_cat_file_batch_check_resolves_names(repo: RepoTools):
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.tag("annotated", annotated=True)
+    tag = repo.rev_parse("annotated")
+    for check in (True, False):
+        with CatFileBatch(str(repo.path / ".git"), check=check) as batch:
+            found = list(batch.check([tag, f"{tag}^{{commit}}", "ab" * 20]))
+            assert found == [
+                (tag, tag, "tag"),
+                (f"{tag}^{{commit}}", sha, "commit"),
+                ("ab" * 20, None, None),
+            ]
+            assert list(batch.check([sha])) == [(sha, sha, "commit")]  # still in step
+
+
+def test_hash_object_paths(repo: RepoTools):
+    repo.write("a.txt", content="a")
+    repo.write("dir/b c.txt", content="b")
+    paths = [str(repo.path / "a.txt"), str(repo.path / "dir" / "b c.txt")]
+    expected = [repo._run(["git", "hash-object", p]) for p in ("a.txt", "dir/b c.txt")]
+    assert hash_object_paths(str(repo.path / ".git"), paths) == expected
+    with pytest.raises(GitCommandError):
+        hash_object_paths(str(repo.path / ".git"), [str(repo.path / "missing.txt")])
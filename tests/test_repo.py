@@ -2,12 +2,31 @@
 
 from __future__ import annotations
 
+import functools
 import hashlib
+import os
+import subprocess
+import sys
 
-from visigit.repo import GitRepo
+import pytest
+
+from visigit import repo as repo_module
+from visigit.backends import available_backends
+from visigit.cli import _parse_args, _ref_filter
+from visigit.repo import GitRepo, RefFilter
 
 from .conftest import RepoTools
 
+
+@pytest.fixture(autouse=True, params=available_backends())
+def object_backend(request, monkeypatch):
+    """Run every test in this module against each installed object backend."""
+    monkeypatch.setattr(
+        sys.modules[__name__], "GitRepo", functools.partial(GitRepo, backend=request.param)
+    )
+    return request.param
+
+
 # ---------------------------------------------------------------------------
 # Validity
 # ---------------------------------------------------------------------------
@@ -197,6 +216,27 @@ def test_index_staged(repo: RepoTools):
     assert "b.txt" in staged_paths
 
 
+@pytest.mark.parametrize("native", [True, False])
+def test_index_staged_reports_index_shas(repo: RepoTools, monkeypatch, native):
+    repo.write("a.txt", content="a")
+    repo.write("d.txt", content="d")
+    repo.commit("first")
+    repo.append("a.txt")
+    repo.write("n.txt", content="n")
+    repo._run(["git", "rm", "-q", "d.txt"])
+    repo.add()
+    r = GitRepo(str(repo.path))
+    if not native:
+        monkeypatch.setattr(r, "_read_staged_files", lambda: None)
+
+    staged = sorted((s.path, s.hexsha) for s in r.get_index_state().staged)
+    assert staged == [
+        ("a.txt", repo.rev_parse(":a.txt")),
+        ("d.txt", "0" * 40),
+        ("n.txt", repo.rev_parse(":n.txt")),
+    ]
+
+
 def test_index_unstaged(repo: RepoTools):
     repo.write("a.txt", content="original")
     repo.commit("first")
@@ -208,6 +248,78 @@ def test_index_unstaged(repo: RepoTools):
     assert "a.txt" in unstaged_paths
 
 
+def test_unstaged_hashes_reused_until_stat_changes(repo: RepoTools, monkeypatch):
+    for name in ("a.txt", "b.txt"):
+        repo.write(name, content="original")
+    repo.commit("first")
+    past = int(os.stat(repo.path / "a.txt").st_mtime) - 60
+    for name in ("a.txt", "b.txt"):
+        repo.write(name, content=f"{name} modified")
+        os.utime(repo.path / name, (past, past))
+    hashed = []
+    real = repo_module._hash_file
+    monkeypatch.setattr(repo_module, "_hash_file", lambda p: hashed.append(p) or real(p))
+
+    r = GitRepo(str(repo.path))
+    first = r.get_index_state().unstaged
+    assert len(hashed) == 2
+    hashed.clear()
+    r.reload()
+    assert r.get_index_state().unstaged == first
+    assert hashed == []
+
+    repo.write("b.txt", content="b.txt edited again")  # fresh mtime: racily clean
+    for _ in range(2):
+        unstaged = r.get_index_state().unstaged
+        assert [os.path.basename(p) for p in hashed] == ["b.txt"]
+        hashed.clear()
+    assert unstaged[0] == first[0]
+    assert unstaged[1].workspace_hexsha == repo._run(["git", "hash-object", "b.txt"])
+
+    repo._run(["git", "checkout", "--", "a.txt"])  # no longer modified: dropped
+    r.get_index_state()
+    assert "a.txt" not in [os.path.basename(p) for p in r._blob_hashes]
+    assert GitRepo(str(repo.path))._blob_hashes == {}  # nothing process-wide
+
+
+def test_hash_file_streams_in_chunks(repo: RepoTools, monkeypatch):
+    monkeypatch.setattr(repo_module, "_HASH_CHUNK", 7)
+    repo.write("big.bin", content="x" * 100 + "tail")
+    expected = repo._run(["git", "hash-object", "big.bin"])
+    assert repo_module._hash_file(str(repo.path / "big.bin")) == expected
+
+
+@pytest.mark.parametrize("blob_hasher", ["python", "git"])
+def test_unstaged_hashes_match_git(repo: RepoTools, blob_hasher: str):
+    names = [f"f{i}.txt" for i in range(5)]
+    for name in names:
+        repo.write(name, content="original")
+    repo.commit("first")
+    for name in names:
+        repo.write(name, content=f"{name}\r\nmodified\r\n")
+    os.remove(repo.path / "f4.txt")
+
+    r = GitRepo(str(repo.path), blob_hasher=blob_hasher)
+    unstaged = {f.path: f.workspace_hexsha for f in r.get_index_state().unstaged}
+    expected = {name: repo._run(["git", "hash-object", "--no-filters", name]) for name in names[:4]}
+    assert unstaged == {**expected, "f4.txt": "?" * 40}
+
+
+def test_reload_rereads_commit_graph_and_missing_commits(repo: RepoTools):
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    r = GitRepo(str(repo.path))
+    r.build_graph()
+    assert r._open_commit_graph() is None
+    assert not r._is_commit("ab" * 20) and r._is_commit(sha)
+
+    repo._run(["git", "commit-graph", "write", "--reachable"])
+    assert r._open_commit_graph() is None  # unchanged until reload()
+    r.reload()
+    assert r._open_commit_graph() is not None
+    assert r._known_commits == {sha: True}
+
+
 def test_index_untracked(repo: RepoTools):
     repo.write("a.txt")
     repo.commit("first")
@@ -239,6 +351,158 @@ def test_verbose_includes_blobs(repo: RepoTools):
     assert len(graph.blobs) > 0
 
 
+def _three_commits_and_branch(repo: RepoTools) -> dict[str, str]:
+    shas = repo.commits("c1", "c2", "c3", path="{}/f.txt")
+    shas.update(repo.branch_commits("side", "side"))
+    return shas
+
+
+@pytest.mark.parametrize(
+    "scope, with_trees",
+    [("all", {"c1", "c2", "c3", "side"}), ("head", {"c3"}), ("tips", {"c3", "side"}), (2, None)],
+)
+def test_tree_scope_limits_tree_collection(repo: RepoTools, scope, with_trees):
+    shas = _three_commits_and_branch(repo)
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True, tree_scope=scope)
+    got = {name for name, sha in shas.items() if graph.commits[sha].tree_hexsha}
+    if with_trees is None:  # the two newest by committer date
+        newest = repo._run(["git", "rev-list", "--max-count=2", "--all"]).split()
+        with_trees = {name for name, sha in shas.items() if sha in newest}
+        assert len(got) == 2
+    assert got == with_trees
+    drawn = {graph.commits[shas[name]].tree_hexsha for name in got}
+    assert drawn <= set(graph.trees)
+    assert all(
+        t.parent_hexsha in graph.trees or t.parent_hexsha in graph.commits
+        for t in graph.trees.values()
+    )
+
+
+def test_tree_scope_follows_refresh(repo: RepoTools):
+    shas = _three_commits_and_branch(repo)
+    r = GitRepo(str(repo.path))
+    graph = r.build_graph(include_trees=True, tree_scope="head")
+    old_root = graph.commits[shas["c3"]].tree_hexsha
+    repo.write("c4.txt")
+    c4 = repo.commit("c4")
+
+    graph = GitRepo(str(repo.path)).refresh_graph(graph, include_trees=True, tree_scope="head")
+    assert [h for h, cd in graph.commits.items() if cd.tree_hexsha] == [c4]
+    assert graph.commits[c4].tree_hexsha in graph.trees
+    assert old_root not in graph.trees  # pruned with the commit that left the scope
+    assert "c3" in {t.name for t in graph.trees.values()}  # still reachable from c4
+
+
+def test_tree_scope_cli_values():
+    assert _parse_args([]).tree_scope == "all"
+    assert _parse_args(["--tree-scope", "tips"]).tree_scope == "tips"
+    assert _parse_args(["--tree-scope", "25"]).tree_scope == 25
+    for bad in ("0", "everything"):
+        with pytest.raises(SystemExit):
+            _parse_args(["--tree-scope", bad])
+
+
+def test_tree_delta_expands_only_changed_subtrees(repo: RepoTools):
+    repo.write("docs/guide.txt", "guide")
+    repo.write("src/app/main.py", "v1")
+    repo.write("src/lib/util.py", "util")
+    first = repo.commit("first")
+    repo.write("src/app/main.py", "v2")
+    second = repo.commit("second")
+    repo._run(["git", "commit", "--allow-empty", "-m", "empty"])
+    empty = repo.rev_parse("HEAD")
+
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True, tree_delta=True)
+    first_root = graph.trees[graph.commits[first].tree_hexsha]
+    assert len(first_root.child_tree_hexshas) == 2  # no parent: the whole tree
+    assert first_root.unchanged_tree_entries == []
+
+    root = graph.trees[graph.commits[second].tree_hexsha]
+    assert root.blob_entries == [] and len(root.child_tree_hexshas) == 1
+    assert [name for name, _ in root.unchanged_tree_entries] == ["docs"]
+    src = graph.trees[root.child_tree_hexshas[0]]
+    assert src.name == "src" and [name for name, _ in src.unchanged_tree_entries] == ["lib"]
+    app = graph.trees[src.child_tree_hexshas[0]]
+    assert app.name == "app" and [name for name, _ in app.blob_entries] == ["main.py"]
+
+    # An empty commit's root equals its parent's and is not collected again.
+    assert graph.commits[empty].tree_hexsha == root.hexsha
+
+
+def test_tree_delta_follows_refresh(repo: RepoTools):
+    repo.write("a/f.txt", "1")
+    repo.write("b/g.txt", "1")
+    repo.commit("first")
+    r = GitRepo(str(repo.path))
+    graph = r.build_graph(include_trees=True, tree_delta=True)
+    repo.write("b/g.txt", "2")
+    second = repo.commit("second")
+
+    graph = GitRepo(str(repo.path)).refresh_graph(graph, include_trees=True, tree_delta=True)
+    root = graph.trees[graph.commits[second].tree_hexsha]
+    assert [name for name, _ in root.unchanged_tree_entries] == ["a"]
+    assert [graph.trees[h].name for h in root.child_tree_hexshas] == ["b"]
+    assert _parse_args(["--tree-delta"]).tree_delta
+    assert not _parse_args([]).tree_delta
+
+
+def test_tree_path_collects_only_that_subtree(repo: RepoTools, monkeypatch):
+    repo.write("README.md", "readme")
+    repo.write("src/service-a/api/main.py", "a")
+    repo.write("src/service-b/main.py", "b")
+    repo.write("vendor/lib/x.c", "x")
+    sha = repo.commit("layout")
+    r = GitRepo(str(repo.path), use_cache=False)
+    batches = []
+    real = r._objects.read_trees
+    monkeypatch.setattr(r._objects, "read_trees", lambda shas: batches.append(shas) or real(shas))
+
+    graph = r.build_graph(include_trees=True, tree_path="src/service-a/")
+    assert [len(batch) for batch in batches] == [1, 1, 1, 1]  # /, src, service-a, api
+    root = graph.trees[graph.commits[sha].tree_hexsha]
+    assert root.blob_entries == []
+    names = {t.name for t in graph.trees.values()}
+    assert names == {"/", "src", "service-a", "api"}
+    assert {b.name for b in graph.blobs.values()} == {"main.py"}
+    assert _parse_args(["--path", "src/service-a/"]).tree_path == "src/service-a/"
+
+
+def test_max_tree_entries_summarizes_wide_trees(repo: RepoTools):
+    for i in range(5):
+        repo.write(f"wide/f{i}.txt", str(i))
+    repo.write("wide/sub/g.txt", "g")
+    repo.write("narrow/h.txt", "h")
+    sha = repo.commit("wide")
+
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True, max_tree_entries=3)
+    root = graph.trees[graph.commits[sha].tree_hexsha]
+    assert root.summary is None and len(root.child_tree_hexshas) == 2
+    by_name = {t.name: t for t in graph.trees.values()}
+    assert by_name["wide"].summary == (5, 1)
+    assert by_name["wide"].blob_entries == [] and by_name["wide"].child_tree_hexshas == []
+    assert "sub" not in by_name  # never read
+    assert {b.name for b in graph.blobs.values()} == {"h.txt"}
+    assert _parse_args([]).max_tree_entries == 1000
+    assert _parse_args(["--max-tree-entries", "0"]).max_tree_entries is None
+
+
+def test_verbose_reads_trees_a_level_per_batch(repo: RepoTools, monkeypatch):
+    for top in ("a", "b", "c"):
+        for sub in ("x", "y"):
+            repo.write(f"{top}/{sub}/f.txt", f"{top}{sub}")
+    sha = repo.commit("tree")
+    r = GitRepo(str(repo.path), use_cache=False)
+    batches = []
+    real = r._objects.read_trees
+    monkeypatch.setattr(r._objects, "read_trees", lambda shas: batches.append(shas) or real(shas))
+
+    graph = r.build_graph(include_trees=True)
+    assert [len(batch) for batch in batches] == [1, 3, 6]
+    assert len(graph.trees) == 1 + 3 + 6
+    root = graph.trees[graph.commits[sha].tree_hexsha]
+    assert root.parent_hexsha == sha and len(root.child_tree_hexshas) == 3
+
+
 def test_workspace_hexsha_is_raw_blob_sha(repo: RepoTools):
     """workspace_hexsha must be the git blob SHA of the file's exact bytes.
 
@@ -259,3 +523,481 @@ def test_workspace_hexsha_is_raw_blob_sha(repo: RepoTools):
 
     expected_sha = hashlib.sha1(b"blob %d\0" % len(new_content) + new_content).hexdigest()
     assert uf.workspace_hexsha == expected_sha
+
+
+# ---------------------------------------------------------------------------
+# Streamed traversal
+# ---------------------------------------------------------------------------
+
+
+def test_streamed_traversal_matches_object_walk(repo: RepoTools):
+    repo.merge_history()
+    r = GitRepo(str(repo.path))
+    refs = r._collect_refs(exclude_remotes=False)
+    for max_depth in (None, 0, 1, 2):
+        for include_trees in (False, True):
+            streamed = r._bfs_commits(refs, max_depth, include_trees)
+            walked = r._bfs_commit_objects(refs, max_depth, include_trees)
+            assert streamed == walked
+            assert list(streamed[0]) == list(walked[0])  # same BFS order
+
+
+def test_streamed_traversal_short_message_is_first_line(repo: RepoTools):
+    repo.merge_history()
+    repo.write("body.txt")
+    repo.commit("subject\n\nbody line")
+    graph = GitRepo(str(repo.path)).build_graph()
+    messages = {cd.short_message for cd in graph.commits.values()}
+    assert "subject" in messages and "base" in messages
+
+
+# ---------------------------------------------------------------------------
+# Object cache
+# ---------------------------------------------------------------------------
+
+
+def test_warm_cache_reads_only_new_commits(repo: RepoTools, monkeypatch):
+    import visigit.repo as repo_module
+
+    repo.merge_history()
+    cold = GitRepo(str(repo.path)).build_graph(include_trees=True)
+
+    repo.write("new.txt")
+    new_sha = repo.commit("new")
+    streamed: list[str] = []
+    real = repo_module.iter_log_records
+
+    def counting(*args, **kwargs):
+        for rec in real(*args, **kwargs):
+            streamed.append(rec.hexsha)
+            yield rec
+
+    monkeypatch.setattr(repo_module, "iter_log_records", counting)
+    warm = GitRepo(str(repo.path)).build_graph(include_trees=True)
+    assert streamed == [new_sha]
+
+    uncached = GitRepo(str(repo.path), use_cache=False).build_graph(include_trees=True)
+    assert warm == uncached
+    assert set(cold.commits) < set(warm.commits)
+
+
+def test_cache_disabled_writes_nothing(repo: RepoTools):
+    repo.write("a.txt")
+    repo.commit("first")
+    GitRepo(str(repo.path), use_cache=False).build_graph()
+    assert not (repo.path / ".git" / "visigit").exists()
+
+
+# ---------------------------------------------------------------------------
+# Incremental refresh
+# ---------------------------------------------------------------------------
+
+
+def _assert_refresh_matches_rebuild(repo: RepoTools, graph, include_trees: bool = False):
+    refreshed = GitRepo(str(repo.path)).refresh_graph(graph, include_trees=include_trees)
+    rebuilt = GitRepo(str(repo.path), use_cache=False).build_graph(include_trees=include_trees)
+    assert refreshed is graph  # patched in place
+    assert refreshed.commits == rebuilt.commits
+    assert refreshed.refs == rebuilt.refs
+    assert refreshed.hash_length == rebuilt.hash_length
+    assert refreshed.head_branch_path == rebuilt.head_branch_path
+    assert refreshed.is_detached == rebuilt.is_detached
+    assert set(refreshed.trees) == set(rebuilt.trees)
+    assert set(refreshed.blobs) == set(rebuilt.blobs)
+    return refreshed
+
+
+def test_refresh_matches_full_rebuild(repo: RepoTools):
+    repo.merge_history()
+    graph = GitRepo(str(repo.path)).build_graph()
+
+    # New commits on one branch, plus a new branch
+    repo.write("c.txt")
+    repo.commit("c")
+    repo.checkout("topic", new=True)
+    repo.write("d.txt")
+    repo.commit("d")
+    graph = _assert_refresh_matches_rebuild(repo, graph)
+
+    # Commits become unreachable: reset main back and delete the topic branch
+    repo.checkout("main")
+    repo._run(["git", "branch", "-D", "topic"])
+    repo._run(["git", "reset", "--hard", "HEAD~2"])
+    graph = _assert_refresh_matches_rebuild(repo, graph)
+
+    # Nothing changed
+    _assert_refresh_matches_rebuild(repo, graph)
+
+
+def test_refresh_matches_full_rebuild_with_trees(repo: RepoTools):
+    repo.merge_history()
+    graph = GitRepo(str(repo.path)).build_graph(include_trees=True)
+
+    repo.write("sub/new.txt", content="new")
+    repo.commit("new")
+    graph = _assert_refresh_matches_rebuild(repo, graph, include_trees=True)
+
+    repo._run(["git", "reset", "--hard", "HEAD~1"])
+    _assert_refresh_matches_rebuild(repo, graph, include_trees=True)
+
+
+def test_refresh_with_depth_limit_rebuilds(repo: RepoTools):
+    repo.merge_history()
+    r = GitRepo(str(repo.path))
+    graph = r.build_graph(max_depth=1)
+    repo.write("c.txt")
+    repo.commit("c")
+    refreshed = GitRepo(str(repo.path)).refresh_graph(graph, max_depth=1)
+    assert refreshed is not graph
+    assert refreshed == GitRepo(str(repo.path)).build_graph(max_depth=1)
+
+
+# ---------------------------------------------------------------------------
+# Commit-graph
+# ---------------------------------------------------------------------------
+
+
+def test_commit_graph_traversal_matches_object_walk(repo: RepoTools, monkeypatch):
+    import visigit.repo as repo_module
+
+    repo.merge_history()
+    repo._run(["git", "commit-graph", "write", "--reachable"])
+    repo.checkout("feature")
+    repo.write("uncovered.txt")
+    repo.commit("newer than the commit-graph")
+
+    calls: list[bool] = []
+    real = repo_module.iter_log_records
+
+    def recording(git_dir, revs, no_walk=False, metadata=True):
+        calls.append(no_walk)
+        return real(git_dir, revs, no_walk=no_walk, metadata=metadata)
+
+    monkeypatch.setattr(repo_module, "iter_log_records", recording)
+    r = GitRepo(str(repo.path), use_cache=False)
+    assert r._open_commit_graph() is not None
+    refs = r._collect_refs(exclude_remotes=False)
+    for max_depth in (None, 0, 2):
+        for include_trees in (False, True):
+            assert r._bfs_commits(refs, max_depth, include_trees) == r._bfs_commit_objects(
+                refs, max_depth, include_trees
+            )
+    assert calls
+
+
+def test_commit_graph_branch_topology_unchanged(repo: RepoTools):
+    repo.merge_history()
+    repo.checkout("side", new=True)
+    repo.write("side.txt")
+    repo.commit("side")
+    repo.checkout("main")
+    before = GitRepo(str(repo.path), use_cache=False).get_branch_topology()
+    repo._run(["git", "commit-graph", "write", "--reachable"])
+    r = GitRepo(str(repo.path), use_cache=False)
+    assert r._open_commit_graph() is not None
+    assert r.get_branch_topology() == before
+
+
+def test_replace_refs_do_not_change_parents(repo: RepoTools):
+    """Like GitPython's object reader, traversal sees the parents stored in objects."""
+    for i in range(3):
+        repo.write(f"f{i}.txt")
+        repo.commit(f"c{i}")
+    repo._run(["git", "replace", "--graft", "HEAD"])  # git log would show HEAD parentless
+    assert len(GitRepo(str(repo.path), use_cache=False).build_graph().commits) == 3
+    repo._run(["git", "commit-graph", "write", "--reachable"])
+    assert len(GitRepo(str(repo.path), use_cache=False).build_graph().commits) == 3
+
+
+# ---------------------------------------------------------------------------
+# Date- and count-bounded traversal
+# ---------------------------------------------------------------------------
+
+
+def _commit_at(repo: RepoTools, monkeypatch, name: str, date: str) -> str:
+    monkeypatch.setenv("GIT_AUTHOR_DATE", date)
+    monkeypatch.setenv("GIT_COMMITTER_DATE", date)
+    repo.write(f"{name}.txt")
+    return repo.commit(name)
+
+
+def test_max_count_keeps_newest_commits(repo: RepoTools, monkeypatch):
+    shas = [_commit_at(repo, monkeypatch, f"c{i}", f"2024-01-0{i + 1}T12:00:00") for i in range(5)]
+    graph = GitRepo(str(repo.path)).build_graph(max_count=3)
+    assert set(graph.commits) == set(shas[2:])
+    assert graph.commits[shas[2]].parents == []  # cut edge: parent stripped
+    assert graph.truncated == {shas[2]}
+
+
+def test_since_drops_old_history_and_stale_refs(repo: RepoTools, monkeypatch):
+    old = _commit_at(repo, monkeypatch, "old", "2020-01-01T12:00:00")
+    repo.checkout("stale", new=True)
+    stale = _commit_at(repo, monkeypatch, "stale", "2020-02-01T12:00:00")
+    repo.checkout("main")
+    new = _commit_at(repo, monkeypatch, "new", "2024-01-01T12:00:00")
+
+    graph = GitRepo(str(repo.path)).build_graph(since="2023-01-01")
+    assert set(graph.commits) == {new}
+    assert old not in graph.commits and stale not in graph.commits
+    assert {ref.path for ref in graph.refs} == {"HEAD", "refs/heads/main"}
+
+
+def test_max_count_with_depth_limit(repo: RepoTools, monkeypatch):
+    shas = [_commit_at(repo, monkeypatch, f"c{i}", f"2024-01-0{i + 1}T12:00:00") for i in range(5)]
+    graph = GitRepo(str(repo.path)).build_graph(max_depth=1, max_count=4)
+    assert set(graph.commits) == set(shas[3:])
+
+
+# ---------------------------------------------------------------------------
+# Per-ref depth budgets
+# ---------------------------------------------------------------------------
+
+
+def _window(graph, tip: str, depth: int) -> set[str]:
+    """Commits within depth parent hops of tip, computed from one ref alone."""
+    seen: set[str] = set()
+    level = [tip]
+    for _ in range(depth + 1):
+        level = [h for h in level if h not in seen]
+        seen.update(level)
+        level = [p for h in level for p in graph.commits[h].parents]
+    return seen
+
+
+def test_depth_limit_is_per_ref(repo: RepoTools, monkeypatch):
+    import visigit.repo as repo_module
+
+    for i in range(6):
+        repo.write(f"m{i}.txt")
+        repo.commit(f"m{i}")
+    repo.checkout("short", new=True)
+    repo.write("s.txt")
+    repo.commit("s")
+    repo.checkout("long", new=True)
+    for i in range(6):
+        repo.write(f"l{i}.txt")
+        repo.commit(f"l{i}")
+    repo.checkout("main")
+    repo.merge("short")
+    full = GitRepo(str(repo.path), use_cache=False).build_graph()
+
+    log_calls = []
+    real = repo_module.iter_log_records
+
+    def counting(*args, **kwargs):
+        log_calls.append(args)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(repo_module, "iter_log_records", counting)
+    for depth in (0, 1, 3, 8):
+        graph = GitRepo(str(repo.path), use_cache=False).build_graph(max_depth=depth)
+        tips = {ref.commit_hexsha for ref in graph.refs}
+        assert set(graph.commits) == set().union(*(_window(full, t, depth) for t in tips))
+    # Levels are read through one cat-file process; only the metadata batch uses git log
+    assert len(log_calls) == 4
+
+
+# ---------------------------------------------------------------------------
+# Streaming traversal
+# ---------------------------------------------------------------------------
+
+
+def test_stream_graph_yields_children_before_parents(repo: RepoTools):
+    repo.write("a.txt")
+    root = repo.commit("a")
+    repo.checkout("feature", new=True)
+    repo.write("f.txt")
+    feature = repo.commit("f")
+    repo.checkout("main")
+    repo.write("m.txt")
+    repo.commit("m")
+    repo.merge("feature")
+
+    graph = GitRepo(str(repo.path), use_cache=False).build_graph()
+    stream = GitRepo(str(repo.path), use_cache=False).stream_graph()
+    assert [ref.path for ref in stream.refs] == [ref.path for ref in graph.refs]
+
+    seen: set[str] = set()
+    for cd in stream:
+        assert cd.parents == graph.commits[cd.hexsha].parents
+        assert cd.children == graph.commits[cd.hexsha].children
+        assert cd.children <= seen  # every child arrived first
+        assert [r.path for r in cd.refs] == [r.path for r in graph.commits[cd.hexsha].refs]
+        seen.add(cd.hexsha)
+    assert seen == set(graph.commits)
+    assert {root, feature} <= seen
+    assert stream.hash_length >= graph.hash_length
+
+
+def test_refs_listed_once_and_broken_refs_skipped(repo: RepoTools, monkeypatch):
+    import visigit.repo as repo_module
+
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.tag("v1", annotated=True)
+    (repo.path / ".git" / "refs" / "heads" / "broken").write_text("ab" * 20 + "\n")
+    calls = []
+    real = repo_module.list_refs
+    monkeypatch.setattr(repo_module, "list_refs", lambda *args: calls.append(args) or real(*args))
+
+    graph = GitRepo(str(repo.path)).build_graph()
+    assert len(calls) == 1
+    assert [ref.path for ref in graph.refs] == ["HEAD", "refs/heads/main", "refs/tags/v1"]
+    tag = graph.refs[2]
+    assert tag.commit_hexsha == sha and tag.tag_object_hexsha == repo.rev_parse("v1")
+
+
+def test_special_refs_and_stash_checked_in_one_lookup(repo: RepoTools, monkeypatch):
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.append("a.txt")
+    repo._run(["git", "stash"])
+    git_dir = repo.path / ".git"
+    (git_dir / "FETCH_HEAD").write_text(f"{sha}\t\tbranch 'main' of origin\n")
+    (git_dir / "MERGE_HEAD").write_text("ab" * 20 + "\n")
+
+    r = GitRepo(str(repo.path))
+    batches = []
+    real = r._objects.has_commits
+    monkeypatch.setattr(r._objects, "has_commits", lambda shas: batches.append(shas) or real(shas))
+    refs = r._collect_refs(exclude_remotes=False, include_stash=True)
+    topo = r.get_branch_topology()
+    assert len(batches) == 1
+    assert {ref.path for ref in refs} >= {"FETCH_HEAD", "ORIG_HEAD", "stash/stash@{0}"}
+    assert "MERGE_HEAD" not in {ref.path for ref in refs}
+    assert {"FETCH_HEAD", "stash@{0}"} <= {node.name for node in topo.nodes}
+
+
+def _ref_filter_history(repo: RepoTools) -> dict[str, str]:
+    """main with a merged branch, an unmerged branch, an old branch and two tags."""
+    shas = repo.merge_history(base=("a",), feature=("done",), main=(), branch="done", tag=None)
+    for name in ("v1", "nightly-1"):
+        repo._run(["git", "tag", name, shas["a"]])
+    repo.checkout("wip", new=True)
+    shas.update(repo.commits("wip"))
+    repo.checkout("old", new=True)
+    repo.write("o.txt")
+    repo.add()
+    env = dict(os.environ, GIT_COMMITTER_DATE="2001-01-01T00:00:00Z")
+    subprocess.run(["git", "commit", "-qm", "old"], cwd=repo.path, env=env, check=True)
+    shas["old"] = repo.rev_parse("HEAD")
+    repo.checkout("main")
+    (repo.path / ".git" / "ORIG_HEAD").unlink()  # left by the merge; never filtered
+    return shas
+
+
+def test_ref_filter_globs(repo: RepoTools):
+    shas = _ref_filter_history(repo)
+    ref_filter = RefFilter(include=("refs/heads/*", "refs/tags/v*"), exclude=("*/old",))
+    graph = GitRepo(str(repo.path), ref_filter=ref_filter).build_graph()
+    paths = [ref.path for ref in graph.refs]
+    assert paths == ["HEAD", "refs/heads/done", "refs/heads/main", "refs/heads/wip", "refs/tags/v1"]
+    assert shas["old"] not in graph.commits  # never traversed
+
+
+def test_ref_filter_stale_and_merged(repo: RepoTools):
+    shas = _ref_filter_history(repo)
+    graph = GitRepo(str(repo.path), ref_filter=RefFilter(stale_days=365)).build_graph()
+    assert "refs/heads/old" not in [ref.path for ref in graph.refs]
+
+    r = GitRepo(str(repo.path), ref_filter=RefFilter(merged_into="main"))
+    paths = [ref.path for ref in r.build_graph().refs]
+    assert "refs/heads/done" not in paths
+    assert {"refs/heads/main", "refs/heads/wip", "refs/heads/old", "refs/tags/v1"} <= set(paths)
+    topo = r.get_branch_topology()
+    assert sorted(n.name for n in topo.nodes if not n.is_tag) == ["main", "old", "wip"]
+    assert shas["wip"] in r.build_graph().commits
+
+
+def test_ref_filter_keeps_checked_out_branch(repo: RepoTools):
+    _ref_filter_history(repo)
+    repo.checkout("done")
+    ref_filter = RefFilter(include=("refs/tags/*",), merged_into="main")
+    paths = [ref.path for ref in GitRepo(str(repo.path), ref_filter=ref_filter).build_graph().refs]
+    assert paths == ["HEAD", "refs/heads/done", "refs/tags/nightly-1", "refs/tags/v1"]
+
+
+def test_ref_filter_from_cli_flags():
+    assert _ref_filter(_parse_args([])) is None
+    args = _parse_args(
+        ["--include-ref", "refs/heads/*", "--exclude-ref", "*/tmp-*", "--stale-days", "90"]
+    )
+    assert _ref_filter(args) == RefFilter(
+        include=("refs/heads/*",), exclude=("*/tmp-*",), stale_days=90
+    )
+
+
+def test_packed_tags_peeled_from_packed_refs(repo: RepoTools, monkeypatch):
+    import visigit.repo as repo_module
+
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.tag("v1", annotated=True)
+    repo._run(["git", "tag", "-a", "v1-signed", "-m", "tag of a tag", "v1"])
+    repo.tag("light")
+    repo._run(["git", "pack-refs", "--all"])
+    repo.tag("v2", annotated=True)  # loose
+    patterns = []
+    real = repo_module.list_refs
+    monkeypatch.setattr(
+        repo_module, "list_refs", lambda git_dir, pats: patterns.extend(pats) or real(git_dir, pats)
+    )
+
+    tags = {ref.name: ref for ref in GitRepo(str(repo.path)).build_graph().refs if ref.is_tag}
+    assert "refs/tags" not in patterns and "refs/tags/v2" in patterns
+    assert sorted(tags) == ["light", "v1", "v1-signed", "v2"]
+    assert all(ref.commit_hexsha == sha for ref in tags.values())
+    assert tags["light"].tag_object_hexsha is None
+    for name in ("v1", "v1-signed", "v2"):
+        assert tags[name].tag_object_hexsha == repo.rev_parse(name)
+
+
+def test_loose_tag_of_tag_peeled_without_touching_cached_listing(repo: RepoTools):
+    repo.write("a.txt")
+    sha = repo.commit("a")
+    repo.tag("v1", annotated=True)
+    repo._run(["git", "tag", "-a", "v1-signed", "-m", "tag of a tag", "v1"])
+
+    r = GitRepo(str(repo.path))
+    for _ in range(2):
+        tags = {ref.name: ref for ref in r.build_graph().refs}
+        assert tags["v1-signed"].commit_hexsha == sha
+    listed = [rec for _, recs in r._ref_listings.values() for rec in recs]
+    nested = [rec for rec in listed if rec.path == "refs/tags/v1-signed"]
+    assert nested and all(rec.commit_hexsha is None for rec in nested)
+
+
+def test_ref_listing_reused_until_refs_change(repo: RepoTools, monkeypatch):
+    import visigit.repo as repo_module
+
+    repo.write("a.txt")
+    repo.commit("a")
+    calls = []
+    real = repo_module.list_refs
+    monkeypatch.setattr(repo_module, "list_refs", lambda *args: calls.append(args) or real(*args))
+
+    r = GitRepo(str(repo.path))
+    r.build_graph()
+    r.reload()
+    r.build_graph()
+    assert len(calls) == 1  # a re-render with no ref changes runs no for-each-ref
+    repo._run(["git", "branch", "feature"])
+    r.reload()
+    graph = r.build_graph()
+    assert len(calls) == 2
+    assert "refs/heads/feature" in [ref.path for ref in graph.refs]
+    GitRepo(str(repo.path)).build_graph()
+    assert len(calls) == 3  # listings belong to one GitRepo, not the process
+
+
+def test_branch_topology_includes_remote_branches(repo: RepoTools, tmp_path_factory):
+    repo.write("a.txt")
+    repo.commit("a")
+    clone = tmp_path_factory.mktemp("clone") / "c"
+    repo._run(["git", "clone", "-q", str(repo.path), str(clone)])
+
+    topo = GitRepo(str(clone)).get_branch_topology()
+    remotes = [node.name for node in topo.nodes if node.is_remote]
+    assert remotes == ["origin/main"]  # origin/HEAD is a symref, not a branch
+    topo = GitRepo(str(clone)).get_branch_topology(exclude_remotes=True)
+    assert not any(node.is_remote for node in topo.nodes)
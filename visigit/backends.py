@@ -0,0 +1,272 @@
+"""Object-access backends for GitRepo.
+
+History itself is streamed by the plumbing readers, but GitRepo still reads
+individual objects: tree entries for verbose mode, commit dates and merge
+bases for branch mode, existence checks for refs found outside refs/, and the
+whole walk when the streamed traversal fails.  An ObjectBackend answers those
+questions; three implementations are available:
+
+* ``gitpython`` (default) -- GitPython's pure-Python object database.
+* ``pygit2`` -- libgit2 through pygit2, when installed (``pip install pygit2``).
+* ``subprocess`` -- one long-running ``git cat-file --batch`` process.
+
+Every backend returns plain Python values only.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import weakref
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import git
+
+from .cache import TreeEntries
+from .plumbing import CatFileBatch, CommitRecord, GitCommandError, git_command, parse_tree_object
+
+try:
+    import pygit2
+except ImportError:  # optional dependency
+    pygit2 = None
+
+BACKENDS = ("gitpython", "pygit2", "subprocess")
+DEFAULT_BACKEND = "gitpython"
+
+
+class BackendUnavailableError(RuntimeError):
+    """The requested backend's library is not installed."""
+
+
+class ObjectBackend(ABC):
+    """Reads single git objects by SHA.  Subclasses implement every abstract method."""
+
+    name = ""
+
+    @abstractmethod
+    def read_commit(self, hexsha: str) -> Optional[CommitRecord]:
+        """Return the commit with its metadata, or None if it is not in the store."""
+
+    @abstractmethod
+    def has_commit(self, hexsha: str) -> bool:
+        """True if hexsha names a commit (or a tag peeling to one) in the store."""
+
+    @abstractmethod
+    def peel_to_commit(self, hexsha: str) -> Optional[str]:
+        """Return the commit hexsha peels to through any chain of tags, or None."""
+
+    def has_commits(self, hexshas: Iterable[str]) -> set[str]:
+        """Return the subset of hexshas that has_commit() accepts, in as few lookups as possible."""
+        return {h for h in hexshas if self.has_commit(h)}
+
+    @abstractmethod
+    def committed_date(self, hexsha: str) -> Optional[int]:
+        """Return the committer timestamp, or None if the commit is not in the store."""
+
+    @abstractmethod
+    def read_tree(self, hexsha: str) -> TreeEntries:
+        """Return [(kind, name, hexsha), ...] in tree order; kind is tree/blob/commit."""
+
+    def read_trees(self, hexshas: Iterable[str]) -> list[TreeEntries]:
+        """read_tree() for many trees at once, in order; backends batch it where they can."""
+        return [self.read_tree(h) for h in hexshas]
+
+    @abstractmethod
+    def merge_base(self, a: str, b: str) -> Optional[str]:
+        """Return the best common ancestor of two commits, or None if unrelated."""
+
+    def close(self) -> None:
+        pass
+
+
+class GitPythonBackend(ObjectBackend):
+    name = "gitpython"
+
+    def __init__(self, repo: git.Repo) -> None:
+        self._repo = repo
+
+    def read_commit(self, hexsha: str) -> Optional[CommitRecord]:
+        try:
+            commit = self._repo.commit(hexsha)
+            return CommitRecord(
+                hexsha=hexsha,
+                parents=[p.hexsha for p in commit.parents],
+                tree_hexsha=commit.tree.hexsha,
+                author=commit.author.name,
+                date_iso=commit.authored_datetime.isoformat(),
+                short_message=(commit.message or "").split("\n")[0][:72],
+            )
+        except (ValueError, git.BadName, git.BadObject):
+            return None
+
+    def has_commit(self, hexsha: str) -> bool:
+        try:
+            self._repo.commit(hexsha)
+        except (ValueError, git.BadName, git.BadObject):
+            return False
+        return True
+
+    def peel_to_commit(self, hexsha: str) -> Optional[str]:
+        try:
+            return self._repo.commit(hexsha).hexsha
+        except (ValueError, git.BadName, git.BadObject):
+            return None
+
+    def committed_date(self, hexsha: str) -> Optional[int]:
+        try:
+            return self._repo.commit(hexsha).committed_date
+        except (ValueError, git.BadName, git.BadObject):
+            return None
+
+    def read_tree(self, hexsha: str) -> TreeEntries:
+        # The raw stream comes from GitPython's persistent cat-file process; parsing
+        # it directly skips building a git.Tree with an object per entry.
+        stream = self._repo.odb.stream(bytes.fromhex(hexsha))
+        if stream.type != b"tree":
+            raise ValueError(f"{hexsha} is not a tree")
+        return parse_tree_object(stream.read())
+
+    def merge_base(self, a: str, b: str) -> Optional[str]:
+        bases = self._repo.merge_base(a, b)
+        return bases[0].hexsha if bases else None
+
+
+class Pygit2Backend(ObjectBackend):
+    name = "pygit2"
+
+    def __init__(self, git_dir: str) -> None:
+        if pygit2 is None:
+            raise BackendUnavailableError("the pygit2 backend needs pygit2 (pip install pygit2)")
+        self._repo = pygit2.Repository(git_dir)
+
+    def _commit(self, hexsha: str):
+        try:
+            obj = self._repo.get(hexsha)
+        except ValueError:
+            return None
+        return obj if isinstance(obj, pygit2.Commit) else None
+
+    def read_commit(self, hexsha: str) -> Optional[CommitRecord]:
+        commit = self._commit(hexsha)
+        if commit is None:
+            return None
+        author = commit.author
+        tz = timezone(timedelta(minutes=author.offset))
+        message = commit.raw_message.decode("utf-8", errors="replace")
+        return CommitRecord(
+            hexsha=hexsha,
+            parents=[str(p) for p in commit.parent_ids],
+            tree_hexsha=str(commit.tree_id),
+            author=author.name,
+            date_iso=datetime.fromtimestamp(author.time, tz).isoformat(),
+            short_message=message.split("\n")[0][:72],
+        )
+
+    def has_commit(self, hexsha: str) -> bool:
+        return self.peel_to_commit(hexsha) is not None
+
+    def peel_to_commit(self, hexsha: str) -> Optional[str]:
+        try:
+            return str(self._repo.revparse_single(hexsha).peel(pygit2.Commit).id)
+        except (KeyError, ValueError, pygit2.GitError):
+            return None
+
+    def committed_date(self, hexsha: str) -> Optional[int]:
+        commit = self._commit(hexsha)
+        return commit.commit_time if commit is not None else None
+
+    def read_tree(self, hexsha: str) -> TreeEntries:
+        tree = self._repo.get(hexsha)
+        if not isinstance(tree, pygit2.Tree):
+            raise ValueError(f"{hexsha} is not a tree")
+        return [(entry.type_str, entry.name, str(entry.id)) for entry in tree]
+
+    def merge_base(self, a: str, b: str) -> Optional[str]:
+        base = self._repo.merge_base(a, b)
+        return str(base) if base is not None else None
+
+
+class SubprocessBackend(ObjectBackend):
+    """Raw ``git`` subprocesses; objects come from one persistent cat-file process."""
+
+    name = "subprocess"
+
+    def __init__(self, git_dir: str) -> None:
+        self._git_dir = git_dir
+        self._batch: Optional[CatFileBatch] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def _reader(self) -> CatFileBatch:
+        if self._batch is None:
+            self._batch = CatFileBatch(self._git_dir)
+            # Reap the process with the backend even if close() is never called.
+            self._finalizer = weakref.finalize(self, self._batch.close)
+        return self._batch
+
+    def read_commit(self, hexsha: str) -> Optional[CommitRecord]:
+        return next(self._reader().read_commit_records([hexsha], metadata=True), None)
+
+    def has_commit(self, hexsha: str) -> bool:
+        return bool(self.has_commits([hexsha]))
+
+    def has_commits(self, hexshas: Iterable[str]) -> set[str]:
+        # One round trip for the lot; a ^{commit} name answers with the commit or "missing".
+        names = [f"{h}^{{commit}}" for h in hexshas]
+        suffix = len("^{commit}")
+        return {
+            name[:-suffix]
+            for name, obj_type, _ in self._reader().read(names)
+            if obj_type == "commit"
+        }
+
+    def peel_to_commit(self, hexsha: str) -> Optional[str]:
+        ((_, peeled, obj_type),) = self._reader().check([f"{hexsha}^{{commit}}"])
+        return peeled if obj_type == "commit" else None
+
+    def committed_date(self, hexsha: str) -> Optional[int]:
+        return self._reader().read_committed_date(hexsha)
+
+    def read_tree(self, hexsha: str) -> TreeEntries:
+        return self.read_trees([hexsha])[0]
+
+    def read_trees(self, hexshas: Iterable[str]) -> list[TreeEntries]:
+        replies = list(self._reader().read_trees(hexshas))  # drain the pipe before raising
+        for hexsha, entries in replies:
+            if entries is None:
+                raise ValueError(f"{hexsha} is not a tree")
+        return [entries for _, entries in replies]
+
+    def merge_base(self, a: str, b: str) -> Optional[str]:
+        proc = subprocess.run(
+            git_command(self._git_dir, "merge-base", a, b),
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode == 1 and not proc.stderr:
+            return None  # no common ancestor
+        if proc.returncode != 0:
+            raise GitCommandError(proc.stderr.strip())
+        return proc.stdout.strip() or None
+
+    def close(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+        self._batch = None
+        self._finalizer = None
+
+
+def available_backends() -> list[str]:
+    """Return the names of the backends whose libraries are installed."""
+    return [name for name in BACKENDS if name != "pygit2" or pygit2 is not None]
+
+
+def open_backend(name: str, repo: git.Repo) -> ObjectBackend:
+    """Return the named backend for repo; raises BackendUnavailableError or ValueError."""
+    if name == "gitpython":
+        return GitPythonBackend(repo)
+    if name == "pygit2":
+        return Pygit2Backend(repo.git_dir)
+    if name == "subprocess":
+        return SubprocessBackend(repo.git_dir)
+    raise ValueError(f"unknown object backend {name!r}; choose from {', '.join(BACKENDS)}")
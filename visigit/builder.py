@@ -6,15 +6,19 @@ All Graphviz-specific logic lives here; no GitPython objects enter.
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import AbstractSet, Iterator, Optional
 
 import graphviz
 
 from .colors import SCHEME, NodeColors
 from .repo import (
     BranchTopology,
+    CommitData,
+    CommitStream,
     IndexState,
+    RefInfo,
     RepoGraph,
+    TreeData,
 )
 
 log = logging.getLogger(__name__)
@@ -35,6 +39,7 @@ class GraphBuilder:
         output_format: str = "svg",
         commit_details: bool = False,
         highlight_ids: Optional[frozenset[str]] = None,
+        max_tree_entries: Optional[int] = None,
     ) -> None:
         self.mode = mode
         self.rank_direction = rank_direction
@@ -42,9 +47,14 @@ class GraphBuilder:
         self.commit_details = commit_details
         # None means "no highlighting"; a frozenset means "highlight nodes absent from this set"
         self.highlight_ids: Optional[frozenset[str]] = highlight_ids
+        # Verbose mode: a tree with more entries is drawn as one summary node
+        self.max_tree_entries = max_tree_entries
 
         self._rendered_nodes: set[str] = set()
         self._rendered_edges: set[tuple[str, str]] = set()
+        self._stub_trees: set[str] = set()  # tree nodes drawn only as a reference target
+        # Set to a list for a dry run that only records which commit nodes get drawn
+        self._drawn_commits: Optional[list[str]] = None
 
     @property
     def node_ids(self) -> frozenset[str]:
@@ -60,9 +70,7 @@ class GraphBuilder:
         index_state: Optional[IndexState] = None,
         branch_topology: Optional[BranchTopology] = None,
     ) -> graphviz.Digraph:
-        gv_format = "svg" if self.output_format == "mermaid" else self.output_format
-        dg = graphviz.Digraph(format=gv_format, engine="dot")
-        dg.graph_attr["rankdir"] = self.rank_direction
+        dg = self._new_digraph()
 
         if not graph.commits and not branch_topology:
             # In verbose mode, still show index state even when the repo has no commits yet
@@ -87,44 +95,135 @@ class GraphBuilder:
 
         return dg
 
+    def iter_dot(self, stream: CommitStream) -> Iterator[str]:
+        """Yield DOT source lines for a CommitStream while git is still producing it.
+
+        Normal mode only.  Each commit is drawn (or folded into a collapsed
+        run) as it arrives, so the first lines are out before the traversal
+        ends and the builder holds only the open runs, not the history.  The
+        result is the same graph build() draws for a full-history RepoGraph,
+        with nodes in stream order rather than ref-walk order.
+        """
+        if self.mode != "normal":
+            raise ValueError(f"streaming supports normal mode only, not {self.mode!r}")
+        dg = self._new_digraph()
+        head = list(dg)  # "digraph {", graph attributes, "}"
+        yield from head[:-1]
+
+        hl = stream.hash_length
+        if not stream.refs:
+            self._add_node(dg, "no-repo", label="No git repo found", type_key="ref")
+        for ref in stream.refs:
+            self._add_ref(dg, ref, stream.head_branch_path, hl)
+        yield from self._drain(dg)
+
+        # Open boring runs keyed by the commit that ends them (the run's parent),
+        # several when branches fork there: [first CommitData, length, last hexsha]
+        runs: dict[str, list[list]] = {}
+        for cd in stream:
+            ending = runs.pop(cd.hexsha, [])
+            if len(cd.parents) == 1 and len(cd.children) == 1 and not cd.refs:
+                # A single child means at most one run reaches a boring commit.
+                run = ending[0] if ending else [cd, 0, ""]
+                run[1] += 1
+                run[2] = cd.hexsha
+                runs.setdefault(cd.parents[0], []).append(run)
+                continue
+            for run in ending:
+                self._emit_streamed_run(dg, run, cd.hexsha, hl, stream.shallow)
+            self._add_streamed_commit(dg, cd, hl, stream.shallow)
+            for parent in cd.parents:
+                # Each commit is streamed once, so its edges need no de-duplication.
+                dg.edge(cd.hexsha, parent, label="parent")
+            yield from self._drain(dg)
+
+        for ending in runs.values():  # runs whose parent never arrived
+            for run in ending:
+                self._emit_streamed_run(dg, run, None, hl, stream.shallow)
+        yield from self._drain(dg)
+        yield head[-1]
+
+    def _new_digraph(self) -> graphviz.Digraph:
+        gv_format = "svg" if self.output_format == "mermaid" else self.output_format
+        dg = graphviz.Digraph(format=gv_format, engine="dot")
+        dg.graph_attr["rankdir"] = self.rank_direction
+        return dg
+
+    @staticmethod
+    def _drain(dg: graphviz.Digraph) -> Iterator[str]:
+        yield from dg.body
+        dg.body.clear()
+
+    def _emit_streamed_run(
+        self,
+        dg: graphviz.Digraph,
+        run: list,
+        next_hexsha: Optional[str],
+        hl: int,
+        shallow: AbstractSet[str],
+    ) -> None:
+        first, length, last = run
+        if length == 1:
+            self._add_streamed_commit(dg, first, hl, shallow)
+        else:
+            label = f"{last[:hl]} ({length}) {first.hexsha[:hl]}"
+            self._add_node(dg, first.hexsha, label=label, type_key="commit_summary")
+        if next_hexsha is not None:
+            dg.edge(first.hexsha, next_hexsha, label="parent")
+
+    def _add_streamed_commit(
+        self, dg: graphviz.Digraph, cd: CommitData, hl: int, shallow: AbstractSet[str]
+    ) -> None:
+        label = self._commit_label(cd.hexsha, cd, hl, cd.hexsha in shallow)
+        self._add_node(dg, cd.hexsha, label=label, type_key="commit")
+
     # ------------------------------------------------------------------
     # Commit modes (normal + verbose)
     # ------------------------------------------------------------------
 
     def _build_commits(self, dg: graphviz.Digraph, graph: RepoGraph) -> None:
         hl = graph.hash_length
-        rendered_commits: set[str] = set()
+        rendered_commits: set[str] = set()  # walked, whether drawn or collapsed
+
+        if self.commit_details and graph.metadata_loader is not None:
+            self._load_drawn_metadata(graph)
 
         for ref in graph.refs:
-            ref_id = ref.path
-
-            if ref.is_head:
-                self._add_node(dg, ref_id, label="HEAD", type_key="ref")
-                if graph.head_branch_path:
-                    # Non-detached: HEAD -> branch ref node
-                    self._add_edge(dg, ref_id, graph.head_branch_path, label="HEAD")
-                    # The branch ref will walk the commit chain
-                    continue
-                else:
-                    # Detached HEAD -> commit
-                    self._add_edge(dg, ref_id, ref.commit_hexsha, label="HEAD")
-
-            elif ref.is_tag and ref.tag_object_hexsha:
-                # Annotated tag: ref -> tag-object -> commit
-                self._add_node(dg, ref_id, label=f"tag\n{ref.name}", type_key="tag")
-                tag_obj_id = ref.tag_object_hexsha
-                self._add_node(dg, tag_obj_id, label=f"tag\n{tag_obj_id[:hl]}", type_key="tag")
-                self._add_edge(dg, ref_id, tag_obj_id, label="tag")
-                self._add_edge(dg, tag_obj_id, ref.commit_hexsha, label="commit")
+            if self._add_ref(dg, ref, graph.head_branch_path, hl):
+                self._walk_chain(dg, graph, ref.commit_hexsha, rendered_commits, hl)
+
+    def _add_ref(
+        self, dg: graphviz.Digraph, ref: RefInfo, head_branch_path: Optional[str], hl: int
+    ) -> bool:
+        """Add a ref node and its edge; return False if the ref's commit needs no walk."""
+        ref_id = ref.path
+
+        if ref.is_head:
+            self._add_node(dg, ref_id, label="HEAD", type_key="ref")
+            if head_branch_path:
+                # Non-detached: HEAD -> branch ref node
+                self._add_edge(dg, ref_id, head_branch_path, label="HEAD")
+                # The branch ref will walk the commit chain
+                return False
+            # Detached HEAD -> commit
+            self._add_edge(dg, ref_id, ref.commit_hexsha, label="HEAD")
+
+        elif ref.is_tag and ref.tag_object_hexsha:
+            # Annotated tag: ref -> tag-object -> commit
+            self._add_node(dg, ref_id, label=f"tag\n{ref.name}", type_key="tag")
+            tag_obj_id = ref.tag_object_hexsha
+            self._add_node(dg, tag_obj_id, label=f"tag\n{tag_obj_id[:hl]}", type_key="tag")
+            self._add_edge(dg, ref_id, tag_obj_id, label="tag")
+            self._add_edge(dg, tag_obj_id, ref.commit_hexsha, label="commit")
 
-            else:
-                type_key = "tag" if ref.is_tag else "ref"
-                label = f"tag\n{ref.name}" if ref.is_tag else ref.name
-                self._add_node(dg, ref_id, label=label, type_key=type_key)
-                edge_label = "branch" if ref.is_branch else "tag" if ref.is_tag else "remote"
-                self._add_edge(dg, ref_id, ref.commit_hexsha, label=edge_label)
+        else:
+            type_key = "tag" if ref.is_tag else "ref"
+            label = f"tag\n{ref.name}" if ref.is_tag else ref.name
+            self._add_node(dg, ref_id, label=label, type_key=type_key)
+            edge_label = "branch" if ref.is_branch else "tag" if ref.is_tag else "remote"
+            self._add_edge(dg, ref_id, ref.commit_hexsha, label=edge_label)
 
-            self._walk_chain(dg, graph, ref.commit_hexsha, rendered_commits, hl)
+        return True
 
     def _walk_chain(
         self,
@@ -192,8 +291,7 @@ class GraphBuilder:
         rendered_commits: set[str],
     ) -> None:
         """Emit a boring run as a single commit or a collapsed summary node."""
-        for hexsha in run:
-            rendered_commits.add(hexsha)
+        rendered_commits.update(run)
 
         if len(run) == 1:
             self._add_commit_node(dg, graph, run[0], hl)
@@ -205,22 +303,44 @@ class GraphBuilder:
         if next_hexsha:
             self._add_edge(dg, run[0], next_hexsha, label="parent")
 
+    def _load_drawn_metadata(self, graph: RepoGraph) -> None:
+        """Batch-load deferred commit metadata for the commit nodes this render draws.
+
+        A dry run of the same walk finds them, so commits hidden inside collapsed
+        runs never have their message, author or date read.
+        """
+        probe = GraphBuilder(mode=self.mode)
+        probe._drawn_commits = []
+        probe._build_commits(graphviz.Digraph(), graph)
+        graph.load_metadata(probe._drawn_commits)
+
     def _add_commit_node(
         self, dg: graphviz.Digraph, graph: RepoGraph, hexsha: str, hl: int
     ) -> None:
         """Add a single commit node, with optional detail lines."""
+        if self._drawn_commits is not None:
+            self._drawn_commits.append(hexsha)
+            self._add_node(dg, hexsha, label="", type_key="commit")
+            return
+
         cd = graph.commits.get(hexsha)
+        label = self._commit_label(hexsha, cd, hl, hexsha in graph.shallow)
+        self._add_node(dg, hexsha, label=label, type_key="commit")
+
+        if self.mode == "verbose" and cd and cd.tree_hexsha:
+            self._add_tree(dg, graph, cd.tree_hexsha, hexsha, hl)
+
+    def _commit_label(self, hexsha: str, cd: Optional[CommitData], hl: int, shallow: bool) -> str:
         label = f"commit\n{hexsha[:hl]}"
         if self.commit_details and cd:
             msg = cd.short_message[:40] + ("..." if len(cd.short_message) > 40 else "")
             label = "\n".join([label, cd.author, msg, cd.date_iso[:10]])
+        if shallow:
+            # Shallow-clone boundary: history continues upstream but was not fetched
+            label += "\n(shallow)"
+        return label
 
-        self._add_node(dg, hexsha, label=label, type_key="commit")
-
-        if self.mode == "verbose" and cd and cd.tree_hexsha:
-            self._add_tree_recursive(dg, graph, cd.tree_hexsha, hexsha, hl)
-
-    def _add_tree_recursive(
+    def _add_tree(
         self,
         dg: graphviz.Digraph,
         graph: RepoGraph,
@@ -228,30 +348,71 @@ class GraphBuilder:
         parent_id: str,
         hl: int,
     ) -> None:
-        """Recursively add tree and blob nodes for verbose mode."""
-        if tree_hexsha in self._rendered_nodes:
-            # Tree already drawn; still need the edge from this parent
-            self._add_edge(dg, parent_id, tree_hexsha, label="tree")
-            return
+        """Add a commit's tree and the tree and blob nodes under it (verbose mode).
 
-        td = graph.trees.get(tree_hexsha)
-        if td is None:
-            return
-
-        self._add_node(dg, tree_hexsha, label=f"tree\n{tree_hexsha[:hl]}", type_key="tree")
-        self._add_edge(dg, parent_id, tree_hexsha, label="tree")
-
-        for name, blob_hexsha in td.blob_entries:
-            self._add_node(dg, blob_hexsha, label=f"blob\n{blob_hexsha[:hl]}", type_key="blob")
-            self._add_edge(dg, tree_hexsha, blob_hexsha, label=name)
+        Walks with an explicit stack, in the same depth-first order a recursive
+        walk would take, so deep trees need no Python recursion.  A tree that
+        was not collected -- a delta-mode root identical to its parent
+        commit's -- and the unchanged subtrees of a delta are drawn as
+        references (see _add_tree_reference).
+        """
+        # (tree, parent node id, reference edge label or None to expand)
+        stack: list[tuple[str, str, Optional[str]]] = [(tree_hexsha, parent_id, None)]
+        while stack:
+            tree_hexsha, parent_id, reference = stack.pop()
+            td = graph.trees.get(tree_hexsha)
+            if reference is not None or td is None:
+                self._add_tree_reference(dg, tree_hexsha, parent_id, reference or "tree", hl)
+                continue
+            if tree_hexsha in self._rendered_nodes and tree_hexsha not in self._stub_trees:
+                # Tree already drawn; still need the edge from this parent
+                self._add_edge(dg, parent_id, tree_hexsha, label="tree")
+                continue
+
+            self._stub_trees.discard(tree_hexsha)
+            self._add_node(dg, tree_hexsha, label=f"tree\n{tree_hexsha[:hl]}", type_key="tree")
+            self._add_edge(dg, parent_id, tree_hexsha, label="tree")
 
-        for name, commit_hexsha in td.gitlink_entries:
-            node_id = f"gitlink|{commit_hexsha}"
-            self._add_node(dg, node_id, label=f"gitlink\n{commit_hexsha[:hl]}", type_key="blob")
-            self._add_edge(dg, tree_hexsha, node_id, label=name)
+            summary = td.summary or self._tree_summary(td)
+            if summary is not None:
+                node_id = f"summary|{tree_hexsha}"
+                label = f"{summary[0]} blobs / {summary[1]} subtrees"
+                self._add_node(dg, node_id, label=label, type_key="blob")
+                self._add_edge(dg, tree_hexsha, node_id)
+                continue
+
+            for name, blob_hexsha in td.blob_entries:
+                self._add_node(dg, blob_hexsha, label=f"blob\n{blob_hexsha[:hl]}", type_key="blob")
+                self._add_edge(dg, tree_hexsha, blob_hexsha, label=name)
+
+            for name, commit_hexsha in td.gitlink_entries:
+                node_id = f"gitlink|{commit_hexsha}"
+                self._add_node(dg, node_id, label=f"gitlink\n{commit_hexsha[:hl]}", type_key="blob")
+                self._add_edge(dg, tree_hexsha, node_id, label=name)
+
+            # Popped in reverse: the child trees in order, then the references.
+            stack.extend((h, tree_hexsha, name) for name, h in reversed(td.unchanged_tree_entries))
+            stack.extend((h, tree_hexsha, None) for h in reversed(td.child_tree_hexshas))
+
+    def _tree_summary(self, td: TreeData) -> Optional[tuple[int, int]]:
+        """Return (blobs, subtrees) if td has more entries than max_tree_entries."""
+        n_blobs = len(td.blob_entries) + len(td.gitlink_entries)
+        n_trees = len(td.child_tree_hexshas) + len(td.unchanged_tree_entries)
+        if self.max_tree_entries is None or n_blobs + n_trees <= self.max_tree_entries:
+            return None
+        return n_blobs, n_trees
+
+    def _add_tree_reference(
+        self, dg: graphviz.Digraph, tree_hexsha: str, parent_id: str, label: str, hl: int
+    ) -> None:
+        """Add a dashed edge to a tree that is not expanded here (delta mode).
 
-        for child_tree_hexsha in td.child_tree_hexshas:
-            self._add_tree_recursive(dg, graph, child_tree_hexsha, tree_hexsha, hl)
+        The tree node is drawn on its own until some commit expands it.
+        """
+        if tree_hexsha not in self._rendered_nodes:
+            self._stub_trees.add(tree_hexsha)
+            self._add_node(dg, tree_hexsha, label=f"tree\n{tree_hexsha[:hl]}", type_key="tree")
+        self._add_edge(dg, parent_id, tree_hexsha, label=label, style="dashed")
 
     # ------------------------------------------------------------------
     # Index / working tree (verbose mode only)
@@ -319,9 +480,13 @@ class GraphBuilder:
     # ------------------------------------------------------------------
 
     def _is_boring(self, hexsha: str, graph: RepoGraph) -> bool:
-        """A commit is boring if it has exactly 1 parent, 1 child, and 0 refs."""
+        """A commit is boring if it has exactly 1 parent, 1 child, and 0 refs.
+
+        Commits cut off at a --since/--max-count edge are never boring, so a
+        half-cut merge is not folded into a collapsed run.
+        """
         cd = graph.commits.get(hexsha)
-        if cd is None:
+        if cd is None or hexsha in graph.truncated:
             return False
         return len(cd.parents) == 1 and len(cd.children) == 1 and len(cd.refs) == 0
 
@@ -350,9 +515,19 @@ class GraphBuilder:
             penwidth="2",
         )
 
-    def _add_edge(self, dg: graphviz.Digraph, from_id: str, to_id: str, label: str = "") -> None:
+    def _add_edge(
+        self,
+        dg: graphviz.Digraph,
+        from_id: str,
+        to_id: str,
+        label: str = "",
+        style: Optional[str] = None,
+    ) -> None:
         key = (from_id, to_id, label)
         if key in self._rendered_edges:
             return
         self._rendered_edges.add(key)
-        dg.edge(from_id, to_id, label=label)
+        if style:
+            dg.edge(from_id, to_id, label=label, style=style)
+        else:
+            dg.edge(from_id, to_id, label=label)
@@ -0,0 +1,327 @@
+"""Persistent on-disk cache of immutable commit and tree metadata.
+
+Commits and trees are content-addressed, so what visigit learns about a SHA
+never changes.  The cache lives under ``.git/visigit/`` as a set of immutable
+segment files, each laid out like a git pack index so lookups binary-search a
+memory-mapped table instead of loading the file:
+
+    magic "VGC1" | count u32 | closed u32 | fanout 256 x u32
+    closed tips: closed x 20-byte SHA
+    index: count x (20-byte SHA, offset u64, length u32), sorted by SHA
+    payloads
+
+Writers never modify a segment in place: new entries go to a temp file that is
+atomically renamed into the directory, so any number of visigit processes can
+read and extend the cache concurrently.  Old segments are merged once too many
+accumulate; a reader that loses the race simply sees a cache miss.  Merging
+streams the sorted segments, so it needs no memory for their contents, and
+drops tree entries once the cache outgrows _MAX_BYTES (commits are kept: the
+closed tips depend on them).
+
+"Closed" tips are commits whose entire ancestry is in the cache.  They let a
+traversal ask git for only the history it has not seen (``--not <closed>``).
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from .plumbing import CommitRecord
+
+log = logging.getLogger(__name__)
+
+CACHE_DIRNAME = "visigit"
+
+_MAGIC = b"VGC1"
+_HEADER = struct.Struct(">4sII")
+_FANOUT = struct.Struct(">256I")
+_ENTRY = struct.Struct(">20sQI")
+_SUFFIX = ".seg"
+_MAX_SEGMENTS = 16
+_MAX_CLOSED = 4096
+_MAX_BYTES = 256 << 20  # merged size above which tree entries are dropped
+
+TreeEntries = list[tuple[str, str, str]]  # (kind, name, hexsha); kind is tree/blob/commit
+
+
+class _Segment:
+    """One read-only, memory-mapped segment file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self._count, n_closed = _HEADER.unpack_from(self._mm, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"bad magic {magic!r}")
+            self._fanout = _FANOUT.unpack_from(self._mm, _HEADER.size)
+            closed_off = _HEADER.size + _FANOUT.size
+            self.closed = [
+                self._mm[closed_off + i * 20 : closed_off + (i + 1) * 20].hex()
+                for i in range(n_closed)
+            ]
+            self._table = closed_off + n_closed * 20
+            if self._table + self._count * _ENTRY.size > len(self._mm):
+                raise ValueError("truncated index")
+        except Exception:
+            self._mm.close()
+            raise
+
+    def find(self, binsha: bytes) -> Optional[bytes]:
+        first = binsha[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        mm, table, size = self._mm, self._table, _ENTRY.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = table + mid * size
+            key = mm[pos : pos + 20]
+            if key < binsha:
+                lo = mid + 1
+            elif key > binsha:
+                hi = mid
+            else:
+                _, offset, length = _ENTRY.unpack_from(mm, pos)
+                return mm[offset : offset + length]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._mm)
+
+    def entries(self) -> Iterator[tuple[bytes, int, int]]:
+        """Yield (binsha, offset, length) per entry, in SHA order."""
+        for i in range(self._count):
+            yield _ENTRY.unpack_from(self._mm, self._table + i * _ENTRY.size)
+
+    def payload(self, offset: int, length: int) -> bytes:
+        return self._mm[offset : offset + length]
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class ObjectCache:
+    """SHA-keyed cache of CommitRecords and tree entry lists.
+
+    Lookups go to pending (unflushed) entries first, then to each segment
+    newest-first.  Call flush() to persist what was added during a run.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self._segments: list[_Segment] = []
+        self._pending: dict[bytes, bytes] = {}
+        self._pending_closed: list[str] = []
+        self._closed: set[str] = set()
+        self._load_segments()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_commit(self, hexsha: str) -> Optional[CommitRecord]:
+        """Return the cached record; its metadata is None if only structure was cached."""
+        payload = self._get(hexsha)
+        if payload is None:
+            return None
+        if payload.startswith(b"p\0"):
+            parents, tree = payload[2:].decode("ascii").split("\0")
+            return CommitRecord(hexsha=hexsha, parents=parents.split(), tree_hexsha=tree)
+        if not payload.startswith(b"c\0"):
+            return None
+        parents, tree, author, date_iso, message = payload[2:].decode("utf-8").split("\0")
+        return CommitRecord(
+            hexsha=hexsha,
+            parents=parents.split(),
+            tree_hexsha=tree,
+            author=author,
+            date_iso=date_iso,
+            short_message=message,
+        )
+
+    def get_tree(self, hexsha: str) -> Optional[TreeEntries]:
+        payload = self._get(hexsha)
+        if payload is None or not payload.startswith(b"t\0"):
+            return None
+        body = payload[2:].decode("utf-8")
+        fields = body.split("\0") if body else []
+        return [tuple(fields[i : i + 3]) for i in range(0, len(fields), 3)]
+
+    def closed_tips(self) -> set[str]:
+        return self._closed | set(self._pending_closed)
+
+    def _get(self, hexsha: str) -> Optional[bytes]:
+        binsha = bytes.fromhex(hexsha)
+        payload = self._pending.get(binsha)
+        if payload is not None:
+            return payload
+        for seg in self._segments:
+            payload = seg.find(binsha)
+            if payload is not None:
+                return payload
+        return None
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def put_commit(self, rec: CommitRecord) -> None:
+        """Cache rec; a record with metadata supersedes a structure-only one."""
+        fields = [" ".join(rec.parents), rec.tree_hexsha]
+        kind = b"p\0"
+        if rec.has_metadata:
+            fields += [rec.author, rec.date_iso, rec.short_message]
+            kind = b"c\0"
+        self._pending[bytes.fromhex(rec.hexsha)] = kind + "\0".join(fields).encode("utf-8")
+
+    def put_tree(self, hexsha: str, entries: TreeEntries) -> None:
+        body = "\0".join(field for entry in entries for field in entry)
+        self._pending[bytes.fromhex(hexsha)] = b"t\0" + body.encode("utf-8")
+
+    def mark_closed(self, hexshas: Iterable[str]) -> None:
+        """Record commits whose full ancestry has been put into the cache."""
+        known = self.closed_tips()
+        self._pending_closed.extend(h for h in dict.fromkeys(hexshas) if h not in known)
+
+    def flush(self) -> None:
+        """Write pending entries as a new segment; merge segments if too many."""
+        if not self._pending and not self._pending_closed:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._write_segment(self._pending, self._pending_closed)
+            self._segments.insert(0, _Segment(path))
+        except OSError as exc:
+            log.debug("Cannot write visigit cache in %s: %s", self.cache_dir, exc)
+            return
+        self._closed.update(self._pending_closed)
+        self._pending = {}
+        self._pending_closed = []
+        if len(self._segments) > _MAX_SEGMENTS:
+            self._compact()
+
+    def close(self) -> None:
+        for seg in self._segments:
+            seg.close()
+        self._segments = []
+
+    # ------------------------------------------------------------------
+    # Segment files
+    # ------------------------------------------------------------------
+
+    def _load_segments(self) -> None:
+        try:
+            names = sorted(
+                (n for n in os.listdir(self.cache_dir) if n.endswith(_SUFFIX)), reverse=True
+            )
+        except OSError:
+            return
+        for name in names:
+            try:
+                seg = _Segment(os.path.join(self.cache_dir, name))
+            except (OSError, ValueError, struct.error) as exc:
+                # Concurrently compacted away, or not a segment we understand.
+                log.debug("Skipping cache segment %s: %s", name, exc)
+                continue
+            self._segments.append(seg)
+            self._closed.update(seg.closed)
+
+    def _write_segment(self, entries: dict[bytes, bytes], closed: list[str]) -> str:
+        keys = sorted(entries)
+        return self._write_sorted(
+            lambda: ((key, len(entries[key])) for key in keys),
+            (entries[key] for key in keys),
+            closed,
+        )
+
+    def _write_sorted(
+        self,
+        sizes: Callable[[], Iterable[tuple[bytes, int]]],
+        payloads: Iterable[bytes],
+        closed: list[str],
+    ) -> str:
+        """Write a segment; sizes() yields (binsha, length) in SHA order, once per pass."""
+        closed = closed[-_MAX_CLOSED:]
+        fanout = [0] * 256
+        for key, _ in sizes():
+            fanout[key[0]] += 1
+        for i in range(1, 256):
+            fanout[i] += fanout[i - 1]
+        count = fanout[255]
+
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_HEADER.pack(_MAGIC, count, len(closed)))
+                fh.write(_FANOUT.pack(*fanout))
+                fh.write(b"".join(bytes.fromhex(h) for h in closed))
+                offset = _HEADER.size + _FANOUT.size + len(closed) * 20 + count * _ENTRY.size
+                for key, length in sizes():
+                    fh.write(_ENTRY.pack(key, offset, length))
+                    offset += length
+                for payload in payloads:
+                    fh.write(payload)
+            # Names sort by creation time so newer segments are searched first.
+            unique = os.path.basename(tmp)[: -len(".tmp")]
+            final = os.path.join(self.cache_dir, f"{time.time_ns():020d}-{unique}{_SUFFIX}")
+            os.replace(tmp, final)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return final
+
+    def _merged_entries(self, keep_trees: bool) -> Iterator[tuple[_Segment, bytes, int, int]]:
+        """Yield (segment, binsha, offset, length) per SHA across every segment, in SHA order.
+
+        The segments are each sorted, so this is a streaming k-way merge; for a
+        SHA in several segments the newest one wins.
+        """
+
+        def stream(age: int, seg: _Segment) -> Iterator[tuple[bytes, int, _Segment, int, int]]:
+            for binsha, offset, length in seg.entries():
+                yield binsha, age, seg, offset, length
+
+        # age 0 is the newest segment
+        streams = [stream(age, seg) for age, seg in enumerate(self._segments)]
+        last = None
+        for binsha, _, seg, offset, length in heapq.merge(*streams, key=lambda e: e[:2]):
+            if binsha == last:
+                continue
+            last = binsha
+            if keep_trees or seg.payload(offset, 2) != b"t\0":
+                yield seg, binsha, offset, length
+
+    def _compact(self) -> None:
+        """Merge every segment into one and remove the originals."""
+        keep_trees = sum(len(seg) for seg in self._segments) <= _MAX_BYTES
+        if not keep_trees:
+            log.debug("visigit cache over %d bytes; dropping tree entries", _MAX_BYTES)
+        closed = [h for seg in reversed(self._segments) for h in seg.closed]
+        try:
+            path = self._write_sorted(
+                lambda: ((key, n) for _, key, _, n in self._merged_entries(keep_trees)),
+                (seg.payload(off, n) for seg, _, off, n in self._merged_entries(keep_trees)),
+                list(dict.fromkeys(closed)),
+            )
+        except OSError as exc:
+            log.debug("Cannot compact visigit cache: %s", exc)
+            return
+        old = self._segments
+        self._segments = [_Segment(path)]
+        for seg in old:
+            seg.close()
+            try:
+                os.unlink(seg.path)
+            except OSError:
+                pass  # still mapped by another process (Windows); retried next time
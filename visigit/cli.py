@@ -9,10 +9,26 @@ from pathlib import Path
 from typing import Optional
 
 from . import __version__
+from .backends import BACKENDS, DEFAULT_BACKEND, available_backends
 from .builder import GraphBuilder
 from .monitor import Monitor
 from .renderer import Renderer
-from .repo import GitRepo
+from .repo import BLOB_HASHERS, TREE_SCOPES, GitRepo, RefFilter, RepoGraph, TreeScope
+
+
+def _tree_scope(value: str) -> TreeScope:
+    """argparse type for --tree-scope: one of TREE_SCOPES or a positive count."""
+    if value in TREE_SCOPES:
+        return value
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected {', '.join(TREE_SCOPES)} or a positive number, not {value!r}"
+        )
+    return count
 
 
 def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
@@ -73,15 +89,135 @@ def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
         default=None,
         metavar="N",
         help=(
-            "Maximum commits to traverse per ref. "
+            "Maximum parent hops to traverse from each ref tip; every ref gets its own "
+            "window and overlapping history is read once. "
             "Default: unlimited (shared-history short-circuits automatically)."
         ),
     )
+    parser.add_argument(
+        "--since",
+        default=None,
+        metavar="DATE",
+        help=(
+            "Only show commits newer than DATE (anything git accepts, e.g. "
+            "'90 days ago' or 2024-01-31). Default: no date limit."
+        ),
+    )
+    parser.add_argument(
+        "--max-count",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Only show the N newest commits across all refs. Default: no limit.",
+    )
+    parser.add_argument(
+        "--tree-scope",
+        type=_tree_scope,
+        default="all",
+        metavar="SCOPE",
+        help=(
+            "Verbose mode: which commits get their trees and blobs drawn: 'all', "
+            "'head', 'tips' (every ref tip) or a number N (the N newest commits). "
+            "Trees outside the scope are never read. (default: all)"
+        ),
+    )
+    parser.add_argument(
+        "--tree-delta",
+        action="store_true",
+        help=(
+            "Verbose mode: expand only the subtrees and blobs that changed from each "
+            "commit's first parent; unchanged subtrees are drawn as dashed reference edges."
+        ),
+    )
+    parser.add_argument(
+        "--path",
+        dest="tree_path",
+        default=None,
+        metavar="PREFIX",
+        help=(
+            "Verbose mode: only draw the trees and blobs under PREFIX (e.g. src/service-a/) "
+            "and the trees leading to it; nothing outside it is read."
+        ),
+    )
+    parser.add_argument(
+        "--max-tree-entries",
+        type=int,
+        default=1000,
+        metavar="N",
+        help=(
+            "Verbose mode: draw a tree with more than N entries as a single "
+            "'N blobs / M subtrees' node instead of expanding it; 0 for no limit. "
+            "(default: 1000)"
+        ),
+    )
     parser.add_argument(
         "--exclude-remotes",
         action="store_true",
         help="Exclude remote-tracking references.",
     )
+    parser.add_argument(
+        "--include-ref",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help=(
+            "Only start from branches, tags and remote branches whose full ref path "
+            "matches GLOB (e.g. 'refs/heads/*'); repeatable."
+        ),
+    )
+    parser.add_argument(
+        "--exclude-ref",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip refs whose full ref path matches GLOB (e.g. 'refs/tags/nightly-*'); repeatable.",
+    )
+    parser.add_argument(
+        "--stale-days",
+        type=float,
+        default=None,
+        metavar="N",
+        help="Skip branches, tags and remote branches whose tip is older than N days.",
+    )
+    parser.add_argument(
+        "--hide-merged",
+        default=None,
+        metavar="BRANCH",
+        help="Skip branches and remote branches already merged into BRANCH.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=DEFAULT_BACKEND,
+        help=(
+            "Library that reads individual git objects (trees, merge bases, dates): "
+            "'gitpython', 'pygit2' (libgit2, if installed) or 'subprocess' "
+            f"(a persistent git cat-file process). (default: {DEFAULT_BACKEND})"
+        ),
+    )
+    parser.add_argument(
+        "--blob-hasher",
+        choices=BLOB_HASHERS,
+        default="python",
+        help=(
+            "How modified working-tree files are hashed: 'python' (streamed through "
+            "hashlib on a thread pool) or 'git' (one git hash-object --stdin-paths "
+            "process). (default: python)"
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream commits from git straight into dot while history is still being "
+            "read (normal mode, full history only; the cache is not used)."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the commit/tree metadata cache in .git/visigit/.",
+    )
     parser.add_argument(
         "--commit-details",
         action="store_true",
@@ -113,28 +249,57 @@ def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
         help="Enable verbose logging output.",
     )
 
-    return parser.parse_args(argv)
+    args = parser.parse_args(argv)
+    if args.backend not in available_backends():
+        parser.error(f"--backend {args.backend} needs the {args.backend} package installed")
+    if args.stream and (
+        args.mode != "normal"
+        or args.max_commit_depth is not None
+        or args.since is not None
+        or args.max_count is not None
+    ):
+        parser.error("--stream needs --mode normal without --max-commit-depth/--since/--max-count")
+    if args.max_tree_entries < 0:
+        parser.error("--max-tree-entries must be 0 or more")
+    args.max_tree_entries = args.max_tree_entries or None
+    return args
+
+
+def _ref_filter(args: argparse.Namespace) -> Optional[RefFilter]:
+    """Return the RefFilter the ref selection flags ask for, or None if none were given."""
+    if not (args.include_ref or args.exclude_ref or args.hide_merged) and args.stale_days is None:
+        return None
+    return RefFilter(
+        include=tuple(args.include_ref),
+        exclude=tuple(args.exclude_ref),
+        stale_days=args.stale_days,
+        merged_into=args.hide_merged,
+    )
+
+
+def _open_repo(args: argparse.Namespace) -> GitRepo:
+    return GitRepo(
+        args.repo_path,
+        use_cache=not args.no_cache,
+        backend=args.backend,
+        ref_filter=_ref_filter(args),
+        blob_hasher=args.blob_hasher,
+    )
 
 
 def _render_once(
     args: argparse.Namespace,
     renderer: Renderer,
+    repo: GitRepo,
     highlight_ids: Optional[frozenset[str]] = None,
-) -> frozenset[str]:
-    """Build and render one snapshot; return the node IDs that were drawn."""
-    repo = GitRepo(args.repo_path)
+    prev_graph: Optional[RepoGraph] = None,
+) -> tuple[frozenset[str], Optional[RepoGraph]]:
+    """Build and render one snapshot of repo; return the node IDs drawn and the graph.
 
-    include_trees = args.mode == "verbose"
-    graph = repo.build_graph(
-        max_depth=args.max_commit_depth,
-        exclude_remotes=args.exclude_remotes,
-        include_trees=include_trees,
-    )
-
-    index_state = repo.get_index_state() if args.mode == "verbose" else None
-    branch_topology = (
-        repo.get_branch_topology(args.exclude_remotes) if args.mode == "branch" else None
-    )
+    When prev_graph (the graph from the previous render) is given, it is
+    refreshed incrementally instead of re-traversing the whole history.  With
+    --stream no graph is kept and None is returned in its place.
+    """
 
     # Branch mode flows forward in time left-to-right; commit modes flow right-to-left.
     if args.rank_direction is not None:
@@ -150,11 +315,41 @@ def _render_once(
         output_format=args.output_format,
         commit_details=args.commit_details,
         highlight_ids=highlight_ids,
+        max_tree_entries=args.max_tree_entries,
     )
+
+    if args.stream:
+        stream = repo.stream_graph(args.exclude_remotes, metadata=args.commit_details)
+        renderer.render_lines(builder.iter_dot(stream))
+        return builder.node_ids, None
+
+    graph_args = {
+        "max_depth": args.max_commit_depth,
+        "exclude_remotes": args.exclude_remotes,
+        "include_trees": args.mode == "verbose",
+        "since": args.since,
+        "max_count": args.max_count,
+        "tree_scope": args.tree_scope,
+        "tree_delta": args.tree_delta,
+        "tree_path": args.tree_path,
+        "max_tree_entries": args.max_tree_entries,
+        # GraphBuilder loads message/author/date only for the commits it draws
+        "lazy_metadata": True,
+    }
+    if prev_graph is None:
+        graph = repo.build_graph(**graph_args)
+    else:
+        graph = repo.refresh_graph(prev_graph, **graph_args)
+
+    index_state = repo.get_index_state() if args.mode == "verbose" else None
+    branch_topology = (
+        repo.get_branch_topology(args.exclude_remotes) if args.mode == "branch" else None
+    )
+
     dg = builder.build(graph, index_state=index_state, branch_topology=branch_topology)
 
     renderer.render(dg)
-    return builder.node_ids
+    return builder.node_ids, graph
 
 
 def main(argv: Optional[list[str]] = None) -> None:
@@ -177,14 +372,17 @@ def main(argv: Optional[list[str]] = None) -> None:
     )
 
     # Initial render
-    node_ids = _render_once(args, renderer)
+    repo = _open_repo(args)
+    node_ids, graph = _render_once(args, renderer, repo)
     renderer.open_viewer(Path(args.output_path))
 
     if not args.monitor:
         return
 
     # Monitor loop
-    mon = Monitor(repo_path=args.repo_path, output_path=Path(args.output_path))
+    mon = Monitor(
+        repo_path=args.repo_path, output_path=Path(args.output_path), cache_dir=repo.cache_dir
+    )
     mon.update(node_ids)
     mon.start()
 
@@ -192,7 +390,15 @@ def main(argv: Optional[list[str]] = None) -> None:
         while True:
             mon.wait()
             logging.info("Change detected - re-rendering...")
-            node_ids = _render_once(args, renderer, highlight_ids=mon.prev_node_ids)
+            # One GitRepo serves the session, so its caches carry over between
+            # renders; reopen it only until the directory becomes a repo.
+            if repo.valid:
+                repo.reload()
+            else:
+                repo = _open_repo(args)
+            node_ids, graph = _render_once(
+                args, renderer, repo, highlight_ids=mon.prev_node_ids, prev_graph=graph
+            )
             mon.update(node_ids)
     except KeyboardInterrupt:
         logging.info("Monitor stopped.")
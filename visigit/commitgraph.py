@@ -0,0 +1,203 @@
+"""Reader for git's commit-graph file.
+
+``git maintenance`` and ``git gc`` write ``objects/info/commit-graph`` (or a
+split chain under ``objects/info/commit-graphs/``) holding each commit's parent
+list, root tree, commit date and generation number in a fixed-width binary
+layout.  CommitGraph memory-maps those files so traversal can answer parent
+and date lookups without reading a single commit object.
+
+Only SHA-1 graphs are understood; anything else makes open() return None and
+callers fall back to reading objects.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+_SIGNATURE = b"CGPH"
+_HASH_LEN = 20
+_CDAT_WIDTH = _HASH_LEN + 16
+_NO_PARENT = 0x70000000
+_EXTRA_EDGES = 0x80000000
+_LAST_EDGE = 0x80000000
+
+
+class _Layer:
+    """One memory-mapped commit-graph file."""
+
+    def __init__(self, path: str, base_count: int) -> None:
+        self.path = path
+        self.base_count = base_count  # commits in the layers below this one
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_header()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _parse_header(self) -> None:
+        mm = self._mm
+        signature, version, hash_version, n_chunks = struct.unpack_from(">4sBBB", mm, 0)
+        if signature != _SIGNATURE or version != 1 or hash_version != 1:
+            raise ValueError(f"unsupported commit-graph {signature!r} v{version}/{hash_version}")
+        chunks: dict[bytes, int] = {}
+        for i in range(n_chunks):
+            chunk_id, offset = struct.unpack_from(">4sQ", mm, 8 + 12 * i)
+            chunks[chunk_id] = offset
+        for required in (b"OIDF", b"OIDL", b"CDAT"):
+            if required not in chunks:
+                raise ValueError(f"commit-graph is missing chunk {required!r}")
+        self._fanout = struct.unpack_from(">256I", mm, chunks[b"OIDF"])
+        self.count = self._fanout[255]
+        self._oidl = chunks[b"OIDL"]
+        self._cdat = chunks[b"CDAT"]
+        self._edge = chunks.get(b"EDGE")
+        if self._cdat + self.count * _CDAT_WIDTH > len(mm):
+            raise ValueError("truncated commit-graph")
+
+    def find(self, binsha: bytes) -> Optional[int]:
+        """Return the local position of binsha, or None."""
+        first = binsha[0]
+        lo = self._fanout[first - 1] if first else 0
+        hi = self._fanout[first]
+        mm, oidl = self._mm, self._oidl
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = mm[oidl + mid * _HASH_LEN : oidl + (mid + 1) * _HASH_LEN]
+            if key < binsha:
+                lo = mid + 1
+            elif key > binsha:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def oid(self, local: int) -> str:
+        start = self._oidl + local * _HASH_LEN
+        return self._mm[start : start + _HASH_LEN].hex()
+
+    def cdat(self, local: int) -> tuple[str, int, int, int, int]:
+        """Return (tree_hexsha, parent1, parent2, generation, commit_date)."""
+        start = self._cdat + local * _CDAT_WIDTH
+        tree = self._mm[start : start + _HASH_LEN].hex()
+        p1, p2, hi, lo = struct.unpack_from(">IIII", self._mm, start + _HASH_LEN)
+        return tree, p1, p2, hi >> 2, ((hi & 0x3) << 32) | lo
+
+    def extra_edges(self, index: int) -> list[int]:
+        """Return the parent positions listed in EDGE starting at index."""
+        if self._edge is None:
+            raise ValueError("commit-graph has octopus merges but no EDGE chunk")
+        positions = []
+        while True:
+            (value,) = struct.unpack_from(">I", self._mm, self._edge + 4 * index)
+            positions.append(value & ~_LAST_EDGE)
+            if value & _LAST_EDGE:
+                return positions
+            index += 1
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class CommitGraph:
+    """Parent, tree, date and generation lookups backed by commit-graph files."""
+
+    def __init__(self, layers: list[_Layer]) -> None:
+        self._layers = layers  # base layer first; positions are global across layers
+
+    @classmethod
+    def open(cls, objects_dir: str) -> Optional[CommitGraph]:
+        """Open the repository's commit-graph, or return None if there is none."""
+        info = os.path.join(objects_dir, "info")
+        single = os.path.join(info, "commit-graph")
+        chain = os.path.join(info, "commit-graphs", "commit-graph-chain")
+        try:
+            # git itself prefers the single file when both exist
+            if os.path.exists(single):
+                return cls([_Layer(single, 0)])
+            with open(chain) as fh:
+                hashes = [ln.strip() for ln in fh if ln.strip()]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as exc:
+            log.debug("Ignoring unreadable commit-graph: %s", exc)
+            return None
+
+        layers: list[_Layer] = []
+        try:
+            for graph_hash in hashes:
+                path = os.path.join(info, "commit-graphs", f"graph-{graph_hash}.graph")
+                base = layers[-1].base_count + layers[-1].count if layers else 0
+                layers.append(_Layer(path, base))
+        except (OSError, ValueError, struct.error) as exc:
+            # A chain is only usable from its base upwards; keep the good prefix.
+            log.debug("Commit-graph chain truncated at %d layers: %s", len(layers), exc)
+        return cls(layers) if layers else None
+
+    def __len__(self) -> int:
+        last = self._layers[-1]
+        return last.base_count + last.count
+
+    def __contains__(self, hexsha: str) -> bool:
+        return self._locate(hexsha) is not None
+
+    def parents(self, hexsha: str) -> Optional[list[str]]:
+        """Return parent SHAs in order, or None if the commit is not covered."""
+        found = self._locate(hexsha)
+        if found is None:
+            return None
+        layer, local = found
+        _, p1, p2, _, _ = layer.cdat(local)
+        if p1 == _NO_PARENT:
+            return []
+        positions = [p1]
+        if p2 & _EXTRA_EDGES:
+            positions.extend(layer.extra_edges(p2 & ~_EXTRA_EDGES))
+        elif p2 != _NO_PARENT:
+            positions.append(p2)
+        return [self._oid_at(pos) for pos in positions]
+
+    def commit_date(self, hexsha: str) -> Optional[int]:
+        """Return the committer timestamp (seconds since the epoch), or None."""
+        found = self._locate(hexsha)
+        return None if found is None else found[0].cdat(found[1])[4]
+
+    def generation(self, hexsha: str) -> Optional[int]:
+        """Return the topological generation number, or None.
+
+        Roots have generation 1 and every commit's generation exceeds its
+        parents', so a commit can never be an ancestor of one with a lower value.
+        """
+        found = self._locate(hexsha)
+        return None if found is None else found[0].cdat(found[1])[3]
+
+    def tree(self, hexsha: str) -> Optional[str]:
+        """Return the root tree SHA, or None."""
+        found = self._locate(hexsha)
+        return None if found is None else found[0].cdat(found[1])[0]
+
+    def close(self) -> None:
+        for layer in self._layers:
+            layer.close()
+        self._layers = []
+
+    def _locate(self, hexsha: str) -> Optional[tuple[_Layer, int]]:
+        binsha = bytes.fromhex(hexsha)
+        for layer in reversed(self._layers):
+            local = layer.find(binsha)
+            if local is not None:
+                return layer, local
+        return None
+
+    def _oid_at(self, position: int) -> str:
+        for layer in reversed(self._layers):
+            if position >= layer.base_count:
+                return layer.oid(position - layer.base_count)
+        raise ValueError(f"commit-graph position {position} out of range")
@@ -0,0 +1,293 @@
+"""Native reader for the ref and state files under ``.git``.
+
+HEAD, loose refs, ``packed-refs``, FETCH_HEAD and the other special heads,
+the linked worktrees under ``worktrees/`` and the stash reflog are small text
+files.  GitDir parses them directly -- no subprocess, no GitPython -- and
+keeps every parse in a per-GitDir cache keyed by (path, mtime, size), so a
+monitor re-render of an unchanged repository costs one ``stat()`` per file
+and per ref directory.  The index (read by index.py) is cached the same way.
+Listing a ref directory or the worktree registry drops the entries of files
+that are no longer there.
+
+Git replaces ref files by renaming a lock file over them, so the inode is part
+of the key too.  A file modified within RACY_NS of being read is not cached,
+since a second write in the same timestamp tick could keep its size and mtime
+(git's "racy clean" problem).  Repositories using the reftable ref store are
+reported by ``has_files_backend``; their refs are not readable here.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+
+from .index import Index, read_index
+
+T = TypeVar("T")
+
+SPECIAL_HEADS = ("ORIG_HEAD", "MERGE_HEAD", "CHERRY_PICK_HEAD", "BISECT_HEAD")
+
+# Coarsest timestamp granularity in common use (FAT); newer files are re-read.
+RACY_NS = 2_000_000_000
+
+_StatKey = tuple[int, int, int]
+
+
+@dataclass
+class HeadState:
+    """HEAD as stored: the branch it points at (None if detached) and its commit."""
+
+    symref: Optional[str]  # e.g. "refs/heads/main"
+    hexsha: Optional[str]  # None on an unborn branch
+
+    @property
+    def is_detached(self) -> bool:
+        return self.symref is None
+
+
+@dataclass
+class Worktree:
+    """A linked worktree registered under ``.git/worktrees/<id>``."""
+
+    path: str
+    head: HeadState
+
+
+@dataclass
+class PackedRefs:
+    refs: dict[str, str]  # refname -> hexsha
+    peeled: dict[str, str]  # refname -> fully peeled object, for annotated tags
+    # True if the header promises a ^ line for every annotated tag under refs/tags/
+    # (the "peeled" trait, written by every git since 1.6), so a tag without one
+    # is not an annotated tag.
+    tags_peeled: bool = False
+
+
+def _is_hexsha(value: str) -> bool:
+    return len(value) >= 40 and all(c in "0123456789abcdefABCDEF" for c in value)
+
+
+def _stat_key(path: str) -> Optional[_StatKey]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def _text(path: str) -> str:
+    return _read(path).decode("utf-8", errors="surrogateescape")
+
+
+def _parse_ref_file(path: str) -> Optional[str]:
+    """Return a loose ref's content: a hexsha, or ``ref: <target>`` for a symref."""
+    value = _text(path).strip()
+    if value.startswith("ref:"):
+        return "ref: " + value[4:].strip()
+    return value if _is_hexsha(value) else None
+
+
+def _parse_packed_refs(path: str) -> PackedRefs:
+    refs: dict[str, str] = {}
+    peeled: dict[str, str] = {}
+    traits: list[str] = []
+    last = None
+    for line in _text(path).splitlines():
+        if line.startswith("# pack-refs with:"):
+            traits = line[len("# pack-refs with:") :].split()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("^"):
+            if last is not None and _is_hexsha(line[1:]):
+                peeled[last] = line[1:]
+            continue
+        sha, _, name = line.partition(" ")
+        if _is_hexsha(sha) and name:
+            refs[name] = sha
+            last = name
+        else:
+            last = None
+    tags_peeled = "peeled" in traits or "fully-peeled" in traits
+    return PackedRefs(refs=refs, peeled=peeled, tags_peeled=tags_peeled)
+
+
+def _list_dir(path: str) -> list[tuple[str, bool]]:
+    """Return [(entry name, is_dir), ...] for a ref directory, sorted by name."""
+    with os.scandir(path) as it:
+        return sorted((e.name, e.is_dir()) for e in it if not e.name.endswith(".lock"))
+
+
+def _first_hexsha(path: str) -> Optional[str]:
+    """Return the SHA that starts FETCH_HEAD or a special head file."""
+    line = _text(path).split("\n", 1)[0]
+    sha = line.split("\t", 1)[0].strip()
+    return sha if _is_hexsha(sha) else None
+
+
+def _parse_stash_log(path: str) -> list[str]:
+    """Return the stash reflog's commits, newest first (stash@{0} first)."""
+    shas = []
+    for line in _text(path).splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and _is_hexsha(parts[1]):
+            shas.append(parts[1])
+    shas.reverse()
+    return shas
+
+
+class GitDir:
+    """Reads refs and repository state from the files of one (work)tree's git dir.
+
+    git_dir holds the per-worktree files (HEAD, FETCH_HEAD, the special heads);
+    common_dir, which differs only inside a linked worktree, holds the refs,
+    packed-refs, the stash reflog and the worktree registry.
+    """
+
+    def __init__(self, git_dir: str, common_dir: Optional[str] = None) -> None:
+        self.git_dir = os.path.abspath(git_dir)
+        self.common_dir = os.path.abspath(common_dir or git_dir)
+        # (path, parse kind) -> (stat key, parsed value); see _cached.
+        self._files: dict[tuple[str, str], tuple[_StatKey, object]] = {}
+
+    @property
+    def has_files_backend(self) -> bool:
+        """False for reftable repositories, whose refs this reader cannot see."""
+        return not os.path.isdir(os.path.join(self.common_dir, "reftable"))
+
+    def head(self) -> HeadState:
+        return self._head_at(self.git_dir)
+
+    def fetch_head(self) -> Optional[str]:
+        """Return the first SHA in FETCH_HEAD, or None if it is absent or malformed."""
+        path = os.path.join(self.git_dir, "FETCH_HEAD")
+        return self._cached(path, "first", _first_hexsha, None)
+
+    def special_head(self, name: str) -> Optional[str]:
+        """Return the SHA stored in ORIG_HEAD, MERGE_HEAD, ... or None."""
+        return self._cached(os.path.join(self.git_dir, name), "first", _first_hexsha, None)
+
+    def packed_refs(self) -> PackedRefs:
+        path = os.path.join(self.common_dir, "packed-refs")
+        return self._cached(path, "packed", _parse_packed_refs, PackedRefs(refs={}, peeled={}))
+
+    def loose_refs(self, prefix: str = "refs/") -> dict[str, str]:
+        """Return {refname: hexsha or "ref: <target>"} for the loose refs under prefix."""
+        found: dict[str, str] = {}
+        root = os.path.join(self.common_dir, prefix.rstrip("/"))
+        listed = {root}
+        stack = [prefix.rstrip("/")]
+        while stack:
+            refdir = stack.pop()
+            path = os.path.join(self.common_dir, refdir)
+            for name, is_dir in self._cached(path, "dir", _list_dir, []):
+                refname = f"{refdir}/{name}"
+                listed.add(os.path.join(path, name))
+                if is_dir:
+                    stack.append(refname)
+                    continue
+                value = self._cached(os.path.join(path, name), "ref", _parse_ref_file, None)
+                if value is not None:
+                    found[refname] = value
+        # Deleted or renamed refs are never looked up again, so drop them here.
+        self._forget(root, listed.__contains__)
+        return found
+
+    def refs(self, prefixes: tuple[str, ...] = ("refs/",)) -> dict[str, str]:
+        """Return {refname: hexsha or "ref: <target>"} under prefixes, loose over packed."""
+        merged = {
+            name: sha for name, sha in self.packed_refs().refs.items() if name.startswith(prefixes)
+        }
+        for prefix in prefixes:
+            merged.update(self.loose_refs(prefix))
+        return dict(sorted(merged.items()))
+
+    def resolve(self, refname: str, _depth: int = 0) -> Optional[str]:
+        """Return the SHA refname (a full ref path) points at, following symrefs."""
+        if _depth > 5:
+            return None
+        path = os.path.join(self.common_dir, refname)
+        value = self._cached(path, "ref", _parse_ref_file, None)
+        if value is None:
+            value = self.packed_refs().refs.get(refname)
+        if value is not None and value.startswith("ref: "):
+            return self.resolve(value[5:], _depth + 1)
+        return value
+
+    def worktrees(self) -> list[Worktree]:
+        """Return the linked worktrees (the main worktree is not listed)."""
+        admin = os.path.join(self.common_dir, "worktrees")
+        result = []
+        entries = self._cached(admin, "dir", _list_dir, [])
+        names = {name for name, is_dir in entries if is_dir}
+        # Everything cached for a pruned worktree sits under its admin dir.
+        self._forget(admin, lambda path: path[len(admin) + 1 :].split(os.sep, 1)[0] in names)
+        for name, is_dir in entries:
+            if not is_dir:
+                continue
+            wt_admin = os.path.join(admin, name)
+            gitfile = self._cached(os.path.join(wt_admin, "gitdir"), "text", _text, "").strip()
+            if not gitfile:
+                continue
+            if not os.path.isabs(gitfile):  # worktree.useRelativePaths
+                gitfile = os.path.normpath(os.path.join(wt_admin, gitfile))
+            result.append(Worktree(path=os.path.dirname(gitfile), head=self._head_at(wt_admin)))
+        return result
+
+    def stash_entries(self) -> list[str]:
+        """Return the stash commits newest first, as stash@{0}, stash@{1}, ..."""
+        path = os.path.join(self.common_dir, "logs", "refs", "stash")
+        return self._cached(path, "stash", _parse_stash_log, [])
+
+    def index(self) -> Optional[Index]:
+        """Return the parsed index, or None if there is none (see index.read_index).
+
+        Raises ValueError for an index format this reader does not understand.
+        """
+        return self._cached(os.path.join(self.git_dir, "index"), "index", read_index, None)
+
+    def _cached(self, path: str, kind: str, load: Callable[[str], T], default: T) -> T:
+        """Return load(path), reusing the last result while the file's stat is unchanged."""
+        key = _stat_key(path)
+        if key is None:
+            self._files.pop((path, kind), None)
+            return default
+        hit = self._files.get((path, kind))
+        if hit is not None and hit[0] == key:
+            return hit[1]  # type: ignore[return-value]
+        try:
+            value = load(path)
+        except OSError:
+            return default
+        if time.time_ns() - key[0] >= RACY_NS:
+            self._files[(path, kind)] = (key, value)
+        else:
+            self._files.pop((path, kind), None)
+        return value
+
+    def _forget(self, root: str, keep: Callable[[str], bool]) -> None:
+        """Drop the cached entries for paths under root that keep() rejects."""
+        under = root + os.sep
+        stale = [key for key in self._files if key[0].startswith(under) and not keep(key[0])]
+        for key in stale:
+            del self._files[key]
+
+    def _head_at(self, git_dir: str) -> HeadState:
+        value = self._cached(os.path.join(git_dir, "HEAD"), "ref", _parse_ref_file, None)
+        if value is None:
+            return HeadState(symref=None, hexsha=None)
+        if not value.startswith("ref: "):
+            return HeadState(symref=None, hexsha=value)
+        symref = value[5:]
+        if symref.startswith(("refs/bisect/", "refs/worktree/", "refs/rewritten/")):
+            # Per-worktree refs live beside this HEAD, not in the common dir.
+            sha = self._cached(os.path.join(git_dir, symref), "ref", _parse_ref_file, None)
+        else:
+            sha = self.resolve(symref)
+        return HeadState(symref=symref, hexsha=sha)
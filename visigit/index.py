@@ -0,0 +1,340 @@
+"""Reader for git's index file (``.git/index``).
+
+The index lists every tracked path with the blob SHA that the next commit will
+record.  read_index() memory-maps it and decodes versions 2, 3 and 4 (v4
+prefix-compresses paths), split indexes (a ``link`` extension naming a
+``sharedindex.<sha>`` file plus EWAH bitmaps of replaced and deleted entries)
+and sparse indexes (``040000`` directory entries standing for a whole tree).
+The cache-tree extension (``TREE``) records the tree SHA of every directory
+whose entries have not changed since it was last written; staged_changes()
+uses it to skip a directory outright when that SHA matches HEAD's.
+
+Only SHA-1 indexes are understood; anything else makes read_index() raise
+ValueError and callers fall back to GitPython.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, NamedTuple, Optional
+
+from .cache import TreeEntries
+
+NULL_SHA = "0" * 40
+
+_SIGNATURE = b"DIRC"
+_VERSIONS = (2, 3, 4)
+_HASH_LEN = 20
+_HEADER = struct.Struct(">4sII")
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, SHA, flags
+_ENTRY = struct.Struct(">10I20sH")
+_EXTENSION = struct.Struct(">4sI")
+_FLAG_EXTENDED = 0x4000
+_FLAG_STAGE_SHIFT = 12
+_EXT_INTENT_TO_ADD = 0x2000
+_GITLINK_MODE = 0o160000
+_SPARSE_DIR_MODE = 0o040000
+
+
+class IndexEntry(NamedTuple):
+    """One index entry.  A NamedTuple: an index can hold hundreds of thousands."""
+
+    path: str  # "/"-separated; a sparse directory entry ends in "/"
+    hexsha: str
+    mode: int
+    stage: int  # 0, or 1-3 for the sides of an unresolved conflict
+    intent_to_add: bool  # "git add -N": listed but not staged
+
+
+@dataclass
+class Index:
+    version: int
+    entries: list[IndexEntry]  # sorted by path, then stage
+    # directory ("" for the root) -> tree SHA, for the cache-tree's valid entries
+    cache_tree: dict[str, str] = field(default_factory=dict)
+    sparse: bool = False
+
+
+def read_index(path: str) -> Index:
+    """Parse the index file at path (and its shared index, for a split index)."""
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size < _HEADER.size + _HASH_LEN:
+            raise ValueError("truncated index")
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        index, link = _parse(mm)
+    finally:
+        mm.close()
+    if link is not None:
+        shared_hexsha, replaced, deleted = link
+        if shared_hexsha != NULL_SHA:
+            shared = read_index(os.path.join(os.path.dirname(path), f"sharedindex.{shared_hexsha}"))
+            index.entries = _merge_split(shared.entries, index.entries, replaced, deleted)
+    return index
+
+
+def _parse(mm: mmap.mmap) -> tuple[Index, Optional[tuple[str, list[int], list[int]]]]:
+    signature, version, count = _HEADER.unpack_from(mm, 0)
+    if signature != _SIGNATURE or version not in _VERSIONS:
+        raise ValueError(f"unsupported index {signature!r} v{version}")
+    end = len(mm) - _HASH_LEN
+    entries: list[IndexEntry] = []
+    pos = _HEADER.size
+    prev = b""
+    for _ in range(count):
+        start = pos
+        fields = _ENTRY.unpack_from(mm, pos)
+        flags = fields[11]
+        pos += _ENTRY.size
+        ext_flags = 0
+        if flags & _FLAG_EXTENDED:
+            if version < 3:
+                raise ValueError("extended index entry in a v2 index")
+            (ext_flags,) = struct.unpack_from(">H", mm, pos)
+            pos += 2
+        if version == 4:
+            strip, pos = _varint(mm, pos)
+            nul = mm.find(b"\0", pos, end)
+            if nul < 0 or strip > len(prev):
+                raise ValueError("bad index entry path")
+            name = prev[: len(prev) - strip] + mm[pos:nul]
+            pos = nul + 1
+        else:
+            nul = mm.find(b"\0", pos, end)
+            if nul < 0:
+                raise ValueError("truncated index entry")
+            name = mm[pos:nul]
+            # Entries are NUL-padded to a multiple of eight bytes (at least one NUL).
+            pos = start + ((nul - start + 8) & ~7)
+        prev = name
+        entries.append(
+            IndexEntry(
+                path=name.decode("utf-8", errors="surrogateescape"),
+                hexsha=fields[10].hex(),
+                mode=fields[6],
+                stage=(flags >> _FLAG_STAGE_SHIFT) & 3,
+                intent_to_add=bool(ext_flags & _EXT_INTENT_TO_ADD),
+            )
+        )
+
+    index = Index(version=version, entries=entries)
+    link = None
+    while pos + _EXTENSION.size <= end:
+        signature, size = _EXTENSION.unpack_from(mm, pos)
+        data = mm[pos + _EXTENSION.size : pos + _EXTENSION.size + size]
+        pos += _EXTENSION.size + size
+        if signature == b"TREE":
+            index.cache_tree = _parse_cache_tree(data)
+        elif signature == b"link":
+            link = _parse_link(data)
+        elif signature == b"sdir":
+            index.sparse = True
+        elif not b"A" <= signature[:1] <= b"Z":
+            # Lower-case extensions must be understood to read the index correctly.
+            raise ValueError(f"unsupported index extension {signature!r}")
+    return index, link
+
+
+def _varint(data: mmap.mmap, pos: int) -> tuple[int, int]:
+    """Decode git's offset varint (index v4 path prefix lengths)."""
+    c = data[pos]
+    pos += 1
+    value = c & 0x7F
+    while c & 0x80:
+        c = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7F)
+    return value, pos
+
+
+def _parse_cache_tree(data: bytes) -> dict[str, str]:
+    """Return {directory: tree SHA} for the valid nodes of a TREE extension."""
+    result: dict[str, str] = {}
+    stack: list[list] = []  # [directory, children still to come], preorder
+    pos = 0
+    while pos < len(data):
+        nul = data.index(b"\0", pos)
+        newline = data.index(b"\n", nul)
+        entry_count, subtrees = data[nul + 1 : newline].split(b" ")
+        name = data[pos:nul].decode("utf-8", errors="surrogateescape")
+        pos = newline + 1
+        while stack and stack[-1][1] == 0:
+            stack.pop()
+        if stack:
+            stack[-1][1] -= 1
+            path = f"{stack[-1][0]}/{name}" if stack[-1][0] else name
+        else:
+            path = name  # the root's name is empty
+        if int(entry_count) >= 0:
+            result[path] = data[pos : pos + _HASH_LEN].hex()
+            pos += _HASH_LEN
+        stack.append([path, int(subtrees)])
+    return result
+
+
+def _parse_link(data: bytes) -> tuple[str, list[int], list[int]]:
+    """Return (shared index SHA, replaced positions, deleted positions) of a split index."""
+    shared_hexsha = data[:_HASH_LEN].hex()
+    replaced: list[int] = []
+    deleted: list[int] = []
+    if len(data) > _HASH_LEN:
+        deleted, pos = _ewah_bits(data, _HASH_LEN)
+        replaced, _ = _ewah_bits(data, pos)
+    return shared_hexsha, replaced, deleted
+
+
+def _ewah_bits(data: bytes, pos: int) -> tuple[list[int], int]:
+    """Decode an EWAH-compressed bitmap; return (set bit positions, end offset)."""
+    bit_size, n_words = struct.unpack_from(">II", data, pos)
+    pos += 8
+    words = struct.unpack_from(f">{n_words}Q", data, pos)
+    pos += 8 * n_words + 4  # the words, then the position of the last marker word
+    bits: list[int] = []
+    base = 0
+    i = 0
+    while i < n_words:
+        # Marker word: bit 0 the running bit, bits 1-32 the run length in
+        # words, bits 33-63 the number of literal words that follow.
+        marker = words[i]
+        run = ((marker >> 1) & 0xFFFFFFFF) * 64
+        literals = marker >> 33
+        if marker & 1:
+            bits.extend(range(base, base + run))
+        base += run
+        for word in words[i + 1 : i + 1 + literals]:
+            while word:
+                low = word & -word
+                bits.append(base + low.bit_length() - 1)
+                word ^= low
+            base += 64
+        i += 1 + literals
+    return [bit for bit in bits if bit < bit_size], pos
+
+
+def _merge_split(
+    shared: list[IndexEntry], own: list[IndexEntry], replaced: list[int], deleted: list[int]
+) -> list[IndexEntry]:
+    """Apply a split index's own entries to its shared index.
+
+    The first len(replaced) own entries replace the shared entries at those
+    positions and keep their paths; the rest are added or override by path and
+    stage.
+    """
+    merged = list(shared)
+    for i, position in enumerate(replaced):
+        merged[position] = own[i]._replace(path=shared[position].path)
+    drop = set(deleted)
+    merged = [entry for i, entry in enumerate(merged) if i not in drop]
+    added = own[len(replaced) :]
+    if not added:
+        return merged
+    by_key = {(entry.path, entry.stage): entry for entry in merged}
+    by_key.update(((entry.path, entry.stage), entry) for entry in added)
+    return [by_key[key] for key in sorted(by_key)]
+
+
+def staged_changes(
+    index: Index, head_tree: Optional[str], read_tree: Callable[[str], TreeEntries]
+) -> list[tuple[str, str]]:
+    """Return [(path, index SHA), ...] for every path whose index entry differs from head_tree.
+
+    A path deleted from the index (or not yet resolved in a conflict) gets
+    NULL_SHA.  head_tree is None before the first commit, making every entry
+    staged.  Directories are compared a level at a time with an explicit
+    stack, and one whose cache-tree SHA equals HEAD's is skipped without
+    reading anything.  Only SHAs are compared: a mode-only change (chmod) is
+    not reported.
+    """
+    entries = index.entries
+    paths = [entry.path for entry in entries]
+    changed: list[tuple[str, str]] = []
+    # (directory prefix, index range) compares entries with a HEAD tree;
+    # (directory prefix, None) compares two trees, for sparse directory entries.
+    stack: list[tuple[str, Optional[tuple[int, int]], Optional[str], Optional[str]]] = [
+        ("", (0, len(entries)), None, head_tree)
+    ]
+    while stack:
+        prefix, span, new_tree, old_tree = stack.pop()
+        if span is None:
+            _compare_trees(prefix, new_tree, old_tree, read_tree, changed, stack)
+            continue
+        if old_tree is not None and index.cache_tree.get(prefix[:-1]) == old_tree:
+            continue
+        head = (
+            {name: (kind, hexsha) for kind, name, hexsha in read_tree(old_tree)} if old_tree else {}
+        )
+        seen = set()
+        i, hi = span
+        while i < hi:
+            entry = entries[i]
+            rest = entry.path[len(prefix) :]
+            slash = rest.find("/")
+            if slash < 0:
+                j = i + 1
+                while j < hi and paths[j] == entry.path:
+                    j += 1
+                seen.add(rest)
+                kind, hexsha = head.get(rest, (None, None))
+                if kind == "tree":  # a directory in HEAD is now a file
+                    stack.append((entry.path + "/", None, None, hexsha))
+                if entry.stage != 0:
+                    changed.append((entry.path, NULL_SHA))
+                elif not entry.intent_to_add:
+                    new_kind = "commit" if entry.mode == _GITLINK_MODE else "blob"
+                    if (kind, hexsha) != (new_kind, entry.hexsha):
+                        changed.append((entry.path, entry.hexsha))
+                i = j
+                continue
+            name = rest[:slash]
+            sub = prefix + name + "/"
+            j = bisect_left(paths, prefix + name + "0", i, hi)  # "0" sorts right after "/"
+            seen.add(name)
+            kind, hexsha = head.get(name, (None, None))
+            if kind is not None and kind != "tree":  # a file in HEAD is now a directory
+                changed.append((prefix + name, NULL_SHA))
+            old_sub = hexsha if kind == "tree" else None
+            if entry.mode == _SPARSE_DIR_MODE and entry.path == sub:
+                if entry.hexsha != old_sub:
+                    stack.append((sub, None, entry.hexsha, old_sub))
+            else:
+                stack.append((sub, (i, j), None, old_sub))
+            i = j
+        for name, (kind, hexsha) in head.items():
+            if name in seen:
+                continue
+            if kind == "tree":
+                stack.append((prefix + name + "/", None, None, hexsha))
+            else:
+                changed.append((prefix + name, NULL_SHA))
+    changed.sort()
+    return changed
+
+
+def _compare_trees(
+    prefix: str,
+    new_tree: Optional[str],
+    old_tree: Optional[str],
+    read_tree: Callable[[str], TreeEntries],
+    changed: list[tuple[str, str]],
+    stack: list,
+) -> None:
+    """Record the paths that differ between two trees; push differing subtrees onto stack."""
+    new = {name: (kind, hexsha) for kind, name, hexsha in read_tree(new_tree)} if new_tree else {}
+    old = {name: (kind, hexsha) for kind, name, hexsha in read_tree(old_tree)} if old_tree else {}
+    for name in new.keys() | old.keys():
+        new_kind, new_hexsha = new.get(name, (None, None))
+        old_kind, old_hexsha = old.get(name, (None, None))
+        if (new_kind, new_hexsha) == (old_kind, old_hexsha):
+            continue
+        new_sub = new_hexsha if new_kind == "tree" else None
+        old_sub = old_hexsha if old_kind == "tree" else None
+        if new_sub or old_sub:
+            stack.append((prefix + name + "/", None, new_sub, old_sub))
+        if new_kind is not None and new_kind != "tree":
+            changed.append((prefix + name, new_hexsha))
+        elif old_kind is not None and old_kind != "tree":
+            changed.append((prefix + name, NULL_SHA))
@@ -72,10 +72,11 @@ def dot_to_mermaid(dot_source: str) -> str:
             to_id = id_map.get(raw_to, _sanitize_id(raw_to))
             label_m = re.search(r'label="((?:[^"\\]|\\.)*)"', attr_block)
             edge_label = label_m.group(1) if label_m else ""
+            arrow = "-.->" if re.search(r"\bstyle=\"?dashed", attr_block) else "-->"
             if edge_label:
-                edge_lines.append(f'    {from_id} -->|"{edge_label}"| {to_id}')
+                edge_lines.append(f'    {from_id} {arrow}|"{edge_label}"| {to_id}')
             else:
-                edge_lines.append(f"    {from_id} --> {to_id}")
+                edge_lines.append(f"    {from_id} {arrow} {to_id}")
 
     parts = [f"flowchart {rankdir}"] + node_lines + edge_lines + style_lines
     return "\n".join(parts) + "\n"
@@ -8,6 +8,7 @@ self-triggering loops.
 from __future__ import annotations
 
 import logging
+import os
 import threading
 import time
 from pathlib import Path
@@ -22,10 +23,16 @@ log = logging.getLogger(__name__)
 class _RepoEventHandler(FileSystemEventHandler):
     """Sets an Event when any relevant filesystem change occurs."""
 
-    def __init__(self, change_event: threading.Event, ignore_paths: set[str]) -> None:
+    def __init__(
+        self,
+        change_event: threading.Event,
+        ignore_paths: set[str],
+        ignore_dirs: tuple[str, ...] = (),
+    ) -> None:
         super().__init__()
         self._event = change_event
         self._ignore_paths = ignore_paths  # absolute path strings to skip
+        self._ignore_dirs = ignore_dirs  # absolute directory strings whose contents are skipped
         self._suppress_index_until: float = 0.0
 
     def suppress_index(self, duration: float) -> None:
@@ -42,6 +49,8 @@ class _RepoEventHandler(FileSystemEventHandler):
         abs_path = str(Path(event_path).resolve())
         if abs_path in self._ignore_paths:
             return
+        if any(abs_path.startswith(d + os.sep) or abs_path == d for d in self._ignore_dirs):
+            return
         p = Path(abs_path)
         if (
             p.name == "index"
@@ -79,7 +88,7 @@ class Monitor:
             monitor.update(new_node_ids)
     """
 
-    def __init__(self, repo_path: str, output_path: Path) -> None:
+    def __init__(self, repo_path: str, output_path: Path, cache_dir: Optional[str] = None) -> None:
         self.repo_path = repo_path
         self.output_path = output_path
         self.prev_node_ids: frozenset[str] = frozenset()
@@ -88,7 +97,9 @@ class Monitor:
         ignore = {str(output_path.resolve())}
         # Also ignore the companion HTML viewer file
         ignore.add(str((output_path.parent / "visigit.html").resolve()))
-        self._handler = _RepoEventHandler(self._event, ignore)
+        # visigit's own object cache (GitRepo.cache_dir) is written during renders
+        ignore_dirs = (str(Path(cache_dir).resolve()),) if cache_dir else ()
+        self._handler = _RepoEventHandler(self._event, ignore, ignore_dirs=ignore_dirs)
         self._observer: Optional[Observer] = None
 
     def start(self) -> None:
@@ -0,0 +1,478 @@
+"""Raw git plumbing readers.
+
+These helpers talk to the ``git`` binary directly through long-running,
+streamed subprocess pipes instead of building one GitPython object per git
+object.  They return plain Python values only; GitRepo turns them into the
+data model.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import IO, Iterable, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+# One commit per record: fields are NUL-separated and, with -z, each record is
+# NUL-terminated as well.  %B is the raw message so the first line matches
+# GitPython's commit.message exactly (%s would unwrap the subject paragraph).
+_LOG_FORMAT = "%H%x00%P%x00%T%x00%an%x00%aI%x00%B"
+_LOG_FIELDS = 6
+# Structure only: git never decodes messages or formats dates for these.
+_PARENTS_FORMAT = "%H%x00%P%x00%T"
+_PARENTS_FIELDS = 3
+_READ_CHUNK = 1 << 16
+# One ref per line.  The * fields describe the object an annotated tag points at.
+_REF_FORMAT = (
+    "%(refname)%00%(symref)%00%(objectname)%00%(objecttype)%00%(*objectname)"
+    "%00%(*objecttype)%00%(committerdate:raw)%00%(*committerdate:raw)"
+)
+
+
+class GitCommandError(RuntimeError):
+    """A plumbing command exited non-zero."""
+
+
+@dataclass
+class CommitRecord:
+    """One commit as parsed from a ``git log`` stream.
+
+    The metadata fields are None for records read without metadata.
+    """
+
+    hexsha: str
+    parents: list[str]
+    tree_hexsha: str
+    author: Optional[str] = None
+    date_iso: Optional[str] = None
+    short_message: Optional[str] = None
+
+    @property
+    def has_metadata(self) -> bool:
+        return self.author is not None
+
+
+@dataclass
+class RefRecord:
+    """One ref as listed by ``git for-each-ref``."""
+
+    path: str  # full ref name, e.g. "refs/tags/v1.0"
+    hexsha: str  # the object the ref points at (a tag object for annotated tags)
+    object_type: str
+    # The commit the ref peels to; None if it is not a commit or is a tag of a tag
+    commit_hexsha: Optional[str]
+    committed_date: Optional[int]  # of commit_hexsha
+    symref: Optional[str] = None  # target ref path for symbolic refs (origin/HEAD)
+
+
+def git_command(git_dir: str, *args: str) -> list[str]:
+    """Return the argv for running git against git_dir.
+
+    Replace refs are ignored, as they are by GitPython's object reader, so the
+    parents git reports are the ones recorded in the (immutable) objects.
+    """
+    return ["git", "--no-replace-objects", f"--git-dir={git_dir}", *args]
+
+
+def iter_log_records(
+    git_dir: str,
+    revs: Iterable[str],
+    no_walk: bool = False,
+    metadata: bool = True,
+    max_count: Optional[int] = None,
+    since: Optional[str] = None,
+    topo_order: bool = False,
+) -> Iterator[CommitRecord]:
+    """Stream commits reachable from revs (or exactly revs, with no_walk).
+
+    All revisions are fed through one ``git log --stdin`` process and its output
+    is parsed incrementally, so memory stays proportional to one read chunk
+    rather than the whole history.  With metadata=False only SHAs, parents and
+    trees are read.  max_count and since (any date git understands) bound the
+    walk; git pops commits newest-first by committer date and stops as soon as
+    either budget is spent.  With topo_order, every commit comes before its
+    parents.  Raises GitCommandError if git fails.
+    """
+    fmt, n_fields = (_LOG_FORMAT, _LOG_FIELDS) if metadata else (_PARENTS_FORMAT, _PARENTS_FIELDS)
+    args = ["log", "-z", f"--format={fmt}", "--ignore-missing", "--stdin"]
+    if no_walk:
+        args.append("--no-walk")
+    if topo_order:
+        args.append("--topo-order")
+    if max_count is not None:
+        args.append(f"--max-count={max_count}")
+    if since is not None:
+        args.append(f"--since={since}")
+    with _git_pipe(git_dir, args, revs) as stdout:
+        yield from _parse_log_stream(stdout, n_fields)
+
+
+def iter_rev_list(
+    git_dir: str, revs: Iterable[str], max_count: Optional[int] = None
+) -> Iterator[str]:
+    """Stream the commit SHAs selected by revs (e.g. ``tip`` and ``^other``).
+
+    With max_count, only the newest max_count commits by committer date.
+    """
+    args = ["rev-list", "--ignore-missing", "--stdin"]
+    if max_count is not None:
+        args.append(f"--max-count={max_count}")
+    with _git_pipe(git_dir, args, revs) as stdout:
+        for line in stdout:
+            yield line.decode("ascii").strip()
+
+
+def list_refs(git_dir: str, patterns: Iterable[str]) -> list[RefRecord]:
+    """Return every ref under patterns (e.g. ``refs/heads``), sorted by name.
+
+    One ``for-each-ref`` call reports each ref's target, type, peeled commit
+    and committer date.  That call aborts if any ref points at a missing
+    object; refs are then listed without reading objects and checked in one
+    ``cat-file --batch-check`` pass, skipping the broken ones (without dates).
+    """
+    patterns = list(patterns)
+    try:
+        with _git_pipe(git_dir, ["for-each-ref", f"--format={_REF_FORMAT}", *patterns], []) as out:
+            return [_make_ref_record(line) for line in out]
+    except GitCommandError as exc:
+        log.debug("for-each-ref failed, checking refs one by one: %s", exc)
+
+    fmt = "--format=%(refname)%00%(symref)%00%(objectname)"
+    with _git_pipe(git_dir, ["for-each-ref", fmt, *patterns], []) as out:
+        listed = [line.rstrip(b"\n").decode("utf-8", errors="surrogateescape") for line in out]
+    listed = [line.split("\0") for line in listed]
+    names = [n for _, _, hexsha in listed for n in (hexsha, f"{hexsha}^{{commit}}")]
+    with CatFileBatch(git_dir, check=True) as batch:
+        found = list(batch.check(names))
+    records: list[RefRecord] = []
+    for (path, symref, hexsha), (_, _, obj_type), (_, commit, _) in zip(
+        listed, found[::2], found[1::2]
+    ):
+        if obj_type is None:
+            log.warning("Ref %s points at missing object %s", path, hexsha[:8])
+            continue
+        records.append(
+            RefRecord(
+                path=path,
+                hexsha=hexsha,
+                object_type=obj_type,
+                commit_hexsha=commit,
+                committed_date=None,
+                symref=symref or None,
+            )
+        )
+    return records
+
+
+def packed_ref_records(
+    git_dir: str, refs: Iterable[tuple[str, str, Optional[str]]]
+) -> list[RefRecord]:
+    """Build RefRecords for (path, hexsha, peeled) refs read from packed-refs.
+
+    A ref with a peeled value (from its ``^`` line) is an annotated tag, so no
+    tag object is read; only the types of the peeled objects and of the plain
+    refs are looked up, in one ``cat-file --batch-check`` pass that reads
+    object headers alone.  Refs to missing objects are skipped; committed_date
+    is left unset.
+    """
+    refs = list(refs)
+    with CatFileBatch(git_dir, check=True) as batch:
+        found = list(batch.check(peeled or hexsha for _, hexsha, peeled in refs))
+    records: list[RefRecord] = []
+    for (path, hexsha, peeled), (_, _, obj_type) in zip(refs, found):
+        if obj_type is None:
+            log.warning("Ref %s points at missing object %s", path, (peeled or hexsha)[:8])
+            continue
+        records.append(
+            RefRecord(
+                path=path,
+                hexsha=hexsha,
+                object_type="tag" if peeled else obj_type,
+                commit_hexsha=(peeled or hexsha) if obj_type == "commit" else None,
+                committed_date=None,
+                symref=None,
+            )
+        )
+    return records
+
+
+def list_merged_refs(git_dir: str, target: str, patterns: Iterable[str]) -> set[str]:
+    """Return the paths of the refs under patterns whose tips are reachable from target.
+
+    Raises GitCommandError if target does not name a commit.
+    """
+    args = ["for-each-ref", "--format=%(refname)", f"--merged={target}", *patterns]
+    with _git_pipe(git_dir, args, []) as out:
+        return {line.rstrip(b"\n").decode("utf-8", errors="surrogateescape") for line in out}
+
+
+def hash_object_paths(git_dir: str, paths: list[str]) -> list[str]:
+    """Return the blob SHAs of the files at paths, hashed by one ``git hash-object``.
+
+    Files are hashed as they are on disk (--no-filters: no clean filters or
+    line-ending conversion).  Paths must not contain newlines.  Raises
+    GitCommandError if git fails, e.g. because a file has vanished.
+    """
+    proc = subprocess.run(
+        git_command(git_dir, "hash-object", "--no-filters", "--stdin-paths"),
+        input="".join(f"{path}\n" for path in paths).encode("utf-8", errors="surrogateescape"),
+        capture_output=True,
+    )
+    if proc.returncode != 0:
+        raise GitCommandError(proc.stderr.decode("utf-8", errors="replace").strip())
+    hexshas = proc.stdout.decode("ascii").split()
+    if len(hexshas) != len(paths):
+        raise GitCommandError(f"hash-object returned {len(hexshas)} of {len(paths)} hashes")
+    return hexshas
+
+
+def _make_ref_record(line: bytes) -> RefRecord:
+    fields = line.rstrip(b"\n").decode("utf-8", errors="surrogateescape").split("\0")
+    path, symref, hexsha, obj_type, peeled, peeled_type, date, peeled_date = fields
+    if obj_type == "tag":
+        commit, date = (peeled, peeled_date) if peeled_type == "commit" else (None, "")
+    else:
+        commit = hexsha if obj_type == "commit" else None
+    return RefRecord(
+        path=path,
+        hexsha=hexsha,
+        object_type=obj_type,
+        commit_hexsha=commit,
+        committed_date=int(date.split()[0]) if commit and date else None,
+        symref=symref or None,
+    )
+
+
+class CatFileBatch:
+    """One long-running ``git cat-file --batch`` process for reading raw objects.
+
+    Each read() is a round trip over the same pipes, so a caller that needs
+    objects a batch at a time (a depth-limited BFS, one level per batch) pays
+    for a single process instead of one per batch.  With check=True the
+    process runs ``--batch-check`` instead, for check() only; check() also
+    works on a ``--batch`` process.  Use as a context manager.
+    """
+
+    _CHUNK = 256  # SHAs written per round trip; keeps stdin well below a pipe buffer
+
+    def __init__(self, git_dir: str, check: bool = False) -> None:
+        self._with_content = not check
+        self._proc = subprocess.Popen(
+            git_command(git_dir, "cat-file", "--batch-check" if check else "--batch"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def __enter__(self) -> CatFileBatch:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read(self, hexshas: Iterable[str]) -> Iterator[tuple[str, Optional[str], bytes]]:
+        """Yield (hexsha, type, content) per SHA, in order; type is None if missing."""
+        stdout = self._proc.stdout
+        for hexsha, header in self._headers(hexshas):
+            if len(header) != 3:  # "<sha> missing" (or "ambiguous")
+                yield hexsha, None, b""
+                continue
+            size = int(header[2])
+            content = stdout.read(size + 1)[:size]  # trailing LF
+            yield hexsha, header[1].decode("ascii"), content
+
+    def check(self, names: Iterable[str]) -> Iterator[tuple[str, Optional[str], Optional[str]]]:
+        """Yield (name, hexsha, type) per object name (e.g. ``v1^{commit}``), in order.
+
+        hexsha is what the name resolves to; it and type are None if missing.
+        """
+        stdout = self._proc.stdout
+        for name, header in self._headers(names):
+            if len(header) != 3:
+                yield name, None, None
+                continue
+            if self._with_content:
+                stdout.read(int(header[2]) + 1)
+            yield name, header[0].decode("ascii"), header[1].decode("ascii")
+
+    def _headers(self, names: Iterable[str]) -> Iterator[tuple[str, list[bytes]]]:
+        """Send names a chunk per round trip and yield each reply's split header line.
+
+        read() consumes an object's content between two headers.
+        """
+        names = list(names)
+        stdin, stdout = self._proc.stdin, self._proc.stdout
+        for start in range(0, len(names), self._CHUNK):
+            chunk = names[start : start + self._CHUNK]
+            try:
+                stdin.write("".join(f"{n}\n" for n in chunk).encode("utf-8"))
+                stdin.flush()
+            except BrokenPipeError as exc:
+                raise GitCommandError("git cat-file exited early") from exc
+            for name in chunk:
+                header = stdout.readline().split()
+                if not header:
+                    raise GitCommandError("git cat-file exited early")
+                yield name, header
+
+    def read_commit_records(
+        self, hexshas: Iterable[str], metadata: bool = False
+    ) -> Iterator[CommitRecord]:
+        """Yield CommitRecords for the commits among hexshas (structure only by default)."""
+        for hexsha, obj_type, content in self.read(hexshas):
+            if obj_type == "commit":
+                yield _parse_commit_object(hexsha, content, metadata)
+
+    def read_committed_date(self, hexsha: str) -> Optional[int]:
+        """Return a commit's committer timestamp, or None if hexsha is not a commit."""
+        return next(self.read_committed_dates([hexsha]))[1]
+
+    def read_committed_dates(self, hexshas: Iterable[str]) -> Iterator[tuple[str, Optional[int]]]:
+        """Yield (hexsha, committer timestamp or None) per SHA, in order."""
+        for hexsha, obj_type, content in self.read(hexshas):
+            date = None
+            if obj_type == "commit":
+                for line in content.partition(b"\n\n")[0].split(b"\n"):
+                    if line.startswith(b"committer "):
+                        date = int(_parse_signature(line[10:])[1].timestamp())
+                        break
+            yield hexsha, date
+
+    def read_tree_entries(self, hexsha: str) -> Optional[list[tuple[str, str, str]]]:
+        """Return [(kind, name, hexsha), ...] for a tree, or None if it is not one."""
+        return next(self.read_trees([hexsha]))[1]
+
+    def read_trees(
+        self, hexshas: Iterable[str]
+    ) -> Iterator[tuple[str, Optional[list[tuple[str, str, str]]]]]:
+        """Yield (hexsha, entries or None if not a tree) per SHA, in order."""
+        for hexsha, obj_type, content in self.read(hexshas):
+            yield hexsha, parse_tree_object(content) if obj_type == "tree" else None
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        self._proc.stdout.close()
+
+
+@contextmanager
+def _git_pipe(git_dir: str, args: list[str], revs: Iterable[str]) -> Iterator[IO[bytes]]:
+    """Run git with revs on stdin and yield its stdout for incremental reading.
+
+    The process is killed if the reader stops early.
+    """
+    proc = subprocess.Popen(
+        git_command(git_dir, *args),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        try:
+            proc.stdin.write("".join(f"{rev}\n" for rev in revs).encode("ascii"))
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass  # git exited before reading its input; reported below
+        yield proc.stdout
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise GitCommandError(stderr.decode("utf-8", errors="replace").strip())
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def _parse_log_stream(stream, n_fields: int = _LOG_FIELDS) -> Iterator[CommitRecord]:
+    """Split a NUL-delimited ``git log -z`` stream into CommitRecords."""
+    fields: list[bytes] = []
+    pending = b""
+    while True:
+        chunk = stream.read(_READ_CHUNK)
+        if not chunk:
+            break
+        parts = (pending + chunk).split(b"\0")
+        pending = parts.pop()
+        for part in parts:
+            fields.append(part)
+            if len(fields) == n_fields:
+                yield _make_record(fields)
+                fields = []
+
+
+def _make_record(fields: list[bytes]) -> CommitRecord:
+    if len(fields) == _PARENTS_FIELDS:
+        hexsha, parents, tree = (f.decode("ascii") for f in fields)
+        return CommitRecord(hexsha=hexsha, parents=parents.split(), tree_hexsha=tree)
+    hexsha, parents, tree, author, date_iso, message = (
+        f.decode("utf-8", errors="replace") for f in fields
+    )
+    return CommitRecord(
+        hexsha=hexsha,
+        parents=parents.split(),
+        tree_hexsha=tree,
+        author=author,
+        date_iso=date_iso,
+        short_message=message.split("\n")[0][:72],
+    )
+
+
+def _parse_commit_object(hexsha: str, content: bytes, metadata: bool = False) -> CommitRecord:
+    """Read tree and parents (and, with metadata, the author fields) from a raw commit."""
+    tree = ""
+    parents: list[str] = []
+    author = b""
+    header, _, message = content.partition(b"\n\n")
+    for line in header.split(b"\n"):
+        if line.startswith(b"tree "):
+            tree = line[5:].decode("ascii")
+        elif line.startswith(b"parent "):
+            parents.append(line[7:].decode("ascii"))
+        elif line.startswith(b"author "):
+            author = line[7:]
+    rec = CommitRecord(hexsha=hexsha, parents=parents, tree_hexsha=tree)
+    if metadata:
+        name, timestamp = _parse_signature(author)
+        rec.author = name
+        rec.date_iso = timestamp.isoformat()
+        rec.short_message = message.decode("utf-8", errors="replace").split("\n")[0][:72]
+    return rec
+
+
+def _parse_signature(value: bytes) -> tuple[str, datetime]:
+    """Split ``Name <email> 1700000000 +0100`` into the name and an aware datetime."""
+    ident, _, when = value.rpartition(b"> ")
+    name = ident.rpartition(b" <")[0].decode("utf-8", errors="replace")
+    seconds, _, offset = when.decode("ascii").partition(" ")
+    sign = -1 if offset.startswith("-") else 1
+    delta = timedelta(hours=int(offset[1:3] or 0), minutes=int(offset[3:5] or 0))
+    return name, datetime.fromtimestamp(int(seconds), timezone(sign * delta))
+
+
+def parse_tree_object(content: bytes) -> list[tuple[str, str, str]]:
+    """Split a raw tree into (kind, name, hexsha) entries; kind is tree/blob/commit."""
+    entries: list[tuple[str, str, str]] = []
+    pos = 0
+    while pos < len(content):
+        space = content.index(b" ", pos)
+        nul = content.index(b"\0", space)
+        mode = content[pos:space]
+        kind = "tree" if mode == b"40000" else "commit" if mode == b"160000" else "blob"
+        name = content[space + 1 : nul].decode("utf-8", errors="surrogateescape")
+        entries.append((kind, name, content[nul + 1 : nul + 21].hex()))
+        pos = nul + 21
+    return entries
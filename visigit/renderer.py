@@ -9,6 +9,7 @@ import shutil
 import subprocess
 import tempfile
 from pathlib import Path
+from typing import Iterable
 
 import graphviz
 
@@ -59,6 +60,53 @@ class Renderer:
         log.info("Rendered %s", out_path)
         return out_path
 
+    def render_lines(self, lines: Iterable[str]) -> Path:
+        """Render DOT source given line by line (see GraphBuilder.iter_dot()).
+
+        Lines are piped into ``dot`` as they are produced, so layout input
+        starts flowing before the source is complete.  Mermaid output needs
+        the whole source and is converted at the end.
+        """
+        out_path = self.output_path
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.output_format == "mermaid":
+            from .mermaid import dot_to_mermaid
+
+            out_path.write_text(dot_to_mermaid("".join(lines)), encoding="utf-8")
+            log.info("Rendered %s", out_path)
+            return out_path
+
+        with tempfile.NamedTemporaryFile(suffix=f".{self.output_format}", delete=False) as tmp:
+            tmp_out = Path(tmp.name)
+        cmd = ["dot", f"-T{self.output_format}", f"-o{tmp_out}"]
+        try:
+            with tempfile.TemporaryFile() as errors:
+                try:
+                    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=errors)
+                except FileNotFoundError as exc:
+                    raise graphviz.ExecutableNotFound(cmd) from exc
+                try:
+                    for line in lines:
+                        proc.stdin.write(line.encode("utf-8"))
+                except BrokenPipeError:
+                    pass  # dot exited early; reported below
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    returncode = proc.wait()
+                if returncode != 0:
+                    errors.seek(0)
+                    raise graphviz.CalledProcessError(returncode, cmd, stderr=errors.read())
+            shutil.move(str(tmp_out), str(out_path))
+        finally:
+            tmp_out.unlink(missing_ok=True)
+
+        log.info("Rendered %s", out_path)
+        return out_path
+
     def _render_mermaid(self, dg: graphviz.Digraph, out_path: Path) -> Path:
         from .mermaid import dot_to_mermaid
 
@@ -1,22 +1,55 @@
 """Git repository wrapper and data model.
 
-All GitPython usage is confined to this module; no GitPython objects leak out.
+All GitPython usage is confined to this module and its object backend in
+backends.py; no GitPython objects leak out.
 """
 
 from __future__ import annotations
 
+import dataclasses
+import fnmatch
 import hashlib
 import logging
 import math
 import os
+import posixpath
+import subprocess
+import time
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional, Union
 
 import git
 
+from .backends import DEFAULT_BACKEND, ObjectBackend, open_backend
+from .cache import CACHE_DIRNAME, ObjectCache, TreeEntries
+from .commitgraph import CommitGraph
+from .gitdir import RACY_NS, SPECIAL_HEADS, GitDir
+from .index import NULL_SHA, staged_changes
+from .plumbing import (
+    CatFileBatch,
+    CommitRecord,
+    GitCommandError,
+    RefRecord,
+    git_command,
+    hash_object_paths,
+    iter_log_records,
+    iter_rev_list,
+    list_merged_refs,
+    list_refs,
+    packed_ref_records,
+)
+
 log = logging.getLogger(__name__)
 
+# Most loose tags named on a for-each-ref command line (see _read_ref_records).
+_MAX_REF_PATTERNS = 1000
+BLOB_HASHERS = ("python", "git")
+_HASH_CHUNK = 1 << 20
+# hashlib releases the GIL while hashing, so threads hash files in parallel.
+_HASH_THREADS = min(32, (os.cpu_count() or 1) + 4)
+
 # Lower number = more "base" branch; used to pick edge direction when two
 # branches share the same tip commit (e.g. after a fast-forward merge).
 _BRANCH_PRIORITY: dict[str, int] = {"master": 0, "main": 0, "develop": 1, "dev": 1}
@@ -26,6 +59,60 @@ def _branch_priority(name: str) -> int:
     return _BRANCH_PRIORITY.get(name, 2)
 
 
+def _short_ref_name(path: Optional[str]) -> Optional[str]:
+    """'refs/heads/feature/x' -> 'feature/x'."""
+    if path is None:
+        return None
+    return path[len("refs/heads/") :] if path.startswith("refs/heads/") else path
+
+
+def _path_entries(entries: TreeEntries, path: str, prefix: str) -> TreeEntries:
+    """Return the entries of the tree at path that lie on or under prefix.
+
+    Inside prefix (or with no prefix) that is every entry; in a tree above it,
+    only the entry named by prefix's next component.
+    """
+    if not prefix or path == prefix or path.startswith(prefix + "/"):
+        return entries
+    if path and not prefix.startswith(path + "/"):
+        return []
+    step = prefix[len(path) + 1 if path else 0 :].split("/", 1)[0]
+    return [entry for entry in entries if entry[1] == step]
+
+
+def _hash_file(path: str) -> str:
+    """Return git's blob SHA for the file at path, reading it _HASH_CHUNK bytes at a time."""
+    with open(path, "rb") as fh:
+        sha = hashlib.sha1(b"blob %d\0" % os.fstat(fh.fileno()).st_size)
+        buf = bytearray(_HASH_CHUNK)
+        view = memoryview(buf)
+        while True:
+            n = fh.readinto(buf)
+            if not n:
+                break
+            sha.update(view[:n])
+    return sha.hexdigest()
+
+
+def _try_hash_file(path: str) -> Optional[str]:
+    try:
+        return _hash_file(path)
+    except OSError:
+        return None
+
+
+def _hash_length(n_commits: int) -> int:
+    """Short-hash length that keeps n_commits abbreviations unambiguous."""
+    if n_commits <= 1:
+        return 5
+    return max(5, int(math.ceil(math.log(n_commits) * math.log(math.e, 2) / 2)))
+
+
+# Which commits verbose mode collects trees for: "all", "head", "tips", or the N newest.
+TREE_SCOPES = ("all", "head", "tips")
+TreeScope = Union[str, int]
+
+
 # ---------------------------------------------------------------------------
 # Data transfer objects
 # ---------------------------------------------------------------------------
@@ -57,6 +144,8 @@ class CommitData:
     author: str = ""
     date_iso: str = ""
     tree_hexsha: Optional[str] = None  # populated in verbose mode
+    # False while short_message/author/date_iso are deferred; see RepoGraph.load_metadata()
+    metadata_loaded: bool = True
 
 
 @dataclass
@@ -69,6 +158,10 @@ class TreeData:
     child_tree_hexshas: list[str] = field(default_factory=list)
     blob_entries: list[tuple[str, str]] = field(default_factory=list)  # (name, hexsha)
     gitlink_entries: list[tuple[str, str]] = field(default_factory=list)  # (name, commit_hexsha)
+    # Delta mode: subtrees identical to the parent commit's, (name, hexsha), not expanded
+    unchanged_tree_entries: list[tuple[str, str]] = field(default_factory=list)
+    # Set instead of the entry lists for a tree over the fanout cap: (blobs, subtrees)
+    summary: Optional[tuple[int, int]] = None
 
 
 @dataclass
@@ -146,6 +239,70 @@ class RepoGraph:
     head_branch_path: Optional[str]  # branch ref path when not detached
     is_detached: bool
     hash_length: int
+    # Commits that lost some or all parents at a --since/--max-count cut edge
+    truncated: set[str] = field(default_factory=set)
+    # Shallow-clone boundary commits (listed in .git/shallow); their parents were never fetched
+    shallow: set[str] = field(default_factory=set)
+    # Fills in deferred commit metadata; set by GitRepo when built with lazy_metadata=True
+    metadata_loader: Optional[Callable[[list[CommitData]], None]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def load_metadata(self, hexshas: Iterable[str]) -> None:
+        """Load deferred message/author/date for the given commits in one batch."""
+        if self.metadata_loader is None:
+            return
+        pending = [self.commits[h] for h in hexshas if h in self.commits]
+        pending = [cd for cd in pending if not cd.metadata_loaded]
+        if pending:
+            self.metadata_loader(pending)
+
+
+@dataclass
+class CommitStream:
+    """Incremental traversal result returned by GitRepo.stream_graph().
+
+    Everything but the commits is known up front.  Iterating yields each
+    commit once, children before parents, so a commit's children set is
+    already complete when it arrives; commits are read from git as the
+    consumer asks for them and none are retained here.
+    """
+
+    refs: list[RefInfo]  # HEAD first, then branches, tags, remotes
+    head_branch_path: Optional[str]
+    is_detached: bool
+    hash_length: int
+    shallow: set[str] = field(default_factory=set)  # everything listed in .git/shallow
+    commits: Iterator[CommitData] = field(default_factory=lambda: iter(()), repr=False)
+
+    def __iter__(self) -> Iterator[CommitData]:
+        return self.commits
+
+
+@dataclass
+class RefFilter:
+    """Which branches, tags and remote branches a traversal starts from.
+
+    include and exclude are fnmatch globs on full ref paths, e.g.
+    ``refs/remotes/origin/*`` (``*`` also matches ``/``).  A ref is kept if it
+    matches an include pattern (or none are given) and no exclude pattern, its
+    tip was committed within the last stale_days days, and -- for branches and
+    remote branches -- its tip is not already reachable from merged_into
+    (other than the merged_into branch itself).  The checked-out branch is
+    always kept; HEAD, FETCH_HEAD, the special heads and stashes are never
+    filtered.
+    """
+
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    stale_days: Optional[float] = None
+    merged_into: Optional[str] = None
+
+    def matches(self, path: str) -> bool:
+        """Apply the include/exclude globs to a full ref path."""
+        if self.include and not any(fnmatch.fnmatchcase(path, p) for p in self.include):
+            return False
+        return not any(fnmatch.fnmatchcase(path, p) for p in self.exclude)
 
 
 # ---------------------------------------------------------------------------
@@ -154,28 +311,101 @@ class RepoGraph:
 
 
 class GitRepo:
-    """Wraps a git.Repo and provides the data model that GraphBuilder consumes."""
+    """Wraps a git.Repo and provides the data model that GraphBuilder consumes.
 
-    def __init__(self, repo_path: str) -> None:
+    backend names the ObjectBackend that reads single objects (see backends.py).
+    ref_filter drops branches, tags and remote branches before any history is
+    read (see RefFilter).  blob_hasher picks how modified working-tree files
+    are hashed: "python" (hashlib on a thread pool) or "git" (one
+    ``git hash-object --stdin-paths`` process).
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        use_cache: bool = True,
+        backend: str = DEFAULT_BACKEND,
+        ref_filter: Optional[RefFilter] = None,
+        blob_hasher: str = "python",
+    ) -> None:
         self.path = repo_path
+        self.ref_filter = ref_filter
+        self.blob_hasher = blob_hasher
+        self._objects: Optional[ObjectBackend] = None
+        self._gitdir: Optional[GitDir] = None
+        self._cache: Optional[ObjectCache] = None
+        self._shallow: Optional[set[str]] = None
+        self._commit_graph: Union[CommitGraph, bool, None] = None  # False: none usable
+        self._commit_dates: dict[str, int] = {}  # committer dates learned from refs
+        self._known_commits: dict[str, bool] = {}  # existence checks (see _check_commits)
+        # Ref prefixes -> (ref file snapshot, for-each-ref records); see _ref_records.
+        self._ref_listings: dict[tuple[str, ...], tuple[dict[str, str], list[RefRecord]]] = {}
+        # (ref prefixes, target) -> (ref file snapshot, paths merged into target).
+        self._merged_listings: dict[tuple[tuple[str, ...], str], tuple[dict, set[str]]] = {}
+        # Working-tree file -> ((mtime_ns, size, inode), blob SHA); see _compute_blob_hashes.
+        self._blob_hashes: dict[str, tuple[tuple[int, int, int], str]] = {}
         try:
             self._repo = git.Repo(repo_path)
             self.valid = not self._repo.bare
         except (git.InvalidGitRepositoryError, git.NoSuchPathError):
             self._repo = None
             self.valid = False
+        if self.valid:
+            self._objects = open_backend(backend, self._repo)
+            self._gitdir = GitDir(self._repo.git_dir, self._repo.common_dir)
+        # The object cache's directory, or None when there is none
+        self.cache_dir: Optional[str] = None
+        if self.valid and use_cache:
+            self.cache_dir = os.path.join(self._repo.common_dir, CACHE_DIRNAME)
+            self._cache = ObjectCache(self.cache_dir)
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
+    def reload(self) -> None:
+        """Forget what may have changed since the last render; keep what cannot.
+
+        A GitRepo can serve every render of a monitor session.  The shallow
+        list, the commit-graph file and commits found missing are re-read on
+        next use; object lookups that succeeded, the object cache, the
+        working-tree hash cache and the ref listings (checked against the ref
+        files on every use) are kept.
+        """
+        self._shallow = None
+        if isinstance(self._commit_graph, CommitGraph):
+            self._commit_graph.close()
+        self._commit_graph = None
+        self._commit_dates = {}
+        self._known_commits = {h: True for h, known in self._known_commits.items() if known}
+
     def build_graph(
         self,
         max_depth: Optional[int] = None,
         exclude_remotes: bool = False,
         include_trees: bool = False,
+        lazy_metadata: bool = False,
+        since: Optional[str] = None,
+        max_count: Optional[int] = None,
+        tree_scope: TreeScope = "all",
+        tree_delta: bool = False,
+        tree_path: Optional[str] = None,
+        max_tree_entries: Optional[int] = None,
     ) -> RepoGraph:
-        """Traverse the repo and return a complete graph snapshot."""
+        """Traverse the repo and return a complete graph snapshot.
+
+        With lazy_metadata=True, commit messages, authors and dates are not read
+        during traversal; call RepoGraph.load_metadata() for the commits that are
+        actually displayed.  since (any date git understands, e.g. "90 days
+        ago") and max_count keep only the newest commits by committer date;
+        refs whose tips fall outside that window are left out.  With
+        include_trees, tree_scope picks the commits whose trees are collected:
+        "all", "head", "tips" (every ref tip) or an int N (the N newest).
+        tree_delta=True expands only what changed from each commit's first
+        parent, tree_path ("src/service-a") only that subtree and the trees
+        leading to it, and a tree with more than max_tree_entries entries is
+        only counted (see _collect_trees).
+        """
         if not self.valid:
             return RepoGraph(
                 commits={},
@@ -187,14 +417,7 @@ class GitRepo:
                 hash_length=5,
             )
 
-        repo = self._repo
-
-        # HEAD state
-        is_detached = repo.head.is_detached
-        try:
-            head_branch_path = None if is_detached else repo.head.ref.path
-        except Exception:
-            head_branch_path = None
+        is_detached, head_branch_path = self._head_state()
 
         refs = self._collect_refs(exclude_remotes, include_stash=include_trees)
         if not refs:
@@ -208,13 +431,28 @@ class GitRepo:
                 hash_length=5,
             )
 
-        commits, trees, blobs = self._bfs_commits(refs, max_depth, include_trees)
+        # A narrower scope, delta or path collects its trees once the commits are known.
+        scoped = include_trees and (
+            tree_scope != "all" or tree_delta or bool(tree_path) or max_tree_entries is not None
+        )
+        walk_trees = include_trees and not scoped
+        truncated: set[str] = set()
+        if since is not None or max_count is not None:
+            commits, trees, blobs, truncated = self._walk_by_date(
+                refs, since, max_count, max_depth, walk_trees, lazy_metadata
+            )
+            refs = [ref for ref in refs if ref.commit_hexsha in commits]
+        else:
+            commits, trees, blobs = self._bfs_commits(refs, max_depth, walk_trees, lazy_metadata)
+        if scoped:
+            self._apply_tree_scope(
+                tree_scope, commits, refs, trees, blobs, tree_delta, tree_path, max_tree_entries
+            )
+        if self._cache is not None:
+            self._cache.flush()
         self._build_children(commits)
         self._attribute_refs(commits, refs)
 
-        n = len(commits)
-        hash_length = max(5, int(math.ceil(math.log(n) * math.log(math.e, 2) / 2))) if n > 1 else 5
-
         return RepoGraph(
             commits=commits,
             trees=trees,
@@ -222,8 +460,141 @@ class GitRepo:
             refs=refs,
             head_branch_path=head_branch_path,
             is_detached=is_detached,
-            hash_length=hash_length,
+            hash_length=_hash_length(len(commits)),
+            truncated=truncated,
+            shallow={h for h in self._shallow_hexshas() if h in commits},
+            metadata_loader=self._load_metadata if lazy_metadata else None,
+        )
+
+    def refresh_graph(
+        self,
+        graph: RepoGraph,
+        max_depth: Optional[int] = None,
+        exclude_remotes: bool = False,
+        include_trees: bool = False,
+        lazy_metadata: bool = False,
+        since: Optional[str] = None,
+        max_count: Optional[int] = None,
+        tree_scope: TreeScope = "all",
+        tree_delta: bool = False,
+        tree_path: Optional[str] = None,
+        max_tree_entries: Optional[int] = None,
+    ) -> RepoGraph:
+        """Bring a graph from an earlier build_graph() up to date, in place.
+
+        Only commits that became reachable since graph was built are traversed;
+        commits no longer reachable from any ref are dropped, and children, refs
+        and hash_length are patched.  The arguments must match the ones graph
+        was built with.  Falls back to a full build_graph() whenever a patched
+        graph could differ from a rebuilt one: depth-, date- and count-limited
+        walks (the window moves with the tips and the clock), shallow clones (the
+        boundary moves when the clone is deepened) and empty graphs.
+        """
+        rebuild_args = (
+            max_depth,
+            exclude_remotes,
+            include_trees,
+            lazy_metadata,
+            since,
+            max_count,
+            tree_scope,
+            tree_delta,
+            tree_path,
+            max_tree_entries,
+        )
+        bounded = max_depth is not None or since is not None or max_count is not None
+        if not self.valid or bounded or not graph.commits or self._shallow_hexshas():
+            return self.build_graph(*rebuild_args)
+
+        is_detached, head_branch_path = self._head_state()
+        refs = self._collect_refs(exclude_remotes, include_stash=include_trees)
+        if not refs:
+            return self.build_graph(*rebuild_args)
+
+        commits = graph.commits
+        old_tips = {ref.commit_hexsha for ref in graph.refs if ref.commit_hexsha in commits}
+        new_tips = list(dict.fromkeys(ref.commit_hexsha for ref in refs))
+        try:
+            added = self._walk_new_commits(new_tips, old_tips, commits, not lazy_metadata)
+            removed_tips = old_tips.difference(new_tips)
+            dropped: set[str] = set()
+            if removed_tips:
+                revs = list(removed_tips) + [f"^{h}" for h in new_tips]
+                dropped = set(iter_rev_list(self._repo.git_dir, revs))
+        except (OSError, GitCommandError) as exc:
+            log.warning("Incremental refresh failed, rebuilding: %s", exc)
+            return self.build_graph(*rebuild_args)
+
+        for ref in graph.refs:
+            if ref.commit_hexsha in commits:
+                commits[ref.commit_hexsha].refs = []
+
+        for hexsha in dropped:
+            cd = commits.pop(hexsha, None)
+            if cd is None:
+                continue
+            for parent_hexsha in cd.parents:
+                if parent_hexsha in commits:
+                    commits[parent_hexsha].children.discard(hexsha)
+
+        trees, blobs = graph.trees, graph.blobs
+        scoped = include_trees and (
+            tree_scope != "all" or tree_delta or bool(tree_path) or max_tree_entries is not None
+        )
+        for rec in added:
+            commits[rec.hexsha] = self._make_commit_data(
+                rec, include_trees and not scoped, trees, blobs
+            )
+        for rec in added:
+            cd = commits[rec.hexsha]
+            cd.parents = [p for p in cd.parents if p in commits]
+            for parent_hexsha in cd.parents:
+                commits[parent_hexsha].children.add(rec.hexsha)
+
+        if include_trees and dropped:
+            self._prune_trees(commits, trees, blobs)
+        if scoped:
+            self._apply_tree_scope(
+                tree_scope, commits, refs, trees, blobs, tree_delta, tree_path, max_tree_entries
+            )
+        if self._cache is not None:
+            self._cache.mark_closed(h for h in new_tips if h in commits)
+            self._cache.flush()
+        self._attribute_refs(commits, refs)
+
+        graph.refs = refs
+        graph.head_branch_path = head_branch_path
+        graph.is_detached = is_detached
+        graph.hash_length = _hash_length(len(commits))
+        graph.metadata_loader = self._load_metadata if lazy_metadata else None
+        return graph
+
+    def stream_graph(self, exclude_remotes: bool = False, metadata: bool = False) -> CommitStream:
+        """Start a full-history traversal whose commits are consumed as git emits them.
+
+        Unlike build_graph(), nothing waits for the whole history: commits come
+        from one ``git log --topo-order`` pipe, with their refs attached and
+        children counted on the way, and only the not-yet-seen parents of
+        commits already yielded are held.  hash_length is estimated before the
+        walk (from the commit-graph, else the object count), so it is never
+        shorter than build_graph() would choose.  With metadata=False commits
+        carry structure only.  The object cache is not consulted.
+        """
+        if not self.valid:
+            return CommitStream(refs=[], head_branch_path=None, is_detached=False, hash_length=5)
+        is_detached, head_branch_path = self._head_state()
+        refs = self._collect_refs(exclude_remotes)
+        tips = list(dict.fromkeys(ref.commit_hexsha for ref in refs))
+        stream = CommitStream(
+            refs=refs,
+            head_branch_path=head_branch_path,
+            is_detached=is_detached,
+            hash_length=_hash_length(self._estimate_commit_count()) if tips else 5,
+            shallow=self._shallow_hexshas(),
         )
+        if tips:
+            stream.commits = self._stream_commits(tips, refs, metadata)
+        return stream
 
     def get_index_state(self) -> IndexState:
         """Return staged, unstaged, and untracked file info."""
@@ -231,28 +602,30 @@ class GitRepo:
             return IndexState(staged=[], unstaged=[], untracked=[])
 
         repo = self._repo
-        staged: list[StagedFile] = []
         unstaged: list[UnstagedFile] = []
 
         # Staged: index vs HEAD commit
-        try:
-            head_commit = repo.head.commit
-            for diff in repo.index.diff(head_commit):
-                path = diff.b_path or diff.a_path
-                hexsha = diff.b_blob.hexsha if diff.b_blob else "0" * 40
-                staged.append(StagedFile(path=path, hexsha=hexsha))
-        except ValueError:
-            # Empty repo: every index entry is staged
-            for (path, _stage), entry in repo.index.entries.items():
-                staged.append(StagedFile(path=path, hexsha=entry.hexsha))
-        except Exception as exc:
-            log.warning("Could not compute staged diff: %s", exc)
+        staged = self._read_staged_files()
+        if staged is None:
+            staged = []
+            try:
+                head_commit = repo.head.commit
+                # Diffing the index against a commit puts the index on the "a" side.
+                for diff in repo.index.diff(head_commit):
+                    path = diff.a_path or diff.b_path
+                    hexsha = diff.a_blob.hexsha if diff.a_blob else NULL_SHA
+                    staged.append(StagedFile(path=path, hexsha=hexsha))
+            except ValueError:
+                # Empty repo: every index entry is staged
+                for (path, _stage), entry in repo.index.entries.items():
+                    staged.append(StagedFile(path=path, hexsha=entry.hexsha))
+            except Exception as exc:
+                log.warning("Could not compute staged diff: %s", exc)
 
         # Unstaged: working tree vs index
         try:
-            for diff in repo.index.diff(None):
-                path = diff.a_path
-                ws_hexsha = self._compute_blob_hash(path)
+            paths = [diff.a_path for diff in repo.index.diff(None)]
+            for path, ws_hexsha in zip(paths, self._compute_blob_hashes(paths)):
                 unstaged.append(UnstagedFile(path=path, workspace_hexsha=ws_hexsha))
         except Exception as exc:
             log.warning("Could not compute unstaged diff: %s", exc)
@@ -274,65 +647,51 @@ class GitRepo:
                 head_commit=None,
             )
 
-        repo = self._repo
         nodes: list[BranchNode] = []
 
-        try:
-            head_branch = None if repo.head.is_detached else repo.head.ref.name
-            head_commit = repo.head.commit.hexsha if repo.head.is_detached else None
-        except Exception:
-            head_branch = None
-            head_commit = None
+        head = self._gitdir.head()
+        head_branch = None if head.is_detached else _short_ref_name(head.symref)
+        head_commit = head.hexsha if head.is_detached else None
 
         worktree_map = self._collect_worktree_map()
+        branches, tags, remotes = self._list_refs(exclude_remotes)
 
-        for branch in repo.branches:
-            try:
-                nodes.append(
-                    BranchNode(
-                        name=branch.name,
-                        path=branch.path,
-                        commit_hexsha=branch.commit.hexsha,
-                        is_head=(head_branch == branch.name),
-                        worktree_path=worktree_map.get(branch.name),
-                    )
+        for name, rec in branches:
+            nodes.append(
+                BranchNode(
+                    name=name,
+                    path=rec.path,
+                    commit_hexsha=rec.commit_hexsha,
+                    is_head=(head_branch == name),
+                    worktree_path=worktree_map.get(name),
                 )
-            except Exception:
-                pass
-
-        if not exclude_remotes:
-            try:
-                for rref in repo.remote_refs:
-                    try:
-                        nodes.append(
-                            BranchNode(
-                                name=rref.name,
-                                path=rref.path,
-                                commit_hexsha=rref.commit.hexsha,
-                                is_remote=True,
-                            )
-                        )
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+            )
 
-        for tag in repo.tags:
-            try:
+        for name, rec in remotes:
+            if rec.symref is None:  # origin/HEAD only aliases another remote branch
                 nodes.append(
                     BranchNode(
-                        name=tag.name,
-                        path=tag.path,
-                        commit_hexsha=tag.commit.hexsha,
-                        is_tag=True,
+                        name=name,
+                        path=rec.path,
+                        commit_hexsha=rec.commit_hexsha,
+                        is_remote=True,
                     )
                 )
-            except Exception:
-                pass
 
-        for sha, label in self._collect_stash_entries():
-            try:
-                repo.commit(sha)
+        for name, rec in tags:
+            nodes.append(
+                BranchNode(
+                    name=name,
+                    path=rec.path,
+                    commit_hexsha=rec.commit_hexsha,
+                    is_tag=True,
+                )
+            )
+
+        stash_entries = self._collect_stash_entries()
+        self._check_commits(self._state_candidates(stash_entries))
+        for sha, label in stash_entries:
+            if self._is_commit(sha):
                 nodes.append(
                     BranchNode(
                         name=label,
@@ -340,8 +699,6 @@ class GitRepo:
                         commit_hexsha=sha,
                     )
                 )
-            except Exception:
-                pass
 
         # FETCH_HEAD
         fh_sha = self._read_fetch_head()
@@ -367,131 +724,96 @@ class GitRepo:
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _read_staged_files(self) -> Optional[list[StagedFile]]:
+        """Compare the index with HEAD's tree natively; None if GitPython must do it."""
+        gitdir = self._gitdir
+        if not gitdir.has_files_backend:
+            return None
+        try:
+            index = gitdir.index()
+            if index is None:
+                return []
+            head = gitdir.head().hexsha
+            head_tree = None
+            if head is not None:
+                records: dict[str, CommitRecord] = {}
+                self._resolve_commit_records([head], records, walk=False, metadata=False)
+                if head not in records:
+                    return None
+                head_tree = records[head].tree_hexsha
+            changes = staged_changes(index, head_tree, self._read_tree_entries)
+        except Exception as exc:
+            log.debug("Cannot compare the index natively: %s", exc)
+            return None
+        return [StagedFile(path=path, hexsha=hexsha) for path, hexsha in changes]
+
+    def _head_state(self) -> tuple[bool, Optional[str]]:
+        """Return (is_detached, head_branch_path)."""
+        head = self._gitdir.head()
+        return head.is_detached, head.symref
+
     def _collect_stash_entries(self) -> list[tuple[str, str]]:
         """Return [(sha, 'stash@{N}'), ...] newest-first from the stash reflog."""
-        import os
-
-        reflog_path = os.path.join(self._repo.git_dir, "logs", "refs", "stash")
-        try:
-            with open(reflog_path) as fh:
-                lines = [ln for ln in fh.read().splitlines() if ln.strip()]
-        except OSError:
-            return []
-        entries = []
-        for i, line in enumerate(reversed(lines)):
-            parts = line.split()
-            if len(parts) < 2:
-                continue
-            sha = parts[1]
-            if len(sha) >= 40 and all(c in "0123456789abcdefABCDEF" for c in sha):
-                entries.append((sha, f"stash@{{{i}}}"))
-        return entries
+        return [(sha, f"stash@{{{i}}}") for i, sha in enumerate(self._gitdir.stash_entries())]
 
     def _collect_worktree_map(self) -> dict[str, str]:
         """Return {branch_name: worktree_path} for linked worktrees (excludes the main worktree)."""
-        try:
-            output = self._repo.git.worktree("list", "--porcelain")
-        except Exception:
-            return {}
-
-        # Parse blank-line-separated blocks
-        blocks: list[dict[str, str]] = []
-        current: dict[str, str] = {}
-        for line in output.splitlines():
-            if line == "":
-                if current:
-                    blocks.append(current)
-                    current = {}
-            elif " " in line:
-                key, _, val = line.partition(" ")
-                current[key] = val
-        if current:
-            blocks.append(current)
-
-        # First block is the main worktree — skip it; collect branch->path for the rest
         result = {}
-        for block in blocks[1:]:
-            path = block.get("worktree", "")
-            branch_ref = block.get("branch", "")
-            if branch_ref.startswith("refs/heads/") and path:
-                result[branch_ref[len("refs/heads/") :]] = path
+        for worktree in self._gitdir.worktrees():
+            branch_ref = worktree.head.symref or ""
+            if branch_ref.startswith("refs/heads/") and worktree.path:
+                result[branch_ref[len("refs/heads/") :]] = worktree.path
         return result
 
     def _collect_refs(self, exclude_remotes: bool, include_stash: bool = False) -> list[RefInfo]:
         """Return refs in traversal order: HEAD, branches, tags, remotes."""
-        repo = self._repo
         refs: list[RefInfo] = []
         seen: set[str] = set()
 
         # HEAD (always first)
-        try:
-            head_commit = repo.head.commit
-        except ValueError:
+        head_hexsha = self._gitdir.head().hexsha
+        if head_hexsha is None:
             return []  # empty repo with no commits yet
 
         refs.append(
             RefInfo(
                 path="HEAD",
                 name="HEAD",
-                commit_hexsha=head_commit.hexsha,
+                commit_hexsha=head_hexsha,
                 is_head=True,
             )
         )
         seen.add("HEAD")
 
+        branches, tags, remotes = self._list_refs(exclude_remotes)
+
         # Local branches
-        for branch in repo.branches:
-            if branch.path not in seen:
-                seen.add(branch.path)
-                try:
-                    refs.append(
-                        RefInfo(
-                            path=branch.path,
-                            name=branch.name,
-                            commit_hexsha=branch.commit.hexsha,
-                            is_branch=True,
-                        )
-                    )
-                except Exception:
-                    pass
+        for name, rec in branches:
+            refs.append(
+                RefInfo(path=rec.path, name=name, commit_hexsha=rec.commit_hexsha, is_branch=True)
+            )
 
         # Tags
-        for tag in repo.tags:
-            if tag.path not in seen:
-                seen.add(tag.path)
-                try:
-                    is_annotated = isinstance(tag.object, git.TagObject)
-                    refs.append(
-                        RefInfo(
-                            path=tag.path,
-                            name=tag.name,
-                            commit_hexsha=tag.commit.hexsha,
-                            is_tag=True,
-                            tag_object_hexsha=tag.object.hexsha if is_annotated else None,
-                        )
-                    )
-                except Exception:
-                    pass
+        for name, rec in tags:
+            refs.append(
+                RefInfo(
+                    path=rec.path,
+                    name=name,
+                    commit_hexsha=rec.commit_hexsha,
+                    is_tag=True,
+                    tag_object_hexsha=rec.hexsha if rec.object_type == "tag" else None,
+                )
+            )
 
         # Remote refs
-        if not exclude_remotes:
-            try:
-                for rref in git.RemoteReference.list_items(repo):
-                    if rref.path not in seen:
-                        seen.add(rref.path)
-                        try:
-                            refs.append(
-                                RefInfo(
-                                    path=rref.path,
-                                    name=rref.name,
-                                    commit_hexsha=rref.commit.hexsha,
-                                    is_remote=True,
-                                )
-                            )
-                        except Exception:
-                            pass
-            except Exception:
-                pass
+        for name, rec in remotes:
+            refs.append(
+                RefInfo(path=rec.path, name=name, commit_hexsha=rec.commit_hexsha, is_remote=True)
+            )
+        seen.update(ref.path for ref in refs)
+
+        stash_entries = self._collect_stash_entries() if include_stash else []
+        self._check_commits(self._state_candidates(stash_entries))
 
         # FETCH_HEAD — present after any git fetch/pull
         fh_sha = self._read_fetch_head()
@@ -506,7 +828,7 @@ class GitRepo:
             )
 
         # ORIG_HEAD / MERGE_HEAD / CHERRY_PICK_HEAD / BISECT_HEAD
-        for special_name in ("ORIG_HEAD", "MERGE_HEAD", "CHERRY_PICK_HEAD", "BISECT_HEAD"):
+        for special_name in SPECIAL_HEADS:
             sp_sha = self._read_simple_ref(special_name)
             if sp_sha and special_name not in seen:
                 seen.add(special_name)
@@ -518,134 +840,677 @@ class GitRepo:
                     )
                 )
 
-        if include_stash:
-            for sha, label in self._collect_stash_entries():
-                path = f"stash/{label}"
-                if path not in seen:
-                    seen.add(path)
-                    try:
-                        repo.commit(sha)
-                        refs.append(
-                            RefInfo(
-                                path=path,
-                                name=label,
-                                commit_hexsha=sha,
-                            )
-                        )
-                    except Exception:
-                        pass
+        for sha, label in stash_entries:
+            path = f"stash/{label}"
+            if path not in seen and self._is_commit(sha):
+                seen.add(path)
+                refs.append(
+                    RefInfo(
+                        path=path,
+                        name=label,
+                        commit_hexsha=sha,
+                    )
+                )
 
         return refs
 
+    def _list_refs(self, exclude_remotes: bool) -> tuple[list[tuple[str, RefRecord]], ...]:
+        """Return (branches, tags, remotes) as (short name, RefRecord) pairs, sorted by path.
+
+        All three come from one ``for-each-ref`` pass.  Refs that do not peel
+        to a commit are dropped, and the committer dates it reports are kept
+        for _committed_date().  The pass is reused by this GitRepo for as long
+        as the ref files read natively by GitDir still name the same objects.
+        """
+        prefixes = ["refs/heads/", "refs/tags/"]
+        if not exclude_remotes:
+            prefixes.append("refs/remotes/")
+        groups: dict[str, list[tuple[str, RefRecord]]] = {p: [] for p in prefixes}
+        records = self._ref_records(tuple(prefixes))
+        for rec in records:
+            if rec.commit_hexsha is None and rec.object_type == "tag":
+                # A tag of a tag; the listing is shared, so peel into a copy.
+                peeled = self._objects.peel_to_commit(rec.hexsha)
+                rec = dataclasses.replace(rec, commit_hexsha=peeled)
+            if rec.commit_hexsha is None:
+                log.debug("Skipping %s: not a commit", rec.path)
+                continue
+            if rec.committed_date is not None:
+                self._commit_dates[rec.commit_hexsha] = rec.committed_date
+            prefix = next(p for p in prefixes if rec.path.startswith(p))
+            groups[prefix].append((rec.path[len(prefix) :], rec))
+        if self.ref_filter is not None:
+            keep = self._select_refs(self.ref_filter, [r for g in groups.values() for _, r in g])
+            groups = {p: [(n, r) for n, r in g if r.path in keep] for p, g in groups.items()}
+        return (
+            groups["refs/heads/"],
+            groups["refs/tags/"],
+            groups.get("refs/remotes/", []),
+        )
+
+    def _select_refs(self, ref_filter: RefFilter, records: list[RefRecord]) -> set[str]:
+        """Return the paths of the records ref_filter keeps.
+
+        Globs and dates need nothing beyond the ref listing; merged status is
+        one ``for-each-ref --merged`` call, so no history is walked here.
+        """
+        head_branch = self._gitdir.head().symref
+        keep = [r for r in records if r.path == head_branch or ref_filter.matches(r.path)]
+        if ref_filter.stale_days is not None:
+            self._load_commit_dates(r.commit_hexsha for r in keep)
+            cutoff = time.time() - ref_filter.stale_days * 86400
+            keep = [
+                r
+                for r in keep
+                if r.path == head_branch or self._committed_date(r.commit_hexsha) >= cutoff
+            ]
+        if ref_filter.merged_into:
+            target = ref_filter.merged_into
+            # The target is merged into itself; keep it along with the checked-out branch.
+            kept = {head_branch, target, f"refs/heads/{target}", f"refs/remotes/{target}"}
+            merged = self._merged_refs(target, ("refs/heads/", "refs/remotes/")) - kept
+            keep = [r for r in keep if r.path not in merged]
+        return {r.path for r in keep}
+
+    def _merged_refs(self, target: str, prefixes: tuple[str, ...]) -> set[str]:
+        """Return the refs under prefixes already merged into target, cached like _ref_records."""
+        gitdir = self._gitdir
+        snapshot = None
+        if gitdir.has_files_backend:  # target may be any ref, or HEAD
+            snapshot = {**gitdir.refs(("refs/",)), "HEAD": gitdir.head().hexsha}
+        key = (prefixes, target)
+        hit = self._merged_listings.get(key)
+        if snapshot is not None and hit is not None and hit[0] == snapshot:
+            return hit[1]
+        try:
+            merged = list_merged_refs(self._repo.git_dir, target, [p.rstrip("/") for p in prefixes])
+        except (OSError, GitCommandError) as exc:
+            log.warning("Cannot tell which refs are merged into %s: %s", target, exc)
+            return set()
+        if snapshot is not None:
+            self._merged_listings[key] = (snapshot, merged)
+        return merged
+
+    def _ref_records(self, prefixes: tuple[str, ...]) -> list[RefRecord]:
+        gitdir = self._gitdir
+        snapshot = gitdir.refs(prefixes) if gitdir.has_files_backend else None
+        hit = self._ref_listings.get(prefixes)
+        if snapshot is not None and hit is not None and hit[0] == snapshot:
+            return hit[1]
+        try:
+            records = self._read_ref_records(prefixes, packed_tags=snapshot is not None)
+        except (OSError, GitCommandError) as exc:
+            log.warning("Cannot list refs: %s", exc)
+            return []
+        if snapshot is not None:
+            self._ref_listings[prefixes] = (snapshot, records)
+        return records
+
+    def _read_ref_records(self, prefixes: tuple[str, ...], packed_tags: bool) -> list[RefRecord]:
+        """List the refs under prefixes, peeling packed tags from packed-refs.
+
+        for-each-ref inflates every annotated tag object to report its peeled
+        commit, but packed-refs already stores that commit on the tag's ``^``
+        line.  With packed_tags, the tags in packed-refs are built from those
+        lines (see packed_ref_records) and for-each-ref lists the rest; the
+        records are the same either way, except that packed tags carry no
+        committed_date.
+        """
+        git_dir = self._repo.git_dir
+        patterns = [p.rstrip("/") for p in prefixes]
+        packed = self._gitdir.packed_refs() if packed_tags else None
+        if packed is None or "refs/tags/" not in prefixes or not packed.tags_peeled:
+            return list_refs(git_dir, patterns)
+        loose = self._gitdir.loose_refs("refs/tags/")
+        if len(loose) > _MAX_REF_PATTERNS:
+            return list_refs(git_dir, patterns)
+        tags = [
+            (path, hexsha, packed.peeled.get(path))
+            for path, hexsha in packed.refs.items()
+            if path.startswith("refs/tags/") and path not in loose
+        ]
+        # Loose tags are named one by one so for-each-ref skips the packed ones.
+        patterns = [p for p in patterns if p != "refs/tags"] + sorted(loose)
+        records = list_refs(git_dir, patterns) + packed_ref_records(git_dir, tags)
+        return sorted(records, key=lambda rec: rec.path)
+
+    def _state_candidates(self, stash_entries: list[tuple[str, str]]) -> list[str]:
+        """Return the SHAs named by FETCH_HEAD, the special heads and stash_entries."""
+        candidates = [self._gitdir.fetch_head()]
+        candidates.extend(self._gitdir.special_head(name) for name in SPECIAL_HEADS)
+        candidates.extend(sha for sha, _ in stash_entries)
+        return [sha for sha in candidates if sha]
+
+    def _check_commits(self, hexshas: Iterable[str]) -> None:
+        """Look up every not-yet-checked SHA with one ObjectBackend.has_commits() call."""
+        todo = [h for h in dict.fromkeys(hexshas) if h not in self._known_commits]
+        if todo:
+            found = self._objects.has_commits(todo)
+            self._known_commits.update((h, h in found) for h in todo)
+
+    def _is_commit(self, hexsha: str) -> bool:
+        if hexsha not in self._known_commits:
+            self._check_commits([hexsha])
+        return self._known_commits[hexsha]
+
     def _read_fetch_head(self) -> Optional[str]:
         """Return the commit SHA from .git/FETCH_HEAD, or None if absent/invalid."""
-        path = os.path.join(self._repo.git_dir, "FETCH_HEAD")
-        try:
-            with open(path) as fh:
-                sha = fh.readline().split("\t")[0].strip()
-            # Validate: must look like a hex SHA and resolve to a real commit
-            if len(sha) >= 40 and all(c in "0123456789abcdefABCDEF" for c in sha):
-                self._repo.commit(sha)  # raises if not in object store
-                return sha
-        except Exception:
-            pass
-        return None
+        sha = self._gitdir.fetch_head()
+        return sha if sha and self._is_commit(sha) else None
 
     def _read_simple_ref(self, name: str) -> Optional[str]:
         """Return the commit SHA from .git/<name>, or None if absent/invalid."""
-        path = os.path.join(self._repo.git_dir, name)
-        try:
-            with open(path) as fh:
-                sha = fh.readline().strip()
-            if len(sha) >= 40 and all(c in "0123456789abcdefABCDEF" for c in sha):
-                self._repo.commit(sha)  # raises if not in object store
-                return sha
-        except Exception:
-            pass
-        return None
+        sha = self._gitdir.special_head(name)
+        return sha if sha and self._is_commit(sha) else None
 
     def _bfs_commits(
         self,
         refs: list[RefInfo],
         max_depth: Optional[int],
         include_trees: bool,
+        lazy_metadata: bool = False,
     ) -> tuple[dict[str, CommitData], dict[str, TreeData], dict[str, BlobData]]:
-        """Multi-source BFS from all ref tips; returns commit/tree/blob dicts."""
-        repo = self._repo
+        """Multi-source BFS from all ref tips; returns commit/tree/blob dicts.
+
+        Parents come from git's commit-graph file when the repo has one, and
+        otherwise from the object cache or streamed ``git log`` records, rather
+        than one backend object read per commit.  Without a depth limit, everything
+        the cache and commit-graph lack is read from a single pipe.
+
+        max_depth is a budget per ref: each tip gets its own window of commits
+        within max_depth parent hops, and the result is the union of those
+        windows.  The BFS advances every tip one level at a time, so a commit is
+        first reached at its distance from the *nearest* tip; which ref gets
+        there first cannot shrink another ref's window, and history shared by
+        several windows is read once.  Each level's misses are read as one
+        batch from a single long-running ``git cat-file --batch`` process, so
+        nothing beyond the cut-off is read and the process count does not grow
+        with depth.  Metadata still missing after the walk is fetched in one
+        batch at the end, unless lazy_metadata defers it.
+        """
         commits: dict[str, CommitData] = {}
         trees: dict[str, TreeData] = {}
         blobs: dict[str, BlobData] = {}
+        records: dict[str, CommitRecord] = {}
+        cg = self._open_commit_graph()
+        shallow = self._shallow_hexshas()
+        metadata = not lazy_metadata
 
+        tips = list(dict.fromkeys(ref.commit_hexsha for ref in refs))
         visited: set[str] = set()
-        queue: deque[tuple[git.Commit, int]] = deque()
+        order: list[str] = []
+        level = tips
+        depth = 0
+        reader: Optional[CatFileBatch] = None
+        try:
+            while level:
+                if max_depth is not None:
+                    # Structure only; metadata for the whole window is one batch below
+                    if reader is None:
+                        reader = CatFileBatch(self._repo.git_dir)
+                    uncovered = level if cg is None else [h for h in level if h not in cg]
+                    self._resolve_commit_records(uncovered, records, False, False, reader=reader)
+                elif cg is None:
+                    self._resolve_commit_records(level, records, walk=True, metadata=metadata)
+                elif depth == 0:
+                    # The commit-graph is closed under ancestry, so history below
+                    # any covered tip is covered too; stream only the rest.
+                    covered = [h for h in level if h in cg]
+                    uncovered = [h for h in level if h not in cg]
+                    self._resolve_commit_records(uncovered, records, True, metadata, covered)
+
+                next_level: list[str] = []
+                for hexsha in level:
+                    if hexsha in visited:
+                        continue
+                    rec = records.get(hexsha)
+                    if rec is None and cg is not None:
+                        parents = cg.parents(hexsha)
+                        if parents is not None:
+                            rec = CommitRecord(hexsha, parents, cg.tree(hexsha))
+                            records[hexsha] = rec
+                    if rec is None:
+                        # Missing object: an unresolvable ref tip or a commit outside
+                        # the local store.  Skip it so we don't produce phantom nodes.
+                        if depth == 0:
+                            log.warning("Cannot resolve ref tip %s", hexsha[:8])
+                        continue
+                    if hexsha in shallow and rec.parents:
+                        # A shallow boundary is a root: its parents were never fetched.
+                        # (git log already reports none; the raw object still lists them.)
+                        rec = records[hexsha] = dataclasses.replace(rec, parents=[])
+                    visited.add(hexsha)
+                    order.append(hexsha)
+
+                    if max_depth is None or depth < max_depth:
+                        next_level.extend(p for p in rec.parents if p not in visited)
+                level = next_level
+                depth += 1
+
+            if metadata:
+                self._resolve_commit_records(order, records, walk=False, metadata=True)
+        except (OSError, GitCommandError) as exc:
+            log.warning("Streamed traversal failed, walking objects instead: %s", exc)
+            return self._bfs_commit_objects(refs, max_depth, include_trees)
+        finally:
+            if reader is not None:
+                reader.close()
+
+        for hexsha in order:
+            commits[hexsha] = self._make_commit_data(records[hexsha], include_trees, trees, blobs)
+
+        if self._cache is not None and max_depth is None:
+            # Every commit reachable from the tips is now cached (or was already).
+            self._cache.mark_closed(h for h in tips if h in commits)
+
+        # Strip parent SHAs that aren't in commits — happens at max_depth
+        # cut-offs — so we don't produce dangling edges.
+        for cd in commits.values():
+            cd.parents = [p for p in cd.parents if p in commits]
 
-        for ref in refs:
-            hexsha = ref.commit_hexsha
-            if hexsha not in visited:
-                try:
-                    commit_obj = repo.commit(hexsha)
-                    queue.append((commit_obj, 0))
-                except Exception as exc:
-                    log.warning("Cannot resolve %s (%s): %s", ref.path, hexsha[:8], exc)
+        return commits, trees, blobs
 
-        while queue:
-            commit_obj, depth = queue.popleft()
+    def _walk_by_date(
+        self,
+        refs: list[RefInfo],
+        since: Optional[str],
+        max_count: Optional[int],
+        max_depth: Optional[int],
+        include_trees: bool,
+        lazy_metadata: bool = False,
+    ) -> tuple[dict[str, CommitData], dict[str, TreeData], dict[str, BlobData], set[str]]:
+        """Date-bounded traversal from all ref tips.
+
+        git's revision walker pops commits from a committer-date priority queue,
+        as plain ``git log`` does, and stops once max_count commits are out or
+        everything left is older than since, so nothing past the budget is read.
+        max_depth, if also given, further limits depth from the tips within that
+        window.  Besides the commit/tree/blob dicts, returns the commits that
+        lost parents at the cut edge.
+        """
+        commits: dict[str, CommitData] = {}
+        trees: dict[str, TreeData] = {}
+        blobs: dict[str, BlobData] = {}
+        records: dict[str, CommitRecord] = {}
+
+        tips = list(dict.fromkeys(ref.commit_hexsha for ref in refs))
+        try:
+            stream = iter_log_records(
+                self._repo.git_dir,
+                tips,
+                metadata=not lazy_metadata,
+                max_count=max_count,
+                since=since,
+            )
+            self._store_records(stream, records)
+        except (OSError, GitCommandError) as exc:
+            log.warning("Date-bounded traversal failed: %s", exc)
+            return commits, trees, blobs, set()
+
+        order = list(records)  # git's newest-first order
+        if max_depth is not None:
+            order = []
+            seen: set[str] = set()
+            level = tips
+            depth = 0
+            while level:
+                next_level: list[str] = []
+                for hexsha in level:
+                    if hexsha in seen or hexsha not in records:
+                        continue
+                    seen.add(hexsha)
+                    order.append(hexsha)
+                    if depth < max_depth:
+                        next_level.extend(records[hexsha].parents)
+                level = next_level
+                depth += 1
+
+        for hexsha in order:
+            commits[hexsha] = self._make_commit_data(records[hexsha], include_trees, trees, blobs)
+
+        truncated = set()
+        for hexsha, cd in commits.items():
+            kept = [p for p in cd.parents if p in commits]
+            if len(kept) != len(cd.parents):
+                truncated.add(hexsha)
+                cd.parents = kept
+        return commits, trees, blobs, truncated
+
+    def _open_commit_graph(self) -> Optional[CommitGraph]:
+        """Return the repo's commit-graph reader, or None if it can't be trusted.
+
+        Like git itself, ignore the file when grafts or a shallow boundary can
+        make the parents it records differ from the visible ones.  (Replace refs
+        need no check: plumbing runs git with --no-replace-objects.)
+        """
+        if self._commit_graph is False:
+            return None
+        if self._commit_graph is None:
+            self._commit_graph = False
+            common_dir = self._repo.common_dir
+            if self._shallow_hexshas() or os.path.exists(
+                os.path.join(common_dir, "info", "grafts")
+            ):
+                return None
+            cg = CommitGraph.open(os.path.join(common_dir, "objects"))
+            if cg is not None:
+                self._commit_graph = cg
+        return self._commit_graph or None
+
+    def _make_commit_data(
+        self,
+        rec: CommitRecord,
+        include_trees: bool,
+        trees: dict[str, TreeData],
+        blobs: dict[str, BlobData],
+    ) -> CommitData:
+        """Turn a commit record into CommitData, collecting its tree if asked."""
+        tree_hexsha: Optional[str] = None
+        if include_trees:
+            tree_hexsha = rec.tree_hexsha
+            try:
+                self._collect_tree(tree_hexsha, "", rec.hexsha, trees, blobs)
+            except Exception as exc:
+                log.debug("Cannot access tree for %s: %s", rec.hexsha[:8], exc)
+
+        return CommitData(
+            hexsha=rec.hexsha,
+            parents=list(rec.parents),
+            short_message=rec.short_message or "",
+            author=rec.author or "",
+            date_iso=rec.date_iso or "",
+            tree_hexsha=tree_hexsha,
+            metadata_loaded=rec.has_metadata,
+        )
+
+    def _load_metadata(self, cds: list[CommitData]) -> None:
+        """Fill in deferred metadata for cds (RepoGraph.metadata_loader)."""
+        records: dict[str, CommitRecord] = {}
+        try:
+            hexshas = [cd.hexsha for cd in cds]
+            self._resolve_commit_records(hexshas, records, walk=False, metadata=True)
+        except (OSError, GitCommandError) as exc:
+            log.warning("Cannot read commit metadata: %s", exc)
+        if self._cache is not None:
+            self._cache.flush()
+        for cd in cds:
+            rec = records.get(cd.hexsha)
+            if rec is not None and rec.has_metadata:
+                cd.short_message = rec.short_message
+                cd.author = rec.author
+                cd.date_iso = rec.date_iso
+            cd.metadata_loaded = True
+
+    def _walk_new_commits(
+        self,
+        tips: list[str],
+        known_tips: set[str],
+        commits: dict[str, CommitData],
+        metadata: bool,
+    ) -> list[CommitRecord]:
+        """Return records for commits reachable from tips but not in commits, in BFS order.
+
+        commits must be closed under ancestry from known_tips (as an unlimited
+        build_graph() result is), so git is asked only for ``tips --not known_tips``.
+        """
+        fresh = [h for h in tips if h not in commits]
+        if not fresh:
+            return []
+        records: dict[str, CommitRecord] = {}
+        revs = fresh + [f"^{h}" for h in known_tips]
+        stream = iter_log_records(self._repo.git_dir, revs, metadata=metadata)
+        self._store_records(stream, records)
+
+        added: list[CommitRecord] = []
+        seen: set[str] = set()
+        level = fresh
+        while level:
+            next_level: list[str] = []
+            for hexsha in level:
+                if hexsha in seen or hexsha in commits:
+                    continue
+                seen.add(hexsha)
+                rec = records.get(hexsha)
+                if rec is None:
+                    continue
+                added.append(rec)
+                next_level.extend(rec.parents)
+            level = next_level
+        return added
+
+    def _apply_tree_scope(
+        self,
+        tree_scope: TreeScope,
+        commits: dict[str, CommitData],
+        refs: list[RefInfo],
+        trees: dict[str, TreeData],
+        blobs: dict[str, BlobData],
+        tree_delta: bool = False,
+        tree_path: Optional[str] = None,
+        max_tree_entries: Optional[int] = None,
+    ) -> None:
+        """Give exactly the commits in tree_scope their trees, collecting only missing ones.
+
+        Commits that left the scope (after a refresh) lose their trees, which
+        are pruned unless another commit still shows them.  With tree_delta
+        each tree is collected as a delta against its first parent's; tree_path
+        and max_tree_entries limit what is collected (see _collect_trees).
+        """
+        scope = self._tree_scope_commits(tree_scope, commits, refs)
+        left = [cd for cd in commits.values() if cd.tree_hexsha and cd.hexsha not in scope]
+        for cd in left:
+            cd.tree_hexsha = None
+        todo = [h for h in scope if commits[h].tree_hexsha is None]
+        records: dict[str, CommitRecord] = {}
+        try:
+            self._resolve_commit_records(todo, records, walk=False, metadata=False)
+        except (OSError, GitCommandError) as exc:
+            log.warning("Cannot read commits for their trees: %s", exc)
+        found = [records[h] for h in todo if h in records]
+        for rec in found:
+            commits[rec.hexsha].tree_hexsha = rec.tree_hexsha
+        bases: dict[str, Optional[str]] = {}
+        if tree_delta:
+            firsts = [rec.parents[0] for rec in found if rec.parents]
+            try:
+                self._resolve_commit_records(firsts, records, walk=False, metadata=False)
+            except (OSError, GitCommandError) as exc:
+                log.warning("Cannot read parent commits for tree deltas: %s", exc)
+            for rec in found:
+                base = records.get(rec.parents[0]) if rec.parents else None
+                bases[rec.hexsha] = base.tree_hexsha if base else None
+        roots = [(rec.tree_hexsha, bases.get(rec.hexsha), "", rec.hexsha) for rec in found]
+        self._collect_trees(roots, trees, blobs, tree_path, max_tree_entries)
+        if left:
+            self._prune_trees(commits, trees, blobs)
+
+    def _tree_scope_commits(
+        self, tree_scope: TreeScope, commits: dict[str, CommitData], refs: list[RefInfo]
+    ) -> list[str]:
+        """Return the commits of tree_scope that are in commits, in display priority order."""
+        if tree_scope == "all":
+            hexshas = list(commits)
+        elif tree_scope == "head":
+            hexshas = [ref.commit_hexsha for ref in refs if ref.is_head]
+        elif tree_scope == "tips":
+            hexshas = [ref.commit_hexsha for ref in refs]
+        elif isinstance(tree_scope, int):
+            tips = list(dict.fromkeys(ref.commit_hexsha for ref in refs))
             try:
-                hexsha = commit_obj.hexsha
-            except Exception:
+                hexshas = list(iter_rev_list(self._repo.git_dir, tips, max_count=tree_scope))
+            except (OSError, GitCommandError) as exc:
+                log.warning("Cannot find the newest commits: %s", exc)
+                hexshas = []
+        else:
+            raise ValueError(f"unknown tree scope {tree_scope!r}")
+        return [h for h in dict.fromkeys(hexshas) if h in commits]
+
+    def _prune_trees(
+        self,
+        commits: dict[str, CommitData],
+        trees: dict[str, TreeData],
+        blobs: dict[str, BlobData],
+    ) -> None:
+        """Drop trees and blobs no longer reachable from any commit's root tree."""
+        live_trees: set[str] = set()
+        stack = [cd.tree_hexsha for cd in commits.values() if cd.tree_hexsha]
+        while stack:
+            tree_hexsha = stack.pop()
+            if tree_hexsha in live_trees or tree_hexsha not in trees:
                 continue
+            live_trees.add(tree_hexsha)
+            stack.extend(trees[tree_hexsha].child_tree_hexshas)
+        live_blobs = {h for t in live_trees for _, h in trees[t].blob_entries}
+        for tree_hexsha in [h for h in trees if h not in live_trees]:
+            del trees[tree_hexsha]
+        for blob_hexsha in [h for h in blobs if h not in live_blobs]:
+            del blobs[blob_hexsha]
+
+    def _resolve_commit_records(
+        self,
+        hexshas: list[str],
+        records: dict[str, CommitRecord],
+        walk: bool,
+        metadata: bool = True,
+        exclude: Iterable[str] = (),
+        reader: Optional[CatFileBatch] = None,
+    ) -> None:
+        """Make sure records holds an entry for every resolvable SHA in hexshas.
+
+        Looks in the object cache first.  Misses are streamed from git: with
+        walk=True their whole uncached history is read in one go, minus history
+        reachable from exclude or from the cache's closed tips; with walk=False
+        only the missing commits themselves are read, through reader when one is
+        given and only structure is wanted.  metadata selects whether streamed
+        records carry metadata.  A walk only needs structure, so any known
+        record will do; otherwise metadata=True makes a structure-only record
+        count as a miss.
+        """
+
+        def have(rec: Optional[CommitRecord]) -> bool:
+            return rec is not None and (rec.has_metadata or not metadata or walk)
+
+        cache = self._cache
+        missing = [h for h in dict.fromkeys(hexshas) if not have(records.get(h))]
+        if cache is not None:
+            still_missing = []
+            for hexsha in missing:
+                rec = cache.get_commit(hexsha)
+                if have(rec):
+                    records[hexsha] = rec
+                else:
+                    still_missing.append(hexsha)
+            missing = still_missing
+        if not missing:
+            return
+
+        git_dir = self._repo.git_dir
+        if not walk and reader is not None and not metadata:
+            self._store_records(reader.read_commit_records(missing), records)
+            return
+        if not walk:
+            stream = iter_log_records(git_dir, missing, no_walk=True, metadata=metadata)
+            self._store_records(stream, records)
+            return
+
+        closed = cache.closed_tips() if cache is not None else set()
+        closed.update(exclude)
+        revs = missing + [f"^{h}" for h in closed]
+        self._store_records(iter_log_records(git_dir, revs, metadata=metadata), records)
+        if closed:
+            # A closed tip promised this history was cached but it is not
+            # (e.g. a shallow boundary, which is never cached): read it directly.
+            stragglers = [h for h in missing if h not in records]
+            if stragglers:
+                stream = iter_log_records(git_dir, stragglers, metadata=metadata)
+                self._store_records(stream, records)
+
+    def _store_records(
+        self, stream: Iterable[CommitRecord], records: dict[str, CommitRecord]
+    ) -> None:
+        cache = self._cache
+        shallow = self._shallow_hexshas() if cache is not None else set()
+        for rec in stream:
+            records[rec.hexsha] = rec
+            # A shallow boundary's parent list changes if the clone is deepened,
+            # so it is the one kind of commit record that is not immutable.
+            if cache is not None and rec.hexsha not in shallow:
+                cache.put_commit(rec)
+
+    def _shallow_hexshas(self) -> set[str]:
+        """Return the commits listed in .git/shallow (shallow-clone boundaries)."""
+        if self._shallow is None:
+            path = os.path.join(self._repo.common_dir, "shallow")
+            try:
+                with open(path) as fh:
+                    self._shallow = {ln.strip() for ln in fh if ln.strip()}
+            except OSError:
+                self._shallow = set()
+        return self._shallow
+
+    def _bfs_commit_objects(
+        self,
+        refs: list[RefInfo],
+        max_depth: Optional[int],
+        include_trees: bool,
+    ) -> tuple[dict[str, CommitData], dict[str, TreeData], dict[str, BlobData]]:
+        """Object-by-object fallback for _bfs_commits, through the ObjectBackend.
+
+        Used only when the streamed traversal fails (e.g. a corrupt object store
+        that makes ``git log`` abort); tolerates unreadable commits one at a time.
+        """
+        objects = self._objects
+        commits: dict[str, CommitData] = {}
+        trees: dict[str, TreeData] = {}
+        blobs: dict[str, BlobData] = {}
+        shallow = self._shallow_hexshas()
+
+        visited: set[str] = set()
+        queue: deque[tuple[str, int]] = deque((ref.commit_hexsha, 0) for ref in refs)
+
+        while queue:
+            hexsha, depth = queue.popleft()
             if hexsha in visited:
                 continue
             visited.add(hexsha)
 
-            # Collect parents; may fail for shallow-clone boundary commits whose
-            # parent objects are not present in the local object store.
-            accessible_parents: list[git.Commit] = []
-            parent_hexshas: list[str] = []
-            try:
-                for p in commit_obj.parents:
-                    try:
-                        parent_hexshas.append(p.hexsha)
-                        accessible_parents.append(p)
-                    except Exception:
-                        pass
-            except Exception as exc:
-                log.debug("Cannot read parents of %s (shallow boundary?): %s", hexsha[:8], exc)
-
             try:
-                msg = (commit_obj.message or "").split("\n")[0][:72]
-                author = commit_obj.author.name
-                date_iso = commit_obj.authored_datetime.isoformat()
+                rec = objects.read_commit(hexsha)
             except Exception as exc:
-                # Commit object not in the local store — shallow clone boundary.
+                # Corrupt object in a damaged store (this fallback's reason to exist).
+                log.debug("Commit %s is unreadable: %s", hexsha[:8], exc)
+                rec = None
+            if rec is None:
                 # Skip it entirely so we don't produce empty/phantom nodes.
-                log.debug("Commit %s is inaccessible (shallow boundary): %s", hexsha[:8], exc)
+                if depth == 0:
+                    log.warning("Cannot resolve ref tip %s", hexsha[:8])
                 continue
 
+            # Shallow boundaries are roots: their parent objects were never fetched.
+            parents = [] if hexsha in shallow else rec.parents
+
             tree_hexsha: Optional[str] = None
             if include_trees:
+                tree_hexsha = rec.tree_hexsha
                 try:
-                    tree_hexsha = commit_obj.tree.hexsha
-                    self._collect_tree(commit_obj.tree, hexsha, trees, blobs)
+                    self._collect_tree(tree_hexsha, "", hexsha, trees, blobs)
                 except Exception as exc:
                     log.debug("Cannot access tree for %s: %s", hexsha[:8], exc)
 
             commits[hexsha] = CommitData(
                 hexsha=hexsha,
-                parents=parent_hexshas,
-                short_message=msg,
-                author=author,
-                date_iso=date_iso,
+                parents=parents,
+                short_message=rec.short_message,
+                author=rec.author,
+                date_iso=rec.date_iso,
                 tree_hexsha=tree_hexsha,
             )
 
             if max_depth is None or depth < max_depth:
-                for parent in accessible_parents:
-                    if parent.hexsha not in visited:
-                        queue.append((parent, depth + 1))
+                queue.extend((p, depth + 1) for p in parents if p not in visited)
 
-        # Strip parent SHAs that aren't in commits — happens at shallow-clone
-        # boundaries and at max_depth cut-offs so we don't produce dangling edges.
+        # Strip parent SHAs that aren't in commits — happens at max_depth cut-offs
+        # and around unreadable objects — so we don't produce dangling edges.
         for cd in commits.values():
             cd.parents = [p for p in cd.parents if p in commits]
 
@@ -658,6 +1523,46 @@ class GitRepo:
                 if parent_hexsha in commits:
                     commits[parent_hexsha].children.add(hexsha)
 
+    def _stream_commits(
+        self, tips: list[str], refs: list[RefInfo], metadata: bool
+    ) -> Iterator[CommitData]:
+        ref_map: dict[str, list[RefInfo]] = {}
+        for ref in refs:
+            ref_map.setdefault(ref.commit_hexsha, []).append(ref)
+        # Children seen so far of commits not yet streamed: just the walk's frontier
+        waiting: dict[str, set[str]] = {}
+        stream = iter_log_records(self._repo.git_dir, tips, metadata=metadata, topo_order=True)
+        for rec in stream:
+            for parent in rec.parents:
+                waiting.setdefault(parent, set()).add(rec.hexsha)
+            yield CommitData(
+                hexsha=rec.hexsha,
+                parents=rec.parents,
+                children=waiting.pop(rec.hexsha, set()),
+                refs=ref_map.get(rec.hexsha, []),
+                short_message=rec.short_message or "",
+                author=rec.author or "",
+                date_iso=rec.date_iso or "",
+                metadata_loaded=metadata,
+            )
+
+    def _estimate_commit_count(self) -> int:
+        """Return an upper bound on the number of commits, without walking history."""
+        cg = self._open_commit_graph()
+        if cg is not None:
+            return len(cg)
+        try:
+            out = subprocess.run(
+                git_command(self._repo.git_dir, "count-objects", "-v"),
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return 0
+        counts = dict(line.split(": ", 1) for line in out.splitlines() if ": " in line)
+        return int(counts.get("count", 0)) + int(counts.get("in-pack", 0))
+
     def _attribute_refs(self, commits: dict[str, CommitData], refs: list[RefInfo]) -> None:
         """Attach each RefInfo to the CommitData it points at."""
         for ref in refs:
@@ -666,47 +1571,194 @@ class GitRepo:
 
     def _collect_tree(
         self,
-        tree: git.Tree,
+        tree_hexsha: str,
+        path: str,
         parent_hexsha: str,
         trees: dict[str, TreeData],
         blobs: dict[str, BlobData],
     ) -> None:
-        """Recursively collect tree and blob objects (verbose mode)."""
-        if tree.hexsha in trees:
-            return
+        """Collect a tree and everything under it (verbose mode); see _collect_trees."""
+        self._collect_trees([(tree_hexsha, None, path, parent_hexsha)], trees, blobs)
 
-        trees[tree.hexsha] = TreeData(
-            hexsha=tree.hexsha,
-            name=tree.name or "/",
-            parent_hexsha=parent_hexsha,
-            child_tree_hexshas=[t.hexsha for t in tree.trees],
-            blob_entries=[(b.name, b.hexsha) for b in tree.blobs],
-            gitlink_entries=[(s.path, s.hexsha) for s in tree if s.mode == 0o160000],
-        )
-
-        for blob in tree.blobs:
-            if blob.hexsha not in blobs:
-                blobs[blob.hexsha] = BlobData(
-                    hexsha=blob.hexsha,
-                    name=blob.name,
-                    parent_tree_hexsha=tree.hexsha,
+    def _collect_trees(
+        self,
+        roots: list[tuple[str, Optional[str], str, str]],
+        trees: dict[str, TreeData],
+        blobs: dict[str, BlobData],
+        tree_path: Optional[str] = None,
+        max_tree_entries: Optional[int] = None,
+    ) -> None:
+        """Collect trees and blobs under each root, or only what differs from a base.
+
+        roots holds (tree, base tree or None, path, parent commit or tree)
+        quadruples; path is the tree's location relative to the root tree (""
+        for a root) and labels gitlink entries.  Without a base everything is
+        collected.  With one, entries whose name and SHA match the base are
+        dropped, except that unchanged subtrees are kept as
+        unchanged_tree_entries and not descended into; changed subtrees are
+        compared with the base's subtree of the same name, and a root equal to
+        its base is not collected at all.  tree_path ("src/service-a") limits
+        the walk to that subtree: the trees above it keep only the entry that
+        leads to it (see _path_entries).  A tree that would show more than
+        max_tree_entries entries gets only their counts in TreeData.summary;
+        its blobs get no BlobData and its subtrees are not read.
+
+        The walk uses an explicit stack of levels -- all roots together, one
+        ObjectBackend batch per level -- so deep trees cost no Python
+        recursion.  Trees are keyed by SHA, so a tree reached twice keeps what
+        was collected the first time.
+        """
+        prefix = tree_path.strip("/") if tree_path else ""
+        level = roots
+        while level:
+            todo = [h for t, b, _, _ in level if t not in trees for h in (t, b) if h]
+            fetched = self._read_trees_lenient(list(dict.fromkeys(todo)))
+            next_level = []
+            for tree_hexsha, base_hexsha, path, parent_hexsha in level:
+                entries = fetched.get(tree_hexsha)
+                if tree_hexsha in trees or tree_hexsha == base_hexsha or entries is None:
+                    continue
+                entries = _path_entries(entries, path, prefix)
+                base = {name: (kind, h) for kind, name, h in fetched.get(base_hexsha, ())}
+                changed = [(k, n, h) for k, n, h in entries if base.get(n) != (k, h)]
+                unchanged = [
+                    (name, h)
+                    for kind, name, h in entries
+                    if kind == "tree" and base.get(name) == (kind, h)
+                ]
+                shown = len(changed) + len(unchanged)
+                if max_tree_entries is not None and shown > max_tree_entries:
+                    n_trees = len(unchanged) + sum(1 for kind, _, _ in changed if kind == "tree")
+                    trees[tree_hexsha] = TreeData(
+                        hexsha=tree_hexsha,
+                        name=posixpath.basename(path) or "/",
+                        parent_hexsha=parent_hexsha,
+                        summary=(shown - n_trees, n_trees),
+                    )
+                    continue
+                trees[tree_hexsha] = TreeData(
+                    hexsha=tree_hexsha,
+                    name=posixpath.basename(path) or "/",
+                    parent_hexsha=parent_hexsha,
+                    child_tree_hexshas=[h for kind, _, h in changed if kind == "tree"],
+                    blob_entries=[(name, h) for kind, name, h in changed if kind == "blob"],
+                    gitlink_entries=[
+                        (posixpath.join(path, name), h)
+                        for kind, name, h in changed
+                        if kind == "commit"
+                    ],
+                    unchanged_tree_entries=unchanged,
                 )
+                for kind, name, hexsha in changed:
+                    if kind == "blob" and hexsha not in blobs:
+                        blobs[hexsha] = BlobData(
+                            hexsha=hexsha, name=name, parent_tree_hexsha=tree_hexsha
+                        )
+                    elif kind == "tree":
+                        base_kind, base_sub = base.get(name, ("", None))
+                        next_level.append(
+                            (
+                                hexsha,
+                                base_sub if base_kind == "tree" else None,
+                                posixpath.join(path, name),
+                                tree_hexsha,
+                            )
+                        )
+            level = next_level
 
-        for subtree in tree.trees:
-            self._collect_tree(subtree, tree.hexsha, trees, blobs)
-
-    def _compute_blob_hash(self, path: str) -> str:
-        """Compute git's blob SHA for a working-tree file."""
-        import os
-
-        full_path = os.path.join(self._repo.working_dir, path)
+    def _read_trees_lenient(self, hexshas: list[str]) -> dict[str, TreeEntries]:
+        """Like _read_trees(), but trees that cannot be read are left out."""
         try:
-            with open(full_path, "rb") as fh:
-                content = fh.read()
-            header = b"blob %d\0" % len(content)
-            return hashlib.sha1(header + content).hexdigest()
-        except OSError:
-            return "?" * 40
+            return self._read_trees(hexshas)
+        except Exception as exc:
+            log.debug("Cannot batch-read %d trees: %s", len(hexshas), exc)
+        fetched: dict[str, TreeEntries] = {}
+        for hexsha in hexshas:
+            try:
+                fetched[hexsha] = self._read_tree_entries(hexsha)
+            except Exception as exc:
+                log.debug("Cannot access tree %s: %s", hexsha[:8], exc)
+        return fetched
+
+    def _read_trees(self, hexshas: list[str]) -> dict[str, TreeEntries]:
+        """Return {hexsha: entries} from the object cache, else in one ObjectBackend batch."""
+        found: dict[str, TreeEntries] = {}
+        missing = hexshas
+        if self._cache is not None:
+            missing = []
+            for hexsha in hexshas:
+                entries = self._cache.get_tree(hexsha)
+                if entries is None:
+                    missing.append(hexsha)
+                else:
+                    found[hexsha] = entries
+        if missing:
+            for hexsha, entries in zip(missing, self._objects.read_trees(missing)):
+                found[hexsha] = entries
+                if self._cache is not None:
+                    self._cache.put_tree(hexsha, entries)
+        return found
+
+    def _read_tree_entries(self, tree_hexsha: str) -> TreeEntries:
+        """Return [(kind, name, hexsha), ...] in tree order; kind is tree/blob/commit."""
+        return self._read_trees([tree_hexsha])[tree_hexsha]
+
+    def _compute_blob_hashes(self, paths: list[str]) -> list[str]:
+        """Compute git's blob SHAs for working-tree files ("?" * 40 if unreadable).
+
+        Hashes are kept on this GitRepo, keyed by the file's (mtime, size,
+        inode), so a monitor re-render only re-hashes files whose stat data
+        changed.  Only the files passed in are kept: one that is no longer
+        modified is dropped, and is re-hashed anyway once it changes again.
+        As with git's racily clean index entries, a file modified within
+        RACY_NS of being hashed is not trusted: a second write in the same
+        timestamp tick could keep its stat data, so it is hashed again next
+        time.  The rest are hashed by _hash_files().
+        """
+        full_paths = [os.path.join(self._repo.working_dir, path) for path in paths]
+        found: dict[str, str] = {}
+        kept: dict[str, tuple[tuple[int, int, int], str]] = {}
+        todo: list[tuple[str, tuple[int, int, int]]] = []
+        for full_path in full_paths:
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            hit = self._blob_hashes.get(full_path)
+            if hit is not None and hit[0] == key:
+                found[full_path] = hit[1]
+                kept[full_path] = hit
+            else:
+                todo.append((full_path, key))
+        started = time.time_ns()
+        hashed = self._hash_files([full_path for full_path, _ in todo])
+        for full_path, key in todo:
+            hexsha = hashed.get(full_path)
+            if hexsha is None:
+                continue
+            found[full_path] = hexsha
+            if started - key[0] >= RACY_NS:
+                kept[full_path] = (key, hexsha)
+        self._blob_hashes = kept
+        return [found.get(full_path, "?" * 40) for full_path in full_paths]
+
+    def _hash_files(self, full_paths: list[str]) -> dict[str, Optional[str]]:
+        """Hash files in one ``git hash-object`` (blob_hasher="git") or on a thread pool.
+
+        Either way each file is streamed, so memory stays bounded by the read
+        chunk rather than the file size.  If git fails, e.g. because a file
+        vanished, the files are hashed in Python instead.
+        """
+        if self.blob_hasher == "git" and full_paths and not any("\n" in p for p in full_paths):
+            try:
+                return dict(zip(full_paths, hash_object_paths(self._repo.git_dir, full_paths)))
+            except (OSError, GitCommandError) as exc:
+                log.debug("git hash-object failed, hashing in Python: %s", exc)
+        if len(full_paths) <= 1:
+            return {path: _try_hash_file(path) for path in full_paths}
+        with ThreadPoolExecutor(max_workers=min(len(full_paths), _HASH_THREADS)) as pool:
+            return dict(zip(full_paths, pool.map(_try_hash_file, full_paths)))
 
     def _compute_branch_topology(
         self, nodes: list[BranchNode]
@@ -723,12 +1775,10 @@ class GitRepo:
         The most recent merge-base always wins when multiple candidates exist.
         Same-tip branches (fast-forward) stay as direct branch-to-branch edges.
         """
-        repo = self._repo
-
         # parent_map: child_name → (parent_id, is_strict_ancestor, rank_date)
         # parent_id is always a fork commit hexsha (or a branch name for same-tip case).
         parent_map: dict[str, tuple[str, bool, int]] = {}
-        forks: dict[str, git.Commit] = {}  # hexsha → git.Commit for fork commits
+        forks: dict[str, int] = {}  # hexsha → committed date for fork commits
         # branch_at_fork: branch_name → fork_hexsha (the branch ends at this fork commit)
         branch_at_fork: dict[str, str] = {}
 
@@ -741,51 +1791,28 @@ class GitRepo:
                         parent, child = na, nb
                     else:
                         parent, child = nb, na
-                    try:
-                        date = repo.commit(parent.commit_hexsha).committed_date
-                    except Exception:
-                        date = 0
+                    date = self._committed_date(parent.commit_hexsha)
                     self._maybe_update_parent(parent_map, child.name, parent.name, True, date)
                     continue
                 try:
-                    ca = repo.commit(na.commit_hexsha)
-                    cb = repo.commit(nb.commit_hexsha)
-                    bases = repo.merge_base(ca, cb)
-                    if not bases:
+                    base = self._objects.merge_base(na.commit_hexsha, nb.commit_hexsha)
+                    if base is None:
                         continue
-                    base = bases[0]
+                    base_date = self._committed_date(base)
+                    forks[base] = base_date
 
-                    if base.hexsha == ca.hexsha:
+                    if base == na.commit_hexsha:
                         # na is a strict ancestor of nb: fork commit at na's tip
-                        forks[ca.hexsha] = ca
-                        self._maybe_update_parent(
-                            parent_map, nb.name, ca.hexsha, False, ca.committed_date
-                        )
-                        branch_at_fork[na.name] = ca.hexsha
-                    elif base.hexsha == cb.hexsha:
+                        self._maybe_update_parent(parent_map, nb.name, base, False, base_date)
+                        branch_at_fork[na.name] = base
+                    elif base == nb.commit_hexsha:
                         # nb is a strict ancestor of na: fork commit at nb's tip
-                        forks[cb.hexsha] = cb
-                        self._maybe_update_parent(
-                            parent_map, na.name, cb.hexsha, False, cb.committed_date
-                        )
-                        branch_at_fork[nb.name] = cb.hexsha
+                        self._maybe_update_parent(parent_map, na.name, base, False, base_date)
+                        branch_at_fork[nb.name] = base
                     else:
                         # Diverged — fork commit at the common ancestor.
-                        forks[base.hexsha] = base
-                        self._maybe_update_parent(
-                            parent_map,
-                            na.name,
-                            base.hexsha,
-                            False,
-                            base.committed_date,
-                        )
-                        self._maybe_update_parent(
-                            parent_map,
-                            nb.name,
-                            base.hexsha,
-                            False,
-                            base.committed_date,
-                        )
+                        self._maybe_update_parent(parent_map, na.name, base, False, base_date)
+                        self._maybe_update_parent(parent_map, nb.name, base, False, base_date)
                 except Exception as exc:
                     log.debug("merge_base(%s, %s) failed: %s", na.name, nb.name, exc)
 
@@ -838,18 +1865,17 @@ class GitRepo:
                 # parent_map (a closer divergence point overwrote it).  Find the
                 # oldest used fork that this branch's tip is an ancestor of and
                 # connect the branch there so it is not left as an island.
-                branch_commit = forks.get(fork_hexsha)
-                if branch_commit is None:
+                if fork_hexsha not in forks:
                     continue
                 best_fork: str | None = None
                 best_date: int | None = None
                 for used_hex in used_fork_hexshas:
                     try:
-                        bases = repo.merge_base(branch_commit, forks[used_hex])
+                        base = self._objects.merge_base(fork_hexsha, used_hex)
                     except Exception:
                         continue
-                    if bases and bases[0].hexsha == branch_commit.hexsha:
-                        date = forks[used_hex].committed_date
+                    if base == fork_hexsha:
+                        date = forks[used_hex]
                         if best_date is None or date < best_date:
                             best_date = date
                             best_fork = used_hex
@@ -863,17 +1889,52 @@ class GitRepo:
         # (set iteration order is randomised by Python's hash seed).
         fork_commit_nodes: list[ForkCommitNode] = []
         for hexsha in sorted(used_fork_hexshas):
-            base = forks[hexsha]
             fork_commit_nodes.append(
                 ForkCommitNode(
                     hexsha=hexsha,
                     short_hexsha=hexsha[:8],
-                    date_iso=base.authored_datetime.isoformat(),
+                    date_iso=self._objects.read_commit(hexsha).date_iso,
                 )
             )
 
         return fork_commit_nodes, edges
 
+    def _load_commit_dates(self, hexshas: Iterable[str]) -> None:
+        """Learn the committer dates that neither refs nor the commit-graph supply, in one batch.
+
+        Packed tags come without dates (see _read_ref_records); this keeps
+        _committed_date() from reading their commits one object at a time.
+        """
+        cg = self._open_commit_graph()
+        todo = [
+            h
+            for h in dict.fromkeys(hexshas)
+            if h not in self._commit_dates and (cg is None or cg.commit_date(h) is None)
+        ]
+        if not todo:
+            return
+        try:
+            with CatFileBatch(self._repo.git_dir) as batch:
+                for hexsha, date in batch.read_committed_dates(todo):
+                    if date is not None:
+                        self._commit_dates[hexsha] = date
+        except (OSError, GitCommandError) as exc:
+            log.debug("Cannot batch-read commit dates: %s", exc)
+
+    def _committed_date(self, hexsha: str) -> int:
+        """Return the committer timestamp, from refs or the commit-graph when they know it."""
+        if hexsha in self._commit_dates:
+            return self._commit_dates[hexsha]
+        cg = self._open_commit_graph()
+        if cg is not None:
+            date = cg.commit_date(hexsha)
+            if date is not None:
+                return date
+        try:
+            return self._objects.committed_date(hexsha) or 0
+        except Exception:
+            return 0
+
     @staticmethod
     def _maybe_update_parent(
         parent_map: dict[str, tuple[str, bool, int]],